@@ -0,0 +1,203 @@
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .command_executor import RACCommandExecutor, CancelToken
+from .rac_parser import RacRecord
+from .result_cache import normalize_args, DEFAULT_ENDPOINT
+
+
+class CommandHandle:
+    """Дескриптор асинхронно выполняемой команды RAC"""
+
+    def __init__(self, command_id: int, args: List[str], future: Optional[Future], cancel_token: CancelToken):
+        self.command_id = command_id
+        self.args = args
+        self.future = future
+        self.cancel_token = cancel_token
+        # Время выполнения без учета ожидания в очереди
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def cancel(self):
+        """Отмена команды: снятие из очереди или завершение процесса rac"""
+        if not self.future.cancel():
+            self.cancel_token.cancel()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: float = None) -> Tuple[bool, Any]:
+        """Ожидание результата выполнения команды"""
+        if self.future.cancelled():
+            return False, "Команда отменена"
+        return self.future.result(timeout)
+
+
+class AsyncCommandExecutor:
+    """Асинхронный исполнитель команд RAC поверх пула потоков
+
+    Команды выполняются вне GUI-потока, одновременно выполняется не более
+    max_concurrency процессов rac и не более per_host_limit на один host:port.
+    Команды хоста, у которого заняты все места, ждут в очереди этого хоста и
+    передаются в пул, когда место освобождается: рабочие потоки пула не
+    простаивают в ожидании, и команды других хостов выполняются без задержки.
+    Результат возвращается через Future.
+    """
+
+    def __init__(self, executor: RACCommandExecutor, max_concurrency: int = 4, per_host_limit: int = 2):
+        self.executor = executor
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.per_host_limit = max(1, int(per_host_limit))
+        # Число выполняемых команд и очередь ожидающих по host:port
+        self._host_running: Dict[str, int] = {}
+        self._host_queues: Dict[str, Deque[Tuple[CommandHandle, Any]]] = {}
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="rac")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active: Dict[int, CommandHandle] = {}
+
+    def submit(self, args: List[str],
+               callback: Optional[Callable[[CommandHandle, bool, Any], None]] = None,
+               on_records: Optional[Callable[[CommandHandle, List[RacRecord]], None]] = None) -> CommandHandle:
+        """Постановка команды в очередь выполнения
+
+        callback вызывается по завершении команды, on_records — для каждой пачки
+        записей по мере их поступления. Оба вызываются в рабочем потоке.
+        """
+        handle = CommandHandle(next(self._ids), list(args), Future(), CancelToken())
+        command_id = handle.command_id
+
+        records_callback = None
+        if on_records is not None:
+            records_callback = lambda batch: on_records(handle, batch)
+
+        def on_done(done_future: Future):
+            with self._lock:
+                self._active.pop(command_id, None)
+            if callback is None:
+                return
+            if done_future.cancelled():
+                success, output = False, "Команда отменена"
+            elif done_future.exception() is not None:
+                success, output = False, f"Неожиданная ошибка: {done_future.exception()}"
+            else:
+                success, output = done_future.result()
+            callback(handle, success, output)
+
+        # Дескриптор регистрируется до запуска: команда может завершиться сразу
+        with self._lock:
+            self._active[command_id] = handle
+        handle.future.add_done_callback(on_done)
+
+        endpoint = self._endpoint(handle.args)
+        with self._lock:
+            running = self._host_running.get(endpoint, 0)
+            if running >= self.per_host_limit:
+                self._host_queues.setdefault(endpoint, deque()).append((handle, records_callback))
+                return handle
+            self._host_running[endpoint] = running + 1
+        self._dispatch(endpoint, handle, records_callback)
+        return handle
+
+    def next_id(self) -> int:
+        """Идентификатор из общего с командами пространства (для групп команд)"""
+        return next(self._ids)
+
+    @staticmethod
+    def _endpoint(args: List[str]) -> str:
+        key = normalize_args(args)
+        return key.endpoint if key else DEFAULT_ENDPOINT
+
+    def _dispatch(self, endpoint: str, handle: CommandHandle, records_callback):
+        """Передача команды в пул; место хоста уже занято за ней"""
+        try:
+            self._pool.submit(self._run, endpoint, handle, records_callback)
+        except RuntimeError:
+            # Пул остановлен (shutdown): команда не будет выполнена
+            handle.future.cancel()
+            self._release(endpoint)
+
+    def _release(self, endpoint: str):
+        """Освобождение места хоста и запуск следующей неотмененной команды из его очереди"""
+        with self._lock:
+            queue = self._host_queues.get(endpoint)
+            while queue:
+                handle, records_callback = queue.popleft()
+                if not handle.future.cancelled():
+                    break
+            else:
+                self._host_queues.pop(endpoint, None)
+                running = self._host_running.get(endpoint, 1) - 1
+                if running > 0:
+                    self._host_running[endpoint] = running
+                else:
+                    self._host_running.pop(endpoint, None)
+                return
+        # Место переходит к следующей команде хоста без освобождения
+        self._dispatch(endpoint, handle, records_callback)
+
+    def _run(self, endpoint: str, handle: CommandHandle, records_callback):
+        """Выполнение команды в рабочем потоке"""
+        try:
+            if not handle.future.set_running_or_notify_cancel():
+                return  # Отменена, пока ждала в очереди
+            handle.started_at = time.monotonic()
+            try:
+                result = self.executor.execute_command(handle.args, handle.cancel_token, records_callback)
+            except BaseException as e:
+                handle.finished_at = time.monotonic()
+                handle.future.set_exception(e)
+            else:
+                handle.finished_at = time.monotonic()
+                handle.future.set_result(result)
+        finally:
+            self._release(endpoint)
+
+    def get_handle(self, command_id: int) -> Optional[CommandHandle]:
+        with self._lock:
+            return self._active.get(command_id)
+
+    def cancel(self, command_id: int) -> bool:
+        """Отмена команды по идентификатору"""
+        handle = self.get_handle(command_id)
+        if handle is None:
+            return False
+        handle.cancel()
+        return True
+
+    def cancel_all(self):
+        """Отмена всех выполняемых и ожидающих команд"""
+        with self._lock:
+            handles = list(self._active.values())
+        for handle in handles:
+            handle.cancel()
+
+    def active_count(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    def set_max_concurrency(self, max_concurrency: int):
+        """Изменение лимита параллельных команд (действует для новых команд)"""
+        max_concurrency = max(1, int(max_concurrency))
+        if max_concurrency == self.max_concurrency:
+            return
+        old_pool = self._pool
+        self.max_concurrency = max_concurrency
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="rac")
+        # Уже поставленные команды дорабатывают в старом пуле
+        old_pool.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = False):
+        """Остановка исполнителя с отменой незавершенных команд"""
+        self.cancel_all()
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,256 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime
+from typing import List, TextIO, Tuple
+
+from .rac_commands import RACCommands
+from .command_discovery import SchemaCache
+from .rac_parser import RacRecord, format_record, format_value
+from .logger import RACLogger
+from .variable_manager import VariableManager
+from .command_executor import RACCommandExecutor
+from .command_history import CommandHistory
+from .profiling import PROFILER
+
+USAGE = """python -m core [параметры] РЕЖИМ КОМАНДА... [--параметр=значение ...]
+
+Параметры утилиты указываются до режима, параметры команды rac — после.
+Примеры:
+    python -m core --host srv1c cluster list
+    python -m core --format csv session list --cluster=$(cluster_uid)
+    python -m core --hosts srv1,srv2,srv3 --format json session list --cluster=...
+    python -m core --var-profile prod infobase summary list --cluster=$(cluster_uid)
+    python -m core --list-commands infobase
+    python -m core --rac /opt/1cv8/x86_64/8.3.24.1342/rac --discover-commands
+    python -m core pipeline terminate_sessions.json"""
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m core", usage=USAGE,
+                                     description="Выполнение команд RAC без графического интерфейса")
+    parser.add_argument("--host", help="хост RAS (по умолчанию переменная default_host)")
+    parser.add_argument("--port", help="порт RAS (по умолчанию переменная default_port)")
+    parser.add_argument("--hosts", help="список хостов для параллельного выполнения, через запятую")
+    parser.add_argument("--format", choices=["json", "csv", "text"], default="json", help="формат вывода")
+    parser.add_argument("--config", default="config/variables.json", help="файл переменных")
+    parser.add_argument("--rac", help="путь к утилите rac (по умолчанию переменная rac_path)")
+    parser.add_argument("--var-profile", metavar="ПРОФИЛЬ", help="профиль переменных (prod, test, ...)")
+    parser.add_argument("--list-commands", nargs="?", const="", metavar="РЕЖИМ",
+                        help="список режимов или команд режима")
+    parser.add_argument("--discover-commands", action="store_true",
+                        help="определить команды по справке установленной rac и сохранить их")
+    parser.add_argument("--verbose", action="store_true", help="выводить журнал выполнения в stderr")
+    return parser
+
+
+# Параметры утилиты, значение которых может идти отдельным аргументом
+VALUE_OPTIONS = {"--host", "--port", "--hosts", "--format", "--config", "--rac", "--var-profile"}
+
+
+def split_argv(argv: List[str]) -> Tuple[List[str], List[str]]:
+    """Разделение аргументов на параметры утилиты и команду rac (с первого позиционного)"""
+    options = []
+    index = 0
+    while index < len(argv) and argv[index].startswith("-"):
+        arg = argv[index]
+        options.append(arg)
+        index += 1
+        takes_value = arg in VALUE_OPTIONS or (arg == "--list-commands" and index < len(argv)
+                                               and not argv[index].startswith("-"))
+        if takes_value and index < len(argv):
+            options.append(argv[index])
+            index += 1
+    return options, argv[index:]
+
+
+def parse_command(tokens: List[str]) -> Tuple[str, str, dict]:
+    """Разбор 'режим команда... --параметр=значение' в (режим, команда, параметры)"""
+    positional = [token for token in tokens if not token.startswith("--")]
+    parameters = {}
+    for token in tokens:
+        if token.startswith("--"):
+            name, separator, value = token[2:].partition("=")
+            parameters[name] = value if separator else True
+    if not positional:
+        raise ValueError("Не указан режим RAC")
+    return positional[0], " ".join(positional[1:]), parameters
+
+
+def json_default(value):
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def write_records(records: List[RacRecord], output_format: str, stream: TextIO):
+    """Вывод записей в формате json, csv или text (как у rac)"""
+    if output_format == "json":
+        json.dump(records, stream, ensure_ascii=False, indent=2, default=json_default)
+        stream.write("\n")
+    elif output_format == "csv":
+        columns = []
+        for record in records:
+            for key in record:
+                if key not in columns:
+                    columns.append(key)
+        writer = csv.DictWriter(stream, fieldnames=columns, lineterminator="\n")
+        writer.writeheader()
+        for record in records:
+            writer.writerow({key: format_value(value) for key, value in record.items()})
+    else:
+        for record in records:
+            for line in format_record(record):
+                stream.write(line + "\n")
+            stream.write("\n")
+
+
+def list_commands(mode: str, stream: TextIO) -> int:
+    commands = RACCommands.get_all_commands()
+    if not mode:
+        for name in commands.keys():
+            stream.write(name + "\n")
+        return 0
+    if mode not in commands:
+        sys.stderr.write(f"Неизвестный режим: {mode}\n")
+        return 2
+    for command in commands[mode]:
+        params = " ".join(f"--{param.name}{'*' if param.required else ''}" for param in command.parameters)
+        stream.write(f"{command.command:30} {command.description}\n")
+        if params:
+            stream.write(f"{'':30} {params}\n")
+    return 0
+
+
+def schema_cache(options) -> SchemaCache:
+    return SchemaCache(os.path.join(os.path.dirname(options.config), "rac_schema"))
+
+
+def create_executor(options) -> RACCommandExecutor:
+    """Исполнитель с переменными из --config; история команд хранится рядом с ними
+
+    Если команды установленной rac уже определялись, используется сохраненный каталог.
+    """
+    history_path = os.path.join(os.path.dirname(options.config), "history.db")
+    variable_manager = VariableManager(options.config)
+    if options.var_profile:
+        variable_manager.set_active_profile(options.var_profile)
+    executor = RACCommandExecutor(RACLogger(console=options.verbose), variable_manager,
+                                  rac_path=options.rac, history=CommandHistory(history_path))
+    catalog = schema_cache(options).load(executor.get_rac_path())
+    if catalog is not None:
+        RACCommands.set_catalog(catalog)
+    return executor
+
+
+def discover_commands(options, executor: RACCommandExecutor) -> int:
+    """Определение команд по справке rac с сохранением каталога"""
+    rac_path = executor.get_rac_path()
+    try:
+        catalog = schema_cache(options).discover(rac_path, RACCommands.get_builtin_commands())
+    except (OSError, ValueError, RuntimeError, subprocess.SubprocessError) as e:
+        sys.stderr.write(f"Не удалось определить команды rac: {e}\n")
+        return 1
+    total = sum(len(catalog[mode]) for mode in catalog)
+    sys.stderr.write(f"Команды {rac_path}: режимов {len(catalog)}, команд {total}\n")
+    return 0
+
+
+def run_pipeline(path: str, options, executor: RACCommandExecutor) -> int:
+    """Выполнение конвейера команд из файла JSON/YAML"""
+    from .async_executor import AsyncCommandExecutor
+    from .pipeline import PipelineError, PipelineRunner, load_pipeline
+
+    try:
+        pipeline = load_pipeline(path)
+    except (OSError, PipelineError) as e:
+        sys.stderr.write(f"{e}\n")
+        return 2
+
+    pipeline.host = pipeline.host or options.host
+    pipeline.port = pipeline.port or options.port
+    async_executor = AsyncCommandExecutor(executor)
+    try:
+        result = PipelineRunner(async_executor).run(pipeline)
+    finally:
+        async_executor.shutdown()
+
+    for line in result.summary_lines():
+        sys.stderr.write(line + "\n")
+    write_records(result.records(), options.format, sys.stdout)
+    return 0 if result.success else 1
+
+
+def main(argv: List[str] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    option_args, command_args = split_argv(argv)
+    options = build_parser().parse_args(option_args)
+    # RAC_ADMIN_PROFILE: профиль записывается при завершении процесса
+    PROFILER.start()
+
+    is_pipeline = command_args[:1] == ["pipeline"]
+    if is_pipeline and len(command_args) != 2:
+        sys.stderr.write(f"Укажите файл конвейера\n\n{USAGE}\n")
+        return 2
+    if not is_pipeline and options.list_commands is None and not options.discover_commands:
+        try:
+            mode, command, parameters = parse_command(command_args)
+        except ValueError as e:
+            sys.stderr.write(f"{e}\n\n{USAGE}\n")
+            return 2
+
+    # Исполнитель создается до проверки команды: каталог может быть определен по справке rac
+    try:
+        executor = create_executor(options)
+    except KeyError as e:
+        sys.stderr.write(f"{e.args[0]}\n")
+        return 2
+    variable_manager = executor.variable_manager
+
+    try:
+        if options.discover_commands:
+            return discover_commands(options, executor)
+        if options.list_commands is not None:
+            return list_commands(options.list_commands, sys.stdout)
+        if is_pipeline:
+            return run_pipeline(command_args[1], options, executor)
+
+        rac_command = RACCommands.find_command(mode, command)
+        if rac_command is None:
+            sys.stderr.write(f"Неизвестная команда: {mode} {command}\n")
+            return 2
+
+        missing = [param.name for param in rac_command.parameters
+                   if param.required and param.name not in parameters]
+        if missing:
+            sys.stderr.write(f"Не заполнены обязательные параметры: {', '.join(missing)}\n")
+            return 2
+
+        if options.hosts:
+            from .async_executor import AsyncCommandExecutor
+            from .fanout import FanOutExecutor, parse_hosts
+
+            port = options.port or variable_manager.get_variable("default_port") or "1545"
+            async_executor = AsyncCommandExecutor(executor, max_concurrency=16)
+            result = FanOutExecutor(async_executor).run(parse_hosts(options.hosts, port), mode, command, parameters)
+            async_executor.shutdown()
+            for line in result.summary_lines():
+                sys.stderr.write(line + "\n")
+            write_records(result.records, options.format, sys.stdout)
+            return 0 if result.success else 1
+
+        args = executor.build_command_args(mode, command, parameters, options.host, options.port)
+        success, output = executor.execute_command(args)
+        if not success:
+            sys.stderr.write(f"{output}\n")
+            return 1
+        write_records(output, options.format, sys.stdout)
+        return 0
+    finally:
+        executor.close()
@@ -0,0 +1,333 @@
+"""Определение команд установленной утилиты rac по ее справке
+
+Каталог rac_commands.json описывает команды одной версии платформы, а
+состав команд и параметров меняется между релизами 8.3.x. Для каждой
+утилиты rac один раз выполняется rac help <режим> по всем режимам, справка
+разбирается в RacCommand и объединяется с каталогом: состав команд и
+обязательность параметров берутся из справки, новые параметры из справки
+добавляются к параметрам каталога, а описания и допустимые значения уже
+известных параметров берутся из каталога. Результат записывается в каталог кеша в формате
+rac_commands.json, отдельным файлом на каждую версию rac.
+
+Утилита опознается по пути, времени изменения и размеру файла, а версия
+(rac --version) запрашивается только когда файл изменился, поэтому при
+последующих запусках каталог загружается без запуска rac.
+"""
+import json
+import os
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from .rac_commands import (CatalogError, CommandCatalog, CommandParam, ParamType, RacCommand, CATALOG_SCHEMA,
+                           load_compiled, validate_catalog)
+from .variable_manager import write_atomic
+
+DEFAULT_SCHEMA_DIR = "config/rac_schema"
+INDEX_FILE = "index.json"
+# Версия разбора справки: каталоги, сохраненные прежним разбором, определяются заново
+PARSER_VERSION = 2
+# Время ожидания справки одного режима, секунды
+HELP_TIMEOUT = 15
+# Число одновременно запрашиваемых справок режимов
+HELP_WORKERS = 4
+
+SECTION_RE = re.compile(r'^(\S.*):\s*$')
+COMMAND_SECTIONS = {"команды", "commands"}
+# Параметры, общие для всех команд режима (cluster, cluster-user, cluster-pwd, ...)
+COMMON_SECTIONS = {"общие параметры", "параметры", "shared options", "common parameters", "parameters"}
+# Параметры самой утилиты из раздела общих параметров, а не команд режима
+UTILITY_OPTIONS = {"version", "help"}
+PARAM_NAME_RE = re.compile(r'^--([\w-]+)')
+PARAM_RE = re.compile(r'^--(?P<name>[\w-]+)(?:\[?=(?P<value>[^\]\s|]*(?:\|[^\]\s|]*)*)\]?)?'
+                      r'(?P<aliases>(?:\s*\|\s*-\S+)*)\s*$')
+REQUIRED_RE = re.compile(r'\((?:обязательный|обязательная|обязательное|required)\)\s*', re.IGNORECASE)
+INTEGER_PLACEHOLDERS = {"number", "int", "integer", "count", "seconds", "sec", "size", "level", "limit",
+                        "percent", "n", "kb", "mb"}
+
+
+def decode_output(data: bytes) -> str:
+    return data.decode('cp866', errors='replace')
+
+
+def rac_version(rac_path: str) -> str:
+    """Версия утилиты по rac --version"""
+    result = subprocess.run([rac_path, "--version"], capture_output=True, timeout=HELP_TIMEOUT)
+    version = decode_output(result.stdout).strip().splitlines()
+    if result.returncode != 0 or not version:
+        raise RuntimeError(f"Не удалось определить версию rac: {decode_output(result.stderr).strip()}")
+    return version[0].strip()
+
+
+def param_type(name: str, value: Optional[str]) -> Tuple[ParamType, List[str]]:
+    """Тип параметра по обозначению значения в справке (<uuid>, <pwd>, <on|off>, ...)"""
+    if value is None:
+        return ParamType.BOOLEAN, []
+    placeholder = value.strip("<>").lower()
+    if "|" in placeholder:
+        return ParamType.ENUM, [item for item in value.strip("<>").split("|") if item]
+    if placeholder == "uuid":
+        return ParamType.UUID, []
+    if placeholder in ("pwd", "password") or name.endswith("-pwd") or name == "pwd":
+        return ParamType.PASSWORD, []
+    if placeholder == "port":
+        return ParamType.PORT, []
+    if placeholder in ("host", "address"):
+        return ParamType.HOST, []
+    if placeholder in INTEGER_PLACEHOLDERS:
+        return ParamType.INTEGER, []
+    return ParamType.STRING, []
+
+
+def _sentence(text: str) -> str:
+    text = " ".join(text.split())
+    return text[:1].upper() + text[1:]
+
+
+def _param_from_usage(usage: str) -> CommandParam:
+    match = PARAM_RE.match(usage)
+    if match:
+        name = match.group("name")
+        kind, enum_values = param_type(name, match.group("value"))
+        aliases = [alias.strip().lstrip("-") for alias in match.group("aliases").split("|") if alias.strip()]
+    else:
+        # Необычная запись значения: параметр считается строковым
+        name_match = PARAM_NAME_RE.match(usage)
+        name = name_match.group(1) if name_match else ""
+        kind, enum_values, aliases = ParamType.STRING, [], []
+    return CommandParam(name, kind, enum_values=enum_values, short_name=aliases[0] if aliases else "")
+
+
+def parse_help(mode: str, text: str) -> List[RacCommand]:
+    """Разбор вывода rac help <режим>: команды из раздела «Команды» с их параметрами
+
+    Параметры из раздела «Общие параметры» (кроме --version и --help самой
+    утилиты) относятся ко всем командам режима и добавляются в начало
+    параметров каждой команды.
+    """
+    commands: List[RacCommand] = []
+    common: List[CommandParam] = []
+    section = None  # "commands", "common" или None
+    command_indent = None
+    # Текущий элемент, к которому относятся строки описания: команда или параметр
+    current = None
+    description: List[str] = []
+
+    def finish():
+        if current is None:
+            return
+        text = " ".join(description)
+        if isinstance(current, RacCommand):
+            current.description = _sentence(text)
+        else:
+            current.required = bool(REQUIRED_RE.search(text))
+            current.description = _sentence(REQUIRED_RE.sub("", text))
+        description.clear()
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        header = SECTION_RE.match(line)
+        if header:
+            finish()
+            current = None
+            name = header.group(1).strip().lower()
+            section = "commands" if name in COMMAND_SECTIONS else "common" if name in COMMON_SECTIONS else None
+            command_indent = None
+            continue
+        if section is None:
+            continue
+
+        if section == "common":
+            if stripped.startswith("--"):
+                finish()
+                current = _param_from_usage(stripped)
+                if current.name and current.name not in UTILITY_OPTIONS and \
+                        all(param.name != current.name for param in common):
+                    common.append(current)
+            elif current is not None:
+                description.append(stripped)
+            continue
+
+        indent = len(line) - len(line.lstrip())
+        if command_indent is None:
+            command_indent = indent
+        if stripped.startswith("--"):
+            if not commands:
+                continue
+            finish()
+            current = _param_from_usage(stripped)
+            if current.name and all(param.name != current.name for param in commands[-1].parameters):
+                commands[-1].parameters.append(current)
+            continue
+        if indent <= command_indent:
+            finish()
+            name = " ".join(stripped.split())
+            current = next((command for command in commands if command.command == name), None)
+            if current is None:
+                current = RacCommand(mode=mode, command=name, description="")
+                commands.append(current)
+        elif current is not None:
+            description.append(stripped)
+    finish()
+
+    for command in commands:
+        own = {param.name for param in command.parameters}
+        command.parameters[:0] = [param for param in common if param.name not in own]
+    return commands
+
+
+def merge_commands(discovered: List[RacCommand], known: List[RacCommand]) -> List[RacCommand]:
+    """Команды по справке rac с описаниями и типами параметров из каталога
+
+    Параметры каталога, которых нет в справке, сохраняются: справка
+    установленной версии может быть неполной. Параметры идут в порядке
+    каталога, новые параметры из справки — после них.
+    """
+    known_commands = {command.command: command for command in known}
+    merged = []
+    for command in discovered:
+        base = known_commands.get(command.command)
+        found = {param.name: param for param in command.parameters}
+        parameters = []
+        for known_param in base.parameters if base else []:
+            param = found.get(known_param.name)
+            if param is not None and known_param.required != param.required:
+                # Обязательность параметра определяет установленная утилита
+                parameters.append(replace(known_param, required=param.required))
+            else:
+                parameters.append(known_param)
+        names = {param.name for param in parameters}
+        parameters += [param for param in command.parameters if param.name not in names]
+        merged.append(RacCommand(mode=command.mode, command=command.command,
+                                 description=base.description if base and base.description else command.description,
+                                 parameters=parameters))
+    return merged
+
+
+def catalog_data(commands: Mapping[str, List[RacCommand]], source: dict) -> dict:
+    """Команды в формате rac_commands.json"""
+    def param_data(param: CommandParam) -> dict:
+        data = {"name": param.name, "type": param.param_type.value}
+        if param.required:
+            data["required"] = True
+        data["description"] = param.description
+        if param.enum_values:
+            data["enum"] = list(param.enum_values)
+        if param.short_name:
+            data["short"] = param.short_name
+        if param.default_value is not None:
+            data["default"] = param.default_value
+        return data
+
+    return {
+        "schema": CATALOG_SCHEMA,
+        "source": source,
+        "modes": {
+            mode: [{"command": command.command, "description": command.description,
+                    "parameters": [param_data(param) for param in command.parameters]}
+                   for command in mode_commands]
+            for mode, mode_commands in commands.items()
+        },
+    }
+
+
+class SchemaCache:
+    """Каталоги команд, определенные по справке rac, по версиям утилиты"""
+
+    def __init__(self, directory: str = DEFAULT_SCHEMA_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def _read_index(self) -> Dict[str, dict]:
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            return index if isinstance(index, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def catalog_path(self, version: str) -> str:
+        return os.path.join(self.directory, re.sub(r'[^\w.-]', '_', version) + ".json")
+
+    def lookup(self, rac_path: str) -> Optional[str]:
+        """Файл каталога для утилиты, если она не менялась со времени определения команд"""
+        try:
+            stat = os.stat(rac_path)
+        except OSError:
+            return None
+        entry = self._read_index().get(os.path.abspath(rac_path))
+        if not entry or entry.get("mtime_ns") != stat.st_mtime_ns or entry.get("size") != stat.st_size \
+                or entry.get("parser") != PARSER_VERSION:
+            return None
+        path = self.catalog_path(entry.get("version", ""))
+        return path if os.path.exists(path) else None
+
+    def load(self, rac_path: str) -> Optional[CommandCatalog]:
+        """Сохраненный каталог утилиты без запуска rac; None — команды еще не определены"""
+        path = self.lookup(rac_path)
+        if path is None:
+            return None
+        try:
+            return CommandCatalog(load_compiled(path, cache_dir=self.directory))
+        except (OSError, ValueError) as e:
+            print(f"Ошибка загрузки команд rac из {path}: {e}")
+            return None
+
+    def discover(self, rac_path: str, known: Mapping[str, List[RacCommand]]) -> CommandCatalog:
+        """Определение команд утилиты по справке и сохранение каталога
+
+        Справка запрашивается, только если для этой версии rac каталога еще нет
+        или он сохранен прежней версией разбора справки.
+        Режимы, справку которых получить не удалось, берутся из known.
+        """
+        with self._lock:
+            stat = os.stat(rac_path)
+            version = rac_version(rac_path)
+            path = self.catalog_path(version)
+            if self._parser_version(path) != PARSER_VERSION:
+                modes = [mode for mode in known if mode != "help"]
+                with ThreadPoolExecutor(HELP_WORKERS, thread_name_prefix="rac-help") as pool:
+                    discovered = dict(zip(modes, pool.map(lambda mode: self.discover_mode(rac_path, mode), modes)))
+                commands = {mode: merge_commands(discovered[mode], mode_commands) if discovered.get(mode)
+                            else mode_commands
+                            for mode, mode_commands in known.items()}
+                data = catalog_data(commands, {"rac_path": os.path.abspath(rac_path), "version": version,
+                                                "parser": PARSER_VERSION})
+                errors = validate_catalog(data)
+                if errors:
+                    raise CatalogError(f"Справка rac {version} разобрана с ошибками:\n" + "\n".join(errors))
+                write_atomic(path, json.dumps(data, ensure_ascii=False, indent=1))
+
+            index = self._read_index()
+            index[os.path.abspath(rac_path)] = {"version": version, "mtime_ns": stat.st_mtime_ns,
+                                                "size": stat.st_size, "parser": PARSER_VERSION}
+            write_atomic(self._index_path(), json.dumps(index, ensure_ascii=False, indent=2))
+            return CommandCatalog(load_compiled(path, cache_dir=self.directory))
+
+    @staticmethod
+    def _parser_version(path: str) -> Optional[int]:
+        """Версия разбора, которой сохранен каталог; None — каталога нет или он поврежден"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                source = json.load(f).get("source", {})
+        except (OSError, ValueError, AttributeError):
+            return None
+        return source.get("parser") if isinstance(source, dict) else None
+
+    def discover_mode(self, rac_path: str, mode: str) -> List[RacCommand]:
+        try:
+            result = subprocess.run([rac_path, "help", mode], capture_output=True, timeout=HELP_TIMEOUT)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Ошибка получения справки rac для режима {mode}: {e}")
+            return []
+        if result.returncode != 0:
+            return []
+        return parse_help(mode, decode_output(result.stdout))
@@ -1,17 +1,84 @@
+import io
 import subprocess
 import os
-from typing import Tuple, List
+import threading
+import time
+from typing import Any, Callable, Iterator, Tuple, List, Optional, Union
 from .logger import RACLogger
 from .variable_manager import VariableManager
+from .rac_parser import RacRecord, RecordParser, format_record
+from .result_cache import ResultCache, normalize_args, is_read_only, is_mutating
+from .ras_client import RASClient
+from .ras_protocol import RASProtocolError
+from .command_history import CommandHistory
+from .metrics import ExecutionStats, MetricsRegistry
+from .profiling import PROFILER, span, traced
+
+
+# Пачки записей для потокового вывода: не реже раза в 100 мс и не больше 200 записей
+RECORDS_BATCH_SIZE = 200
+RECORDS_BATCH_INTERVAL = 0.1
+
+
+class CommandCancelled(Exception):
+    """Команда RAC отменена пользователем"""
+
+
+class CancelToken:
+    """Токен отмены команды RAC: позволяет завершить запущенный дочерний процесс"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self.cancelled = False
+
+    def attach(self, process: subprocess.Popen):
+        """Привязка запущенного процесса rac к токену"""
+        with self._lock:
+            self._process = process
+            if self.cancelled:
+                self._kill()
+
+    def detach(self):
+        """Отвязка процесса после его завершения"""
+        with self._lock:
+            self._process = None
+
+    def cancel(self):
+        """Отмена команды с завершением процесса rac"""
+        with self._lock:
+            self.cancelled = True
+            self._kill()
+
+    def _kill(self):
+        if self._process is not None and self._process.poll() is None:
+            try:
+                self._process.kill()
+            except OSError:
+                pass  # Процесс уже завершился
 
 
 class RACCommandExecutor:
-    def __init__(self, logger: RACLogger, variable_manager: VariableManager):
+    def __init__(self, logger: RACLogger, variable_manager: VariableManager,
+                 result_cache: ResultCache = None, ras_client: RASClient = None,
+                 rac_path: str = None, history: CommandHistory = None,
+                 metrics: MetricsRegistry = None):
         self.logger = logger
         self.variable_manager = variable_manager
+        # Явно заданный путь к rac имеет приоритет над переменной rac_path
+        self.rac_path = rac_path
+        self.result_cache = result_cache if result_cache is not None else ResultCache()
+        self.ras_client = ras_client
+        # История выполненных команд (необязательна, запись идет в фоновом потоке)
+        self.history = history
+        # Время выполнения, объем вывода и исходы команд по (хост, режим, команда)
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
 
     def get_rac_path(self) -> str:
         """Получение пути к RAC из переменных"""
+        if self.rac_path:
+            return self.rac_path
+
         rac_path = self.variable_manager.get_variable("rac_path")
         if not rac_path:
             rac_path = "rac.exe"
@@ -19,71 +86,304 @@ class RACCommandExecutor:
 
         return rac_path
 
-    def execute_command(self, args: List[str]) -> Tuple[bool, str]:
-        """Выполнение RAC команды с подстановкой переменных"""
+    def execute_command(self, args: List[str], cancel_token: CancelToken = None,
+                        on_records: Callable[[List[RacRecord]], None] = None,
+                        use_cache: bool = True,
+                        background: bool = False) -> Tuple[bool, Union[List[RacRecord], str]]:
+        """Выполнение RAC команды с подстановкой переменных
+
+        При успехе возвращает список записей, разобранных из вывода rac,
+        при ошибке — текст ошибки. Если передан on_records, записи также
+        передаются в него пачками по мере поступления вывода.
+        Результаты читающих команд (list/info) берутся из кеша, пока не истек
+        срок их жизни; изменяющие команды сбрасывают кеш своего кластера.
+        Каждый вызов записывается в историю команд, если она подключена,
+        и учитывается в метриках выполнения.
+
+        background=True — фоновый запрос приложения (например, загрузка списков
+        для автодополнения): команда выполняется процессом rac без записи вывода
+        и ошибок в журнал, мимо кеша результатов, метрик и истории.
+        """
+        if background:
+            return self._execute_uncached(args, cancel_token, on_records, None, quiet=True)
+
+        started_at = time.time()
+        started = time.monotonic()
+        cache_key = normalize_args(self.substitute_args(args))
+        stats = ExecutionStats()
+        with span("execute_command", "executor", command=" ".join(args[:3])):
+            success, output, source = self._execute(args, cache_key, cancel_token, on_records, use_cache, stats)
+        duration = time.monotonic() - started
+
+        if not success and stats.outcome == "success":
+            stats.outcome = "error"
+        if cache_key is not None:
+            metrics_key = (cache_key.endpoint, cache_key.mode, " ".join(cache_key.command))
+        else:
+            metrics_key = ("", args[0] if args else "", " ".join(args[1:2]))
+        self.metrics.observe(metrics_key, source, duration, stats, len(output) if success else 0)
+
+        if self.history is not None:
+            self.history.record(args, cache_key, started_at, duration, success, output, source)
+        return success, output
+
+    def _execute(self, args: List[str], cache_key, cancel_token: Optional[CancelToken],
+                 on_records: Optional[Callable[[List[RacRecord]], None]],
+                 use_cache: bool, stats: ExecutionStats) -> Tuple[bool, Union[List[RacRecord], str], str]:
+        """Выполнение из кеша, через клиент RAS или процессом rac; третий элемент — источник результата"""
+        cacheable = cache_key is not None and is_read_only(cache_key)
+        # Поколение до запуска: результат, устаревший из-за параллельного изменения, не кешируется
+        generation = self.result_cache.generation(cache_key) if cacheable else None
+
+        if use_cache and cacheable:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                self.logger.log_info(f"Результат из кеша ({len(cached)} записей): {' '.join(args)}", "RAC_EXECUTOR")
+                if on_records and cached:
+                    on_records(cached)
+                return True, cached, "cache"
+
         try:
-            # Получаем актуальный путь к RAC
-            rac_path = self.get_rac_path()
+            # Поддерживаемые команды выполняются напрямую по протоколу RAS, без запуска rac
+            records = self._execute_native(cache_key, cancel_token)
+            if records is not None:
+                if on_records and records:
+                    on_records(records)
+                if cacheable:
+                    self.result_cache.put(cache_key, records, generation)
+                return True, records, "ras"
 
-            # Проверяем существование файла RAC
-            if not os.path.exists(rac_path):
-                return False, f"Файл RAC не найден: {rac_path}. Проверьте путь в настройках."
+            success, output = self._execute_uncached(args, cancel_token, on_records,
+                                                     cache_key if cacheable else None, stats,
+                                                     cache_generation=generation)
+            return success, output, "rac"
+        finally:
+            # Изменяющая команда могла частично выполниться и при ошибке
+            if cache_key is not None and is_mutating(cache_key):
+                self.result_cache.invalidate(cache_key)
 
-            # Подставляем переменные в аргументы
-            substituted_args = []
-            for arg in args:
-                substituted_arg = self.variable_manager.substitute_variables(arg)
-                substituted_args.append(substituted_arg)
+    def get_ras_client(self) -> Optional[RASClient]:
+        """Клиент RAS, если включен переменной ras_native (yes/true/1)"""
+        if self.ras_client is None:
+            enabled = (self.variable_manager.get_variable("ras_native") or "").strip().lower()
+            if enabled in ("yes", "true", "1"):
+                self.ras_client = RASClient()
+        return self.ras_client
 
-            # Формируем полную команду
-            full_command = [rac_path] + substituted_args
-            command_str = " ".join(full_command)
+    def _execute_native(self, cache_key, cancel_token: Optional[CancelToken]) -> Optional[List[RacRecord]]:
+        """Выполнение через клиент RAS; None — команда не поддерживается или клиент недоступен"""
+        if cache_key is None or (cancel_token and cancel_token.cancelled):
+            return None
 
-            self.logger.log_command(command_str, "RAC_EXECUTOR")
+        client = self.get_ras_client()
+        if client is None or not client.supports(cache_key):
+            return None
 
-            # Выполняем команду, получая байты вывода
-            result = subprocess.run(
-                full_command,
-                capture_output=True,
-                text=False,  # Получаем байты
-                check=True,
-                timeout=30
-            )
+        self.logger.log_command(f"RAS {cache_key.endpoint} {cache_key.mode} {' '.join(cache_key.command)}",
+                                "RAC_EXECUTOR")
+        try:
+            records = client.execute(cache_key)
+        except (RASProtocolError, OSError) as e:
+            self.logger.log_warning(f"Клиент RAS недоступен ({e}), команда будет выполнена через rac",
+                                    "RAC_EXECUTOR")
+            return None
 
-            # Декодируем вывод с заменой ошибок
-            stdout = result.stdout.decode('cp866', errors='replace')
-            stderr = result.stderr.decode('cp866', errors='replace')
+        for record in records:
+            for line in format_record(record):
+                self.logger.log_info(line, "RAC_EXECUTOR")
+            self.logger.log_info("", "RAC_EXECUTOR")
+        return records
 
-            if stdout:
-                for line in stdout.splitlines():
-                    self.logger.log_info(line, "RAC_EXECUTOR")
-            if stderr:
-                for line in stderr.splitlines():
-                    self.logger.log_error(line, "RAC_EXECUTOR")
+    def _execute_uncached(self, args: List[str], cancel_token: Optional[CancelToken],
+                          on_records: Optional[Callable[[List[RacRecord]], None]],
+                          cache_key, stats: ExecutionStats = None,
+                          quiet: bool = False, cache_generation: Tuple[int, ...] = None) -> Tuple[bool, Union[List[RacRecord], str]]:
+        """Выполнение команды процессом rac с преобразованием ошибок в текст (quiet — без журнала)"""
+        stats = stats if stats is not None else ExecutionStats()
+        log_warning = (lambda message, function: None) if quiet else self.logger.log_warning
+        log_error = (lambda message, function: None) if quiet else self.logger.log_error
+        try:
+            records = []
+            batch_start = 0
+            last_flush = time.monotonic()
+            for record in self.stream_command(args, cancel_token, stats=stats, log_output=not quiet):
+                records.append(record)
+                if on_records and (len(records) - batch_start >= RECORDS_BATCH_SIZE
+                                   or time.monotonic() - last_flush >= RECORDS_BATCH_INTERVAL):
+                    on_records(records[batch_start:])
+                    batch_start = len(records)
+                    last_flush = time.monotonic()
 
-                # Возвращаем только статус успеха, без вывода в UI
-            return True, ""
+            if on_records and batch_start < len(records):
+                on_records(records[batch_start:])
 
+            if cache_key is not None:
+                self.result_cache.put(cache_key, records, cache_generation)
+
+            return True, records
+
+        except CommandCancelled:
+            error_msg = "Команда отменена"
+            stats.outcome = "cancelled"
+            log_warning(error_msg, "RAC_EXECUTOR")
+            return False, error_msg
         except subprocess.CalledProcessError as e:
             error_msg = f"Ошибка выполнения команды: {e.stderr.decode('cp866', errors='replace') if e.stderr else 'нет данных'}"
-            self.logger.log_error(error_msg, "RAC_EXECUTOR")
+            log_error(error_msg, "RAC_EXECUTOR")
             return False, error_msg
         except subprocess.TimeoutExpired:
             error_msg = "Таймаут выполнения команды"
-            self.logger.log_error(error_msg, "RAC_EXECUTOR")
+            stats.outcome = "timeout"
+            log_error(error_msg, "RAC_EXECUTOR")
             return False, error_msg
         except FileNotFoundError:
             error_msg = f"Файл RAC не найден: {self.get_rac_path()}. Проверьте путь в настройках."
-            self.logger.log_error(error_msg, "RAC_EXECUTOR")
+            stats.outcome = "not_found"
+            log_error(error_msg, "RAC_EXECUTOR")
             return False, error_msg
         except Exception as e:
             error_msg = f"Неожиданная ошибка: {str(e)}"
-            self.logger.log_error(error_msg, "RAC_EXECUTOR")
+            log_error(error_msg, "RAC_EXECUTOR")
             return False, error_msg
 
+    def stream_command(self, args: List[str], cancel_token: CancelToken = None,
+                       timeout: float = 30, stats: ExecutionStats = None,
+                       log_output: bool = True) -> Iterator[RacRecord]:
+        """Потоковое выполнение RAC команды
+
+        Вывод rac читается из канала и декодируется из cp866 по мере поступления:
+        строки сразу пишутся в лог, а записи отдаются вызывающему коду, пока rac
+        еще выводит данные. timeout — допустимое время простоя без нового вывода.
+        Ошибки выполнения передаются исключениями subprocess, отмена — CommandCancelled.
+        В stats записываются время запуска процесса и объем прочитанного вывода.
+        С log_output=False команда и ее вывод в журнал не пишутся.
+        """
+        if cancel_token and cancel_token.cancelled:
+            raise CommandCancelled()
+
+        # Получаем актуальный путь к RAC
+        rac_path = self.get_rac_path()
+
+        # Проверяем существование файла RAC
+        if not os.path.exists(rac_path):
+            raise FileNotFoundError(rac_path)
+
+        # Формируем полную команду с подстановкой переменных
+        full_command = [rac_path] + self.substitute_args(args)
+        command_str = " ".join(full_command)
+
+        if log_output:
+            self.logger.log_command(command_str, "RAC_EXECUTOR")
+
+        # Popen вместо run: вывод читается по мере поступления,
+        # а процесс можно завершить через токен отмены
+        spawn_started = time.perf_counter()
+        with span("rac.spawn", "executor"):
+            process = subprocess.Popen(
+                full_command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        if stats is not None:
+            stats.spawn_time = time.perf_counter() - spawn_started
+        if cancel_token:
+            cancel_token.attach(process)
+
+        # stderr читаем в отдельном потоке, чтобы rac не заблокировался на заполненном канале
+        stderr_chunks = []
+        stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()),
+                                         daemon=True)
+        stderr_thread.start()
+
+        # Сторож простоя: завершает rac, если вывод не поступает дольше timeout
+        last_activity = [time.monotonic()]
+        timed_out = threading.Event()
+        finished = threading.Event()
+
+        def watchdog():
+            while not finished.wait(0.5):
+                if time.monotonic() - last_activity[0] > timeout:
+                    timed_out.set()
+                    process.kill()
+                    return
+
+        threading.Thread(target=watchdog, daemon=True).start()
+
+        # Чтение и декодирование cp866 вместе с ожиданием вывода rac; время потребителя записей входит в интервал
+        stream_started = time.perf_counter_ns()
+        bytes_read = 0
+        try:
+            parser = RecordParser()
+            # TextIOWrapper декодирует cp866 инкрементально, читая канал порциями
+            stdout = io.TextIOWrapper(process.stdout, encoding='cp866', errors='replace')
+            for line in stdout:
+                last_activity[0] = time.monotonic()
+                # cp866 однобайтовая: длина строки до обрезки перевода равна числу байт
+                bytes_read += len(line)
+                if stats is not None:
+                    stats.bytes_read = bytes_read
+                line = line.rstrip('\r\n')
+                if line and log_output:
+                    self.logger.log_info(line, "RAC_EXECUTOR")
+                record = parser.feed(line)
+                if record is not None:
+                    yield record
+
+            process.wait()
+            stderr_thread.join()
+            stderr_bytes = b"".join(chunk for chunk in stderr_chunks if chunk)
+
+            if cancel_token and cancel_token.cancelled:
+                raise CommandCancelled()
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(full_command, timeout)
+            if process.returncode != 0:
+                raise subprocess.CalledProcessError(process.returncode, full_command, None, stderr_bytes)
+
+            record = parser.finish()
+            if record is not None:
+                yield record
+
+            if log_output:
+                stderr = stderr_bytes.decode('cp866', errors='replace')
+                for line in stderr.splitlines():
+                    self.logger.log_error(line, "RAC_EXECUTOR")
+
+        finally:
+            PROFILER.complete("rac.stream", "executor", stream_started, {"bytes": bytes_read})
+            finished.set()
+            if cancel_token:
+                cancel_token.detach()
+            # Потребитель мог прекратить чтение раньше — не оставляем процесс висеть
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+
+    def substitute_args(self, args: List[str]) -> List[str]:
+        """Подстановка переменных в аргументы команды"""
+        return [self.variable_manager.substitute_variables(arg) for arg in args]
+
+    @traced("build_command_args", "executor")
     def build_command_args(self, mode: str, command: str, parameters: dict,
-                           host: str = None, port: int = None) -> List[str]:
-        """Построение аргументов команды с правильным размещением host:port"""
+                           host: str = None, port: int = None, substitute: bool = True) -> List[str]:
+        """Построение аргументов команды с правильным размещением host:port
+
+        С substitute=False ссылки $(имя) остаются в аргументах (для предпросмотра
+        исходной команды); подстановка все равно выполняется при запуске.
+        """
+        args = self.build_command_prefix(mode, command, host, port)
+
+        # Добавляем параметры
+        for key, value in parameters.items():
+            fragment = self.build_param_fragment(key, value, substitute)
+            if fragment is not None:
+                args.append(fragment)
+
+        return args
+
+    def build_command_prefix(self, mode: str, command: str, host: str = None, port: int = None) -> List[str]:
+        """Аргументы до параметров: host:port, режим и команда"""
         args = []
 
         # Добавляем host:port как аргумент после rac, если указаны нестандартные значения
@@ -104,24 +404,34 @@ class RACCommandExecutor:
         else:
             args.append(command)
 
-        # Добавляем параметры
-        for key, value in parameters.items():
-            if value is not None and value != "":
-                if isinstance(value, bool) and value:
-                    args.append(f"--{key}")
-                elif not isinstance(value, bool):
-                    # Подставляем переменные в значение
-                    substituted_value = self.variable_manager.substitute_variables(str(value))
+        return args
 
-                    # Если значение содержит пробелы и не в кавычках, обрамляем в кавычки
-                    final_value = substituted_value
-                    if ' ' in substituted_value and not (
-                            substituted_value.startswith('"') and substituted_value.endswith('"')):
-                        final_value = f'"{substituted_value}"'
+    def build_param_fragment(self, key: str, value: Any, substitute: bool = True) -> Optional[str]:
+        """Аргумент одного параметра (--имя или --имя=значение); None — параметр не указан"""
+        if value is None or value == "" or value is False:
+            return None
+        if isinstance(value, bool):
+            return f"--{key}"
 
-                    args.append(f"--{key}={final_value}")
+        # Подставляем переменные в значение
+        substituted_value = str(value)
+        if substitute:
+            substituted_value = self.variable_manager.substitute_variables(substituted_value)
 
-        return args
+        # Если значение содержит пробелы и не в кавычках, обрамляем в кавычки
+        final_value = substituted_value
+        if ' ' in substituted_value and not (
+                substituted_value.startswith('"') and substituted_value.endswith('"')):
+            final_value = f'"{substituted_value}"'
+
+        return f"--{key}={final_value}"
+
+    def close(self):
+        """Закрытие постоянных соединений с RAS и истории команд"""
+        if self.ras_client is not None:
+            self.ras_client.close()
+        if self.history is not None:
+            self.history.close()
 
     def test_rac_connection(self) -> Tuple[bool, str]:
         """Тестирование подключения к RAC"""
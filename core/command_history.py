@@ -0,0 +1,286 @@
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Union
+
+from .rac_parser import RacRecord, convert_value, format_value
+from .result_cache import CommandKey
+
+SCHEMA_VERSION = 1
+# Сколько записей результата сохраняется на команду (UUID индексируются у всех)
+MAX_STORED_RECORDS = 1000
+DEFAULT_RETENTION_DAYS = 90
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    host TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    command TEXT NOT NULL,
+    args TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    error TEXT NOT NULL DEFAULT '',
+    record_count INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL DEFAULT 'rac',
+    records BLOB
+);
+CREATE TABLE IF NOT EXISTS entities (
+    uuid TEXT NOT NULL,
+    command_id INTEGER NOT NULL REFERENCES commands(id) ON DELETE CASCADE,
+    role TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commands_started_at ON commands(started_at);
+CREATE INDEX IF NOT EXISTS commands_host ON commands(host, started_at);
+CREATE INDEX IF NOT EXISTS commands_mode ON commands(mode, command, started_at);
+CREATE INDEX IF NOT EXISTS entities_uuid ON entities(uuid, command_id);
+CREATE INDEX IF NOT EXISTS entities_command ON entities(command_id);
+"""
+
+# Параметры с паролями: значения не сохраняются в истории
+_SECRET_RE = re.compile(r'^(--[\w-]*(?:pwd|password)[\w-]*=)(.+)$', re.IGNORECASE)
+_VARIABLE_RE = re.compile(r'^\$\([^)]+\)$')
+REDACTED = "***"
+
+
+def redact_args(args: List[str]) -> List[str]:
+    """Скрытие паролей в аргументах; ссылки на переменные $(имя) оставляются"""
+    redacted = []
+    for arg in args:
+        match = _SECRET_RE.match(arg)
+        if match and not _VARIABLE_RE.match(match.group(2)):
+            arg = match.group(1) + REDACTED
+        redacted.append(arg)
+    return redacted
+
+
+@dataclass
+class HistoryEntry:
+    """Запись истории о выполненной команде"""
+    id: int
+    started_at: datetime
+    duration: float
+    host: str
+    mode: str
+    command: str
+    args: List[str]
+    success: bool
+    error: str = ""
+    record_count: int = 0
+    source: str = "rac"
+
+    @property
+    def command_line(self) -> str:
+        return " ".join(self.args)
+
+
+def _encode_records(records: List[RacRecord]) -> bytes:
+    data = [{key: format_value(value) for key, value in record.items()} for record in records]
+    return zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+
+def _decode_records(blob: Optional[bytes]) -> List[RacRecord]:
+    if not blob:
+        return []
+    data = json.loads(zlib.decompress(blob).decode('utf-8'))
+    return [{key: convert_value(value) for key, value in record.items()} for record in data]
+
+
+class CommandHistory:
+    """История выполненных команд в SQLite (режим WAL)
+
+    Запись выполняется отдельным потоком, поэтому record() не задерживает
+    выполнение команды. Для поиска по объектам индексируются UUID из
+    параметров команды и идентификаторы записей результата (например, поле
+    session у записей session list), что позволяет быстро ответить на вопрос
+    «когда завершали сеанс X».
+    """
+
+    def __init__(self, path: str = "config/history.db", retention_days: int = DEFAULT_RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+        if retention_days:
+            self._queue.put(("prune", time.time() - retention_days * 86400))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def record(self, args: List[str], key: Optional[CommandKey], started_at: float, duration: float,
+               success: bool, output: Union[List[RacRecord], str], source: str = "rac"):
+        """Постановка выполненной команды в очередь записи"""
+        self._queue.put(("record", (list(args), key, started_at, duration, success, output, source)))
+
+    def _write_loop(self):
+        conn = self._connect()
+        deferred = None
+        try:
+            while True:
+                action, payload = deferred or self._queue.get()
+                deferred = None
+                if action == "stop":
+                    return
+                try:
+                    if action == "mark":
+                        payload()
+                        continue
+                    with conn:
+                        if action == "prune":
+                            conn.execute("DELETE FROM commands WHERE started_at < ?", (payload,))
+                            continue
+                        self._insert(conn, *payload)
+                        # Накопившиеся команды записываются той же транзакцией
+                        while True:
+                            try:
+                                item = self._queue.get_nowait()
+                            except queue.Empty:
+                                break
+                            if item[0] != "record":
+                                deferred = item
+                                break
+                            self._insert(conn, *item[1])
+                except Exception as e:
+                    # Ошибка одной записи не должна останавливать запись остальных команд
+                    print(f"Ошибка записи истории команд: {e}")
+        finally:
+            conn.close()
+
+    def _insert(self, conn: sqlite3.Connection, args: List[str], key: Optional[CommandKey], started_at: float,
+                duration: float, success: bool, output, source: str):
+        records: List[RacRecord] = output if success and isinstance(output, list) else []
+        if key is not None:
+            host, mode, command = key.endpoint, key.mode, " ".join(key.command)
+        else:
+            host, mode, command = "", (args[0] if args else ""), " ".join(args[1:2])
+
+        cursor = conn.execute(
+            "INSERT INTO commands (started_at, duration, host, mode, command, args, success, error,"
+            " record_count, source, records) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (started_at, duration, host, mode, command, json.dumps(redact_args(args), ensure_ascii=False),
+             int(success), "" if success else str(output), len(records), source,
+             _encode_records(records[:MAX_STORED_RECORDS]) if records else None))
+        command_id = cursor.lastrowid
+
+        entities = []
+        if key is not None:
+            for name, value in key.params:
+                if isinstance(value, str) and _is_uuid(value):
+                    entities.append((value.lower(), command_id, f"param:{name}"))
+        # Идентификатор записи результата — поле с именем режима (session, infobase, ...)
+        for record in records:
+            value = record.get(mode)
+            if isinstance(value, uuid.UUID):
+                entities.append((str(value), command_id, f"result:{mode}"))
+        if entities:
+            conn.executemany("INSERT INTO entities (uuid, command_id, role) VALUES (?, ?, ?)", entities)
+
+    def flush(self, timeout: float = 10) -> bool:
+        """Ожидание записи всех поставленных в очередь команд"""
+        done = threading.Event()
+        self._queue.put(("mark", done.set))
+        return done.wait(timeout)
+
+    def notify_written(self, callback: Callable[[], None]):
+        """Вызов callback после записи всех поставленных в очередь команд без ожидания
+
+        callback вызывается в потоке записи; если поток записи остановлен —
+        сразу в вызывающем потоке.
+        """
+        if self._writer.is_alive():
+            self._queue.put(("mark", callback))
+        else:
+            callback()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(("stop", None))
+            self._writer.join(timeout=10)
+
+    def search(self, text: str = "", host: str = "", mode: str = "", entity: str = "",
+               since: Optional[datetime] = None, until: Optional[datetime] = None,
+               failed_only: bool = False, limit: int = 500) -> List[HistoryEntry]:
+        """Поиск команд по подстроке аргументов, хосту, режиму, UUID объекта и времени"""
+        conditions, params = [], []
+        if entity:
+            conditions.append("c.id IN (SELECT command_id FROM entities WHERE uuid = ?)")
+            params.append(entity.strip().lower())
+        if host:
+            conditions.append("c.host = ?")
+            params.append(host)
+        if mode:
+            conditions.append("c.mode = ?")
+            params.append(mode)
+        if since is not None:
+            conditions.append("c.started_at >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            conditions.append("c.started_at < ?")
+            params.append(until.timestamp())
+        if failed_only:
+            conditions.append("c.success = 0")
+        if text:
+            conditions.append("(c.args LIKE ? OR c.error LIKE ?)")
+            params.extend([f"%{text}%"] * 2)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = (f"SELECT c.id, c.started_at, c.duration, c.host, c.mode, c.command, c.args, c.success,"
+                 f" c.error, c.record_count, c.source FROM commands c {where}"
+                 f" ORDER BY c.started_at DESC LIMIT ?")
+        params.append(limit)
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        return [HistoryEntry(id=row[0], started_at=datetime.fromtimestamp(row[1]), duration=row[2],
+                             host=row[3], mode=row[4], command=row[5], args=json.loads(row[6]),
+                             success=bool(row[7]), error=row[8], record_count=row[9], source=row[10])
+                for row in rows]
+
+    def get_records(self, command_id: int) -> List[RacRecord]:
+        """Сохраненные записи результата команды"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT records FROM commands WHERE id = ?", (command_id,)).fetchone()
+        finally:
+            conn.close()
+        return _decode_records(row[0]) if row else []
+
+    def hosts(self) -> List[str]:
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT DISTINCT host FROM commands ORDER BY host")]
+        finally:
+            conn.close()
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
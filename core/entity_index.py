@@ -0,0 +1,280 @@
+"""Индекс объектов кластера для автодополнения UUID-параметров
+
+Пока открыт диалог команд, фоновый поток загружает списки кластеров,
+информационных баз, рабочих процессов и сеансов хоста диалога и хранит их
+в EntityIndex. Поиск идет по подстроке имени, описания, пользователя или
+самого UUID. Каждый список обновляется отдельно по истечении своего срока
+жизни, а в индексе меняются только добавленные, измененные и удаленные
+объекты.
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .command_executor import CancelToken, RACCommandExecutor
+from .logger import RACLogger
+from .rac_parser import RacRecord, format_value
+from .text_index import TextIndex
+
+# Учетные данные администратора кластера для фоновых запросов, если кластеру они нужны
+CLUSTER_USER_VARIABLE = "cluster_user"
+CLUSTER_PWD_VARIABLE = "cluster_pwd"
+# Число вариантов в списке автодополнения
+MAX_COMPLETIONS = 50
+# Пауза потока загрузки, когда обновлять нечего, секунды
+IDLE_INTERVAL = 5
+
+
+class EntitySource(NamedTuple):
+    """Команда получения списка объектов и поля, по которым они ищутся"""
+    mode: str
+    command: str
+    label_fields: Tuple[str, ...]
+    ttl: float  # срок жизни списка, секунды
+
+
+# Вид объекта совпадает с именем UUID-параметра команд и с полем UUID в выводе rac
+ENTITY_SOURCES: Dict[str, EntitySource] = {
+    "cluster": EntitySource("cluster", "list", ("name", "host", "port"), 300),
+    "infobase": EntitySource("infobase", "summary list", ("name", "descr"), 300),
+    "process": EntitySource("process", "list", ("host", "port", "pid"), 60),
+    "session": EntitySource("session", "list", ("user-name", "host", "app-id", "session-id"), 30),
+}
+
+
+class Entity(NamedTuple):
+    kind: str
+    uuid: str
+    label: str
+    cluster: str = ""  # UUID кластера; пусто у самих кластеров
+
+
+def entity_from_record(kind: str, record: RacRecord, cluster: str = "") -> Optional[Entity]:
+    """Объект из записи вывода rac; None — в записи нет UUID"""
+    uuid = record.get(kind)
+    if not uuid:
+        return None
+    values = [format_value(record[name]) for name in ENTITY_SOURCES[kind].label_fields
+              if record.get(name) not in (None, "")]
+    return Entity(kind, str(uuid), " — ".join(values), cluster)
+
+
+class EntityIndex:
+    """Объекты кластеров по хостам RAS с поиском по подстроке; потокобезопасен"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (хост:порт, вид) -> UUID -> объект и поисковый индекс того же набора
+        self._entities: Dict[Tuple[str, str], Dict[str, Entity]] = {}
+        self._texts: Dict[Tuple[str, str], TextIndex] = {}
+        # UUID по порядку описаний; строится заново при первом поиске после изменений
+        self._order: Dict[Tuple[str, str], List[str]] = {}
+        # (хост:порт, вид, кластер) -> время загрузки списка
+        self._loaded: Dict[Tuple[str, str, str], float] = {}
+
+    def update(self, endpoint: str, kind: str, cluster: str, entities: Iterable[Entity],
+               loaded_at: float = None) -> int:
+        """Замена списка объектов вида kind одного кластера; возвращает число изменений"""
+        new = {entity.uuid: entity for entity in entities}
+        changed = 0
+        with self._lock:
+            current = self._entities.setdefault((endpoint, kind), {})
+            texts = self._texts.setdefault((endpoint, kind), TextIndex())
+            for uuid in [uuid for uuid, entity in current.items() if entity.cluster == cluster and uuid not in new]:
+                del current[uuid]
+                texts.remove(uuid)
+                changed += 1
+            for uuid, entity in new.items():
+                if current.get(uuid) != entity:
+                    current[uuid] = entity
+                    texts.update(uuid, f"{entity.label}\n{uuid}")
+                    changed += 1
+            if changed:
+                self._order.pop((endpoint, kind), None)
+            self._loaded[(endpoint, kind, cluster)] = time.monotonic() if loaded_at is None else loaded_at
+        return changed
+
+    def remove_cluster(self, endpoint: str, cluster: str):
+        """Удаление объектов кластера, которого больше нет на хосте"""
+        with self._lock:
+            for (entity_endpoint, kind), entities in self._entities.items():
+                if entity_endpoint != endpoint:
+                    continue
+                for uuid in [uuid for uuid, entity in entities.items() if entity.cluster == cluster]:
+                    del entities[uuid]
+                    self._texts[(endpoint, kind)].remove(uuid)
+                    self._order.pop((endpoint, kind), None)
+            for key in [key for key in self._loaded if key[0] == endpoint and key[2] == cluster]:
+                del self._loaded[key]
+
+    def mark_loaded(self, endpoint: str, kind: str, cluster: str):
+        """Отметка попытки загрузки без изменения списка (повтор после ошибки — по сроку жизни)"""
+        with self._lock:
+            self._loaded[(endpoint, kind, cluster)] = time.monotonic()
+
+    def expires_in(self, endpoint: str, kind: str, cluster: str = "") -> float:
+        """Секунды до устаревания списка; 0 — список устарел или не загружался"""
+        with self._lock:
+            loaded = self._loaded.get((endpoint, kind, cluster))
+        if loaded is None:
+            return 0
+        return max(0.0, loaded + ENTITY_SOURCES[kind].ttl - time.monotonic())
+
+    def clusters(self, endpoint: str) -> List[str]:
+        with self._lock:
+            return list(self._entities.get((endpoint, "cluster"), {}))
+
+    def get(self, endpoint: str, kind: str, uuid: str) -> Optional[Entity]:
+        with self._lock:
+            return self._entities.get((endpoint, kind), {}).get(uuid)
+
+    def search(self, endpoint: str, kind: str, query: str, cluster: str = None,
+               limit: int = MAX_COMPLETIONS) -> List[Entity]:
+        """Объекты, имя, описание или UUID которых содержит query (cluster — только объекты кластера)"""
+        with self._lock:
+            entities = self._entities.get((endpoint, kind))
+            if not entities:
+                return []
+            uuids = self._texts[(endpoint, kind)].search(query.strip())
+            order = self._order.get((endpoint, kind))
+            if order is None:
+                order = self._order[(endpoint, kind)] = sorted(
+                    entities, key=lambda uuid: (entities[uuid].label.casefold(), uuid))
+            # Первые limit найденных по порядку описаний без сортировки всех совпадений
+            found = []
+            for uuid in order:
+                if uuid in uuids and (cluster is None or entities[uuid].cluster in (cluster, "")):
+                    found.append(entities[uuid])
+                    if len(found) >= limit:
+                        break
+        return found
+
+
+class EntityPrefetcher:
+    """Фоновая загрузка объектов кластеров для хостов открытых диалогов
+
+    watch() и unwatch() вызываются при показе и скрытии диалога. Один
+    поток по очереди обновляет устаревшие списки наблюдаемых хостов, поэтому
+    одновременно выполняется не больше одной фоновой команды rac.
+    """
+
+    def __init__(self, executor: RACCommandExecutor, index: EntityIndex = None, logger: RACLogger = None,
+                 on_updated: Callable[[str, str], None] = None):
+        self.executor = executor
+        self.index = index if index is not None else EntityIndex()
+        self.logger = logger
+        # Вызывается в потоке загрузки: хост:порт, вид объектов
+        self.on_updated = on_updated
+        self._lock = threading.Lock()
+        self._watched: Dict[str, int] = {}
+        self._wake = threading.Event()
+        self._stopped = False
+        self._cancel_token: Optional[CancelToken] = None
+        self._failed: Set[Tuple[str, str, str]] = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, host: str, port: str):
+        """Загрузка и обновление объектов хоста, пока его не сняли с наблюдения"""
+        endpoint = f"{host}:{port}"
+        with self._lock:
+            if self._stopped:
+                return
+            self._watched[endpoint] = self._watched.get(endpoint, 0) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="entity-prefetch", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def unwatch(self, host: str, port: str):
+        endpoint = f"{host}:{port}"
+        with self._lock:
+            count = self._watched.get(endpoint, 0) - 1
+            if count > 0:
+                self._watched[endpoint] = count
+            else:
+                self._watched.pop(endpoint, None)
+
+    def stop(self):
+        """Остановка потока с завершением выполняемой команды rac"""
+        with self._lock:
+            self._stopped = True
+            self._watched.clear()
+            token = self._cancel_token
+        if token is not None:
+            token.cancel()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stopped:
+                    return
+                endpoints = list(self._watched)
+            self._wake.clear()
+            delay = IDLE_INTERVAL
+            for endpoint in endpoints:
+                delay = min(delay, self.refresh(endpoint))
+            self._wake.wait(delay)
+
+    def refresh(self, endpoint: str) -> float:
+        """Обновление устаревших списков хоста; возвращает секунды до следующего устаревания"""
+        host, port = endpoint.rsplit(":", 1)
+        delay = float(IDLE_INTERVAL)
+        for kind, cluster in self._sources(endpoint):
+            with self._lock:
+                if self._stopped or endpoint not in self._watched:
+                    return delay
+            expires_in = self.index.expires_in(endpoint, kind, cluster)
+            if expires_in == 0:
+                self.load(endpoint, host, port, kind, cluster)
+                expires_in = ENTITY_SOURCES[kind].ttl
+            delay = min(delay, expires_in)
+        return delay
+
+    def _sources(self, endpoint: str):
+        # Список кластеров загружается первым: остальные списки загружаются по кластерам из него
+        yield "cluster", ""
+        for cluster in self.index.clusters(endpoint):
+            for kind in ENTITY_SOURCES:
+                if kind != "cluster":
+                    yield kind, cluster
+
+    def load(self, endpoint: str, host: str, port: str, kind: str, cluster: str):
+        source = ENTITY_SOURCES[kind]
+        params = {}
+        if cluster:
+            params["cluster"] = cluster
+            variable_manager = self.executor.variable_manager
+            if variable_manager.get_variable(CLUSTER_USER_VARIABLE):
+                params["cluster-user"] = f"$({CLUSTER_USER_VARIABLE})"
+                if variable_manager.get_variable(CLUSTER_PWD_VARIABLE):
+                    params["cluster-pwd"] = f"$({CLUSTER_PWD_VARIABLE})"
+        args = self.executor.build_command_args(source.mode, source.command, params, host, port)
+
+        token = CancelToken()
+        with self._lock:
+            self._cancel_token = token
+        try:
+            success, output = self.executor.execute_command(args, token, background=True)
+        finally:
+            with self._lock:
+                self._cancel_token = None
+
+        key = (endpoint, kind, cluster)
+        if not success:
+            self.index.mark_loaded(endpoint, kind, cluster)
+            # Об ошибке сообщается один раз, пока список снова не загрузится
+            if key not in self._failed and not token.cancelled and self.logger:
+                self.logger.log_warning(f"Не удалось загрузить {source.mode} {source.command} "
+                                        f"для {endpoint}: {str(output).strip()}", "PREFETCH")
+            self._failed.add(key)
+            return
+        self._failed.discard(key)
+
+        entities = [entity for entity in (entity_from_record(kind, record, cluster) for record in output) if entity]
+        if kind == "cluster":
+            # Объекты удаленных кластеров удаляются вместе с ними
+            for removed in set(self.index.clusters(endpoint)) - {entity.uuid for entity in entities}:
+                self.index.remove_cluster(endpoint, removed)
+        if self.index.update(endpoint, kind, cluster, entities) and self.on_updated:
+            self.on_updated(endpoint, kind)
@@ -0,0 +1,142 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .async_executor import AsyncCommandExecutor, CommandHandle
+from .rac_parser import RacRecord
+
+# Колонка с адресом RAS в объединенных результатах. Не "host": это поле уже
+# есть в выводе rac (например, у cluster list и server list)
+HOST_COLUMN = "ras-host"
+
+
+@dataclass
+class HostResult:
+    """Результат выполнения команды на одном хосте"""
+    host: str
+    success: bool
+    duration: float = 0.0
+    record_count: int = 0
+    error: str = ""
+
+
+@dataclass
+class FanOutResult:
+    """Объединенный результат команды на нескольких хостах"""
+    records: List[RacRecord] = field(default_factory=list)
+    hosts: List[HostResult] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[HostResult]:
+        return [host for host in self.hosts if not host.success]
+
+    @property
+    def success(self) -> bool:
+        return bool(self.hosts) and not self.failed
+
+    def summary_lines(self) -> List[str]:
+        """Отчет по хостам: время и ошибки каждого отдельно"""
+        lines = []
+        for host in self.hosts:
+            if host.success:
+                lines.append(f"{host.host}: записей {host.record_count}, {host.duration:.2f} с")
+            else:
+                lines.append(f"{host.host}: ошибка за {host.duration:.2f} с — {host.error.strip()}")
+        return lines
+
+
+def parse_hosts(text: str, default_port: str = "1545") -> List[str]:
+    """Разбор списка хостов (через запятую, пробел или с новой строки) в адреса host:port"""
+    hosts = []
+    for item in re.split(r'[\s,;]+', text or ""):
+        if not item:
+            continue
+        if ":" not in item:
+            item = f"{item}:{default_port}"
+        if item not in hosts:
+            hosts.append(item)
+    return hosts
+
+
+class FanOutHandle:
+    """Группа команд, запущенных на нескольких хостах"""
+
+    def __init__(self, fanout_id: int):
+        self.fanout_id = fanout_id
+        self.handles: Dict[str, CommandHandle] = {}
+
+    def cancel(self):
+        for handle in list(self.handles.values()):
+            handle.cancel()
+
+
+class FanOutExecutor:
+    """Параллельное выполнение одной команды на списке серверов RAS"""
+
+    def __init__(self, async_executor: AsyncCommandExecutor):
+        self.async_executor = async_executor
+
+    def submit(self, hosts: List[str], mode: str, command: str, parameters: dict,
+               callback: Optional[Callable[[FanOutHandle, FanOutResult], None]] = None,
+               on_records: Optional[Callable[[FanOutHandle, List[RacRecord]], None]] = None) -> FanOutHandle:
+        """Запуск команды на всех хостах; callback вызывается после завершения последнего"""
+        hosts = list(dict.fromkeys(hosts))
+        fanout = FanOutHandle(self.async_executor.next_id())
+        results: Dict[str, Tuple[HostResult, List[RacRecord]]] = {}
+        lock = threading.Lock()
+        executor = self.async_executor.executor
+
+        def on_host_records(host: str):
+            def handler(_handle: CommandHandle, batch: List[RacRecord]):
+                # Копии записей: исходные хранятся в кэше результатов и в истории
+                on_records(fanout, [{**record, HOST_COLUMN: host} for record in batch])
+            return handler
+
+        def on_host_done(host: str):
+            def handler(handle: CommandHandle, success: bool, output):
+                host_result = HostResult(host, success, handle.duration or 0.0)
+                if success:
+                    output = [{**record, HOST_COLUMN: host} for record in output]
+                    host_result.record_count = len(output)
+                else:
+                    host_result.error = str(output)
+
+                with lock:
+                    results[host] = (host_result, output if success else [])
+                    finished = len(results) == len(hosts)
+
+                if finished and callback is not None:
+                    merged = FanOutResult()
+                    for name in hosts:
+                        result, records = results[name]
+                        merged.hosts.append(result)
+                        merged.records.extend(records)
+                    callback(fanout, merged)
+            return handler
+
+        for host in hosts:
+            address, _, port = host.rpartition(":")
+            args = executor.build_command_args(mode, command, parameters, address, port)
+            # build_command_args опускает адрес по умолчанию; для группы хостов указываем его явно
+            if not args or args[0] != host:
+                args.insert(0, host)
+            fanout.handles[host] = self.async_executor.submit(
+                args, on_host_done(host), on_host_records(host) if on_records else None)
+
+        return fanout
+
+    def run(self, hosts: List[str], mode: str, command: str, parameters: dict) -> FanOutResult:
+        """Синхронное выполнение команды на всех хостах"""
+        done = threading.Event()
+        holder: List[FanOutResult] = []
+
+        def on_done(_fanout: FanOutHandle, result: FanOutResult):
+            holder.append(result)
+            done.set()
+
+        if not hosts:
+            return FanOutResult()
+        self.submit(hosts, mode, command, parameters, on_done)
+        done.wait()
+        return holder[0]
@@ -1,58 +1,250 @@
+import glob
+import gzip
 import logging
 import os
 import atexit
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
+LOG_FORMAT = '[%(asctime)s] [%(name)s] %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+LOG_PREFIX = "rac_admin_"
 
-class SafeLogHandler(logging.Handler):
-    """Безопасный обработчик логов, который не ломает shutdown"""
+# Размер буфера файла и условия сброса на диск
+LOG_BUFFER_SIZE = 64 * 1024
+LOG_FLUSH_INTERVAL = 1.0
+# Ротация по размеру внутри суток
+LOG_MAX_BYTES = 20 * 1024 * 1024
 
-    def __init__(self, log_file):
+
+def compress_file(path: str):
+    """Сжатие файла журнала в .gz с удалением исходного"""
+    try:
+        with open(path, 'rb') as source, gzip.open(path + ".gz", 'wb') as target:
+            shutil.copyfileobj(source, target)
+        os.remove(path)
+    except OSError:
+        pass  # Файл мог быть уже сжат другим экземпляром приложения
+
+
+class LogFormatter(logging.Formatter):
+    """Форматер с кешем времени: в пределах секунды asctime не пересчитывается"""
+
+    def __init__(self):
+        super().__init__(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+        self._cached_second = None
+        self._cached_time = ""
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_second = second
+            self._cached_time = super().formatTime(record, datefmt)
+        return self._cached_time
+
+
+class BufferedRotatingFileHandler(logging.Handler):
+    """Файловый обработчик с постоянным буферизованным дескриптором
+
+    Файл rac_admin_YYYYMMDD.log открывается один раз и сбрасывается на диск
+    при накоплении LOG_BUFFER_SIZE байт или раз в flush_interval секунд.
+    При смене суток или превышении max_bytes файл закрывается, а прежний
+    сжимается в gzip в фоновом потоке. Вызывается только из потока записи
+    QueueListener, поэтому дополнительная синхронизация не нужна.
+    """
+
+    def __init__(self, log_dir: str, max_bytes: int = LOG_MAX_BYTES,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, buffer_size: int = LOG_BUFFER_SIZE):
         super().__init__()
-        self.log_file = log_file
-        self.setFormatter(logging.Formatter('[%(asctime)s] [%(name)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+        self.log_dir = log_dir
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.setFormatter(LogFormatter())
+
+        self.stream = None
+        self.day = None
+        self.size = 0
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self._open()
+        self._compress_in_background(self._stale_files())
+
+    @property
+    def current_file(self) -> str:
+        return os.path.join(self.log_dir, f"{LOG_PREFIX}{self.day}.log")
+
+    def _open(self):
+        self.day = datetime.now().strftime('%Y%m%d')
+        self.stream = open(self.current_file, 'a', encoding='utf-8', buffering=self.buffer_size)
+        self.size = self.stream.tell()
+        self.pending = 0
+
+    def _stale_files(self):
+        """Несжатые журналы прошлых дней и части, оставшиеся после ротации"""
+        current = os.path.abspath(self.current_file)
+        return [path for path in glob.glob(os.path.join(self.log_dir, f"{LOG_PREFIX}*.log"))
+                if os.path.abspath(path) != current]
+
+    def _compress_in_background(self, paths):
+        if paths:
+            threading.Thread(target=lambda: [compress_file(path) for path in paths],
+                             name="log-compress", daemon=True).start()
+
+    def _rotate(self):
+        """Закрытие текущего файла и переход к новому"""
+        closed_day = self.day
+        closed_file = self.current_file
+        self.stream.close()
+
+        if closed_day == datetime.now().strftime('%Y%m%d'):
+            # Ротация по размеру: текущий файл становится частью с номером
+            index = 1
+            while glob.glob(os.path.join(self.log_dir, f"{LOG_PREFIX}{closed_day}.{index}.log*")):
+                index += 1
+            rotated = os.path.join(self.log_dir, f"{LOG_PREFIX}{closed_day}.{index}.log")
+            os.replace(closed_file, rotated)
+            closed_file = rotated
+
+        self._open()
+        self._compress_in_background([closed_file])
 
     def emit(self, record):
         try:
-            msg = self.format(record)
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(msg + '\n')
+            if self.stream is None:
+                return
+            # Запись, поставленная в очередь до полуночи, не возвращает журнал к прошлому дню
+            if datetime.fromtimestamp(record.created).strftime('%Y%m%d') > self.day or self.size >= self.max_bytes:
+                self._rotate()
+
+            msg = self.format(record) + '\n'
+            self.stream.write(msg)
+            length = len(msg)
+            self.size += length
+            self.pending += length
+
+            if self.pending >= self.buffer_size or time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
         except Exception:
-            pass  # Игнорируем ошибки при закрытии
+            self.handleError(record)
+
+    def flush(self):
+        if self.stream is not None and self.pending:
+            try:
+                self.stream.flush()
+            except (OSError, ValueError):
+                pass
+            self.pending = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        try:
+            if self.stream is not None:
+                self.flush()
+                self.stream.close()
+                self.stream = None
+        finally:
+            super().close()
+
+
+class LogQueueHandler(QueueHandler):
+    """Постановка записи в очередь без копирования (QueueHandler.prepare копирует запись)"""
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+
+class FlushingQueueListener(QueueListener):
+    """QueueListener, сбрасывающий буферы обработчиков при простое очереди"""
+
+    def __init__(self, log_queue, *handlers, flush_interval: float = LOG_FLUSH_INTERVAL):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.flush_interval)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
 
 
 class RACLogger:
-    def __init__(self, log_dir: str = "logs"):
+    """Журнал приложения: запись в файл и консоль выполняется фоновым потоком
+
+    Вызывающий код только помещает запись в очередь, поэтому вывод rac
+    в десятки тысяч строк журналируется без задержки выполнения команды.
+    """
+
+    def __init__(self, log_dir: str = "logs", console: bool = True):
         self.log_dir = log_dir
+        self.console = console
+        self.listener: Optional[FlushingQueueListener] = None
         self._setup_logging()
 
     def _setup_logging(self):
         """Настройка системы логирования без конфликтов с PyQt"""
-        if not os.path.exists(self.log_dir):
-            os.makedirs(self.log_dir)
+        os.makedirs(self.log_dir, exist_ok=True)
 
-        log_file = os.path.join(self.log_dir, f"rac_admin_{datetime.now().strftime('%Y%m%d')}.log")
+        self.file_handler = BufferedRotatingFileHandler(self.log_dir)
+        self.file_handler.setLevel(logging.INFO)
+        self.handlers = [self.file_handler]
 
-        # Создаем безопасный файловый обработчик
-        file_handler = SafeLogHandler(log_file)
-        file_handler.setLevel(logging.INFO)
+        if self.console:
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(logging.INFO)
+            console_handler.setFormatter(LogFormatter())
+            self.handlers.append(console_handler)
 
-        # Создаем консольный обработчик
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter('[%(asctime)s] [%(name)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-        console_handler.setFormatter(console_formatter)
+        self.queue_handler = LogQueueHandler(queue.SimpleQueue())
+        self.listener = FlushingQueueListener(self.queue_handler.queue, *self.handlers)
+        self.listener.start()
 
-        # Настраиваем корневой логгер
         self.logger = logging.getLogger('RACAdmin')
         self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        self.logger.propagate = False
+        # Обработчики предыдущего экземпляра RACLogger дублировали бы записи
+        for handler in list(self.logger.handlers):
+            if isinstance(handler, QueueHandler):
+                self.logger.removeHandler(handler)
+        self.logger.addHandler(self.queue_handler)
+
+        # Поток записи останавливается до завершения интерпретатора, дописав очередь
+        atexit.register(self.close)
+
+    def add_handler(self, handler: logging.Handler):
+        """Подключение обработчика к потоку записи: он не замедляет вызывающий код"""
+        if handler not in self.handlers:
+            self.handlers.append(handler)
+        if self.listener is not None:
+            # QueueListener перебирает кортеж handlers при каждой записи, замена атомарна
+            self.listener.handlers = tuple(self.handlers)
+
+    def remove_handler(self, handler: logging.Handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+        if self.listener is not None:
+            self.listener.handlers = tuple(self.handlers)
 
-        # Явно отключаем atexit для наших обработчиков
-        file_handler.emit = lambda record: None
-        console_handler.emit = lambda record: None
+    def close(self):
+        """Запись оставшихся сообщений и закрытие файла журнала"""
+        if self.listener is None:
+            return
+        self.logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+        self.listener = None
+        for handler in self.handlers:
+            handler.close()
 
     def log_command(self, command: str, function: str = "SYSTEM"):
         """Логирование выполняемой команды"""
@@ -68,4 +260,4 @@ class RACLogger:
 
     def log_warning(self, message: str, function: str = "SYSTEM"):
         """Логирование предупреждения"""
-        self.logger.warning(f"[{function}] {message}")
\ No newline at end of file
+        self.logger.warning(f"[{function}] {message}")
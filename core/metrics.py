@@ -0,0 +1,212 @@
+import bisect
+import copy
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Границы корзин гистограмм (как у Prometheus: значение попадает во все корзины >= него)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SPAWN_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+BYTES_BUCKETS = tuple(256 * 4 ** power for power in range(10))  # 256 Б .. 64 МБ
+RECORDS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+# Исходы выполнения команды
+OUTCOMES = ("success", "error", "timeout", "cancelled", "not_found")
+
+METRICS_HOST = "127.0.0.1"
+
+
+class Histogram:
+    """Потоковая гистограмма с фиксированными корзинами: память не зависит от числа замеров"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последняя корзина — +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля линейной интерполяцией внутри корзины"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Накопленные счетчики корзин в формате le=..."""
+        result, total = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((_format_number(bound), total))
+        result.append(("+Inf", self.count))
+        return result
+
+
+@dataclass
+class ExecutionStats:
+    """Замеры одного выполнения команды, заполняемые исполнителем"""
+    spawn_time: Optional[float] = None
+    bytes_read: int = 0
+    outcome: str = "success"
+
+
+@dataclass
+class CommandMetrics:
+    """Накопленные метрики команды (хост, режим, команда)"""
+    duration: Histogram = field(default_factory=lambda: Histogram(DURATION_BUCKETS))
+    spawn: Histogram = field(default_factory=lambda: Histogram(SPAWN_BUCKETS))
+    bytes: Histogram = field(default_factory=lambda: Histogram(BYTES_BUCKETS))
+    records: Histogram = field(default_factory=lambda: Histogram(RECORDS_BUCKETS))
+    outcomes: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(OUTCOMES, 0))
+    sources: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.outcomes.values())
+
+    @property
+    def failures(self) -> int:
+        return self.total - self.outcomes["success"]
+
+
+MetricsKey = Tuple[str, str, str]
+
+
+class MetricsRegistry:
+    """Метрики выполнения команд RAC по (хост, режим, команда)
+
+    Время выполнения считается для rac и RAS; результаты из кеша
+    учитываются только в счетчиках исходов и источников.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[MetricsKey, CommandMetrics] = {}
+
+    def observe(self, key: MetricsKey, source: str, duration: float, stats: ExecutionStats, record_count: int):
+        with self._lock:
+            metrics = self._metrics.get(key)
+            if metrics is None:
+                metrics = self._metrics[key] = CommandMetrics()
+            metrics.outcomes[stats.outcome] = metrics.outcomes.get(stats.outcome, 0) + 1
+            metrics.sources[source] = metrics.sources.get(source, 0) + 1
+            if source == "cache":
+                return
+            metrics.duration.observe(duration)
+            if stats.outcome == "success":
+                metrics.records.observe(record_count)
+            if stats.spawn_time is not None:
+                metrics.spawn.observe(stats.spawn_time)
+                metrics.bytes.observe(stats.bytes_read)
+
+    def snapshot(self) -> Dict[MetricsKey, CommandMetrics]:
+        """Копия метрик для отображения без удержания блокировки"""
+        with self._lock:
+            return copy.deepcopy(self._metrics)
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def histogram(name: str, help_text: str, attribute: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, metrics in sorted(snapshot.items()):
+                value: Histogram = getattr(metrics, attribute)
+                if not value.count:
+                    continue
+                labels = _labels(key)
+                for bound, count in value.cumulative():
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {_format_number(value.sum)}")
+                lines.append(f"{name}_count{{{labels}}} {value.count}")
+
+        lines.append("# HELP rac_commands_total Выполненные команды RAC по исходу")
+        lines.append("# TYPE rac_commands_total counter")
+        for key, metrics in sorted(snapshot.items()):
+            for outcome, count in metrics.outcomes.items():
+                lines.append(f'rac_commands_total{{{_labels(key)},outcome="{outcome}"}} {count}')
+
+        lines.append("# HELP rac_command_source_total Выполненные команды RAC по источнику результата")
+        lines.append("# TYPE rac_command_source_total counter")
+        for key, metrics in sorted(snapshot.items()):
+            for source, count in sorted(metrics.sources.items()):
+                lines.append(f'rac_command_source_total{{{_labels(key)},source="{source}"}} {count}')
+
+        histogram("rac_command_duration_seconds", "Полное время выполнения команды", "duration")
+        histogram("rac_command_spawn_seconds", "Время запуска процесса rac", "spawn")
+        histogram("rac_command_output_bytes", "Объем вывода rac", "bytes")
+        histogram("rac_command_records", "Число записей в результате", "records")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """HTTP-сервер метрик Prometheus на локальном интерфейсе (GET /metrics)"""
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = METRICS_HOST):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Запросы сборщика метрик не пишутся в консоль
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _labels(key: MetricsKey) -> str:
+    host, mode, command = key
+    return f'host="{_escape(host)}",mode="{_escape(mode)}",command="{_escape(command)}"'
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,346 @@
+import json
+import os
+import queue
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+try:
+    import yaml
+except ImportError:  # PyYAML необязателен: без него поддерживаются только файлы JSON
+    yaml = None
+
+from .async_executor import AsyncCommandExecutor, CommandHandle
+from .rac_commands import RACCommands
+from .rac_parser import RacRecord, format_value
+
+# Ссылка на поле результата: ${шаг.поле} или ${item.поле} для элемента foreach
+_REFERENCE_RE = re.compile(r'\$\{([\w-]+)\.([\w-]+)\}')
+ITEM_REFERENCE = "item"
+# Колонка с идентификатором шага в объединенном выводе конвейера
+STEP_COLUMN = "pipeline-step"
+
+
+class PipelineError(Exception):
+    """Ошибка в описании конвейера или в ссылке на результат шага"""
+
+
+@dataclass
+class PipelineStep:
+    """Шаг конвейера: команда rac, при foreach — для каждой записи другого шага"""
+    id: str
+    mode: str
+    command: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    foreach: Optional[str] = None
+    where: Dict[str, Any] = field(default_factory=dict)
+    host: Optional[str] = None
+    port: Optional[str] = None
+
+    def references(self) -> Set[str]:
+        """Имена, на которые ссылаются параметры шага (включая item)"""
+        names = set()
+        for value in self.params.values():
+            if isinstance(value, str):
+                names.update(name for name, _ in _REFERENCE_RE.findall(value))
+        return names
+
+    @property
+    def dependencies(self) -> Set[str]:
+        """Шаги, которые должны завершиться до запуска этого шага"""
+        names = self.references() - {ITEM_REFERENCE}
+        if self.foreach:
+            names.add(self.foreach)
+        return names
+
+
+@dataclass
+class Pipeline:
+    name: str
+    steps: List[PipelineStep]
+    host: Optional[str] = None
+    port: Optional[str] = None
+
+
+@dataclass
+class StepResult:
+    """Результат шага с временем запуска относительно начала конвейера"""
+    step_id: str
+    success: bool = False
+    skipped: bool = False
+    records: List[RacRecord] = field(default_factory=list)
+    started: float = 0.0
+    duration: float = 0.0
+    command_count: int = 0
+    errors: List[str] = field(default_factory=list)
+    # Контекст ссылок на каждую запись: параметры команды, исходная запись foreach и сама запись
+    contexts: List[RacRecord] = field(default_factory=list, repr=False)
+
+
+@dataclass
+class PipelineResult:
+    steps: Dict[str, StepResult] = field(default_factory=dict)
+    duration: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return all(step.success for step in self.steps.values())
+
+    def records(self) -> List[RacRecord]:
+        """Записи всех шагов с колонкой идентификатора шага"""
+        merged = []
+        for step in self.steps.values():
+            for record in step.records:
+                merged.append({STEP_COLUMN: step.step_id, **record})
+        return merged
+
+    def summary_lines(self) -> List[str]:
+        """Отчет по шагам: время, число команд и ошибки"""
+        lines = []
+        for step in self.steps.values():
+            if step.skipped:
+                lines.append(f"{step.step_id}: пропущен — {'; '.join(step.errors)}")
+            elif step.success:
+                lines.append(f"{step.step_id}: записей {len(step.records)}, команд {step.command_count}, "
+                             f"начало +{step.started:.2f} с, {step.duration:.2f} с")
+            else:
+                lines.append(f"{step.step_id}: ошибка за {step.duration:.2f} с — {'; '.join(step.errors)}")
+        lines.append(f"Всего: {self.duration:.2f} с")
+        return lines
+
+
+def _parse_step(data: dict) -> PipelineStep:
+    if not isinstance(data, dict):
+        raise PipelineError(f"Шаг должен быть объектом: {data!r}")
+    missing = [key for key in ("id", "mode", "command") if not data.get(key)]
+    if missing:
+        raise PipelineError(f"В шаге {data.get('id', '?')} не указано: {', '.join(missing)}")
+
+    where = data.get("where") or {}
+    params = data.get("params") or {}
+    if not isinstance(where, dict) or not isinstance(params, dict):
+        raise PipelineError(f"Поля params и where шага {data['id']} должны быть объектами")
+
+    port = data.get("port")
+    return PipelineStep(id=str(data["id"]), mode=data["mode"], command=data["command"], params=params,
+                        foreach=data.get("foreach"), where=where, host=data.get("host"),
+                        port=str(port) if port is not None else None)
+
+
+def parse_pipeline(data: dict, name: str = "") -> Pipeline:
+    """Проверка и разбор описания конвейера"""
+    if not isinstance(data, dict) or not isinstance(data.get("steps"), list) or not data["steps"]:
+        raise PipelineError("Описание конвейера должно содержать непустой список steps")
+
+    steps = [_parse_step(item) for item in data["steps"]]
+    ids = set()
+    for step in steps:
+        if step.id in ids or step.id == ITEM_REFERENCE:
+            raise PipelineError(f"Недопустимый или повторяющийся идентификатор шага: {step.id}")
+        ids.add(step.id)
+        if RACCommands.find_command(step.mode, step.command) is None:
+            raise PipelineError(f"Шаг {step.id}: неизвестная команда {step.mode} {step.command}")
+        if ITEM_REFERENCE in step.references() and not step.foreach:
+            raise PipelineError(f"Шаг {step.id}: ссылка на item без foreach")
+
+    for step in steps:
+        unknown = step.dependencies - ids
+        if unknown:
+            raise PipelineError(f"Шаг {step.id} ссылается на неизвестные шаги: {', '.join(sorted(unknown))}")
+
+    # Проверка циклов: шаги, которые нельзя упорядочить, ссылаются друг на друга
+    ordered: Set[str] = set()
+    remaining = list(steps)
+    while remaining:
+        ready = [step for step in remaining if step.dependencies <= ordered]
+        if not ready:
+            raise PipelineError("Циклическая зависимость шагов: "
+                                + ", ".join(step.id for step in remaining))
+        ordered.update(step.id for step in ready)
+        remaining = [step for step in remaining if step.id not in ordered]
+
+    port = data.get("port")
+    return Pipeline(name=data.get("name") or name, steps=steps, host=data.get("host"),
+                    port=str(port) if port is not None else None)
+
+
+def load_pipeline(path: str) -> Pipeline:
+    """Загрузка конвейера из файла JSON или YAML"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    if path.lower().endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise PipelineError("Для файлов YAML требуется пакет PyYAML")
+        data = yaml.safe_load(text)
+    else:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise PipelineError(f"Ошибка разбора {path}: {e}")
+
+    return parse_pipeline(data, os.path.splitext(os.path.basename(path))[0])
+
+
+def matches(record: RacRecord, where: Dict[str, Any]) -> bool:
+    """Проверка записи по условиям where (сравнение текстовых значений)"""
+    return all(key in record and format_value(record[key]) == format_value(value)
+               for key, value in where.items())
+
+
+class PipelineRunner:
+    """Выполнение конвейера через асинхронный исполнитель
+
+    Шаг запускается, как только завершены шаги, на которые он ссылается,
+    поэтому независимые ветви выполняются параллельно. Шаг с foreach
+    запускает по команде на каждую запись исходного шага; записи результата
+    дополняются полями этой записи, чтобы следующие шаги могли ссылаться,
+    например, и на сеанс, и на кластер. Ссылкам ${шаг.поле} и ${item.поле}
+    доступны также параметры команды, вернувшей запись: у записей
+    infobase summary list, выполненной с --cluster, есть поле cluster.
+    Шаги, зависящие от неудачного, пропускаются.
+    """
+
+    def __init__(self, async_executor: AsyncCommandExecutor):
+        self.async_executor = async_executor
+        self._handles: List[CommandHandle] = []
+        self._lock = threading.Lock()
+
+    def run(self, pipeline: Pipeline,
+            on_step: Optional[Callable[[StepResult], None]] = None) -> PipelineResult:
+        """Синхронное выполнение конвейера; on_step вызывается по завершении каждого шага"""
+        started = time.monotonic()
+        result = PipelineResult()
+        finished: "queue.Queue[StepResult]" = queue.Queue()
+        pending = {step.id: step for step in pipeline.steps}
+        running: Set[str] = set()
+
+        while pending or running:
+            for step in list(pending.values()):
+                failed = [name for name in step.dependencies
+                          if name in result.steps and not result.steps[name].success]
+                if failed:
+                    del pending[step.id]
+                    skipped = StepResult(step.id, skipped=True, started=time.monotonic() - started,
+                                         errors=[f"не выполнен шаг {', '.join(sorted(failed))}"])
+                    result.steps[step.id] = skipped
+                    if on_step is not None:
+                        on_step(skipped)
+                elif all(name in result.steps for name in step.dependencies):
+                    del pending[step.id]
+                    running.add(step.id)
+                    self._start_step(pipeline, step, result.steps, started, finished)
+
+            if not running:
+                continue
+
+            step_result = finished.get()
+            running.discard(step_result.step_id)
+            result.steps[step_result.step_id] = step_result
+            if on_step is not None:
+                on_step(step_result)
+
+        # Порядок шагов в отчете — как в описании конвейера
+        result.steps = {step.id: result.steps[step.id] for step in pipeline.steps}
+        result.duration = time.monotonic() - started
+        return result
+
+    def cancel(self):
+        """Отмена команд выполняемого конвейера"""
+        with self._lock:
+            handles = list(self._handles)
+        for handle in handles:
+            handle.cancel()
+
+    def _resolve(self, value: Any, item: Optional[RacRecord], results: Dict[str, StepResult]) -> Any:
+        """Подстановка ссылок ${шаг.поле} и ${item.поле} в значение параметра"""
+        if not isinstance(value, str):
+            return value
+
+        def replace(match) -> str:
+            name, key = match.group(1), match.group(2)
+            if name == ITEM_REFERENCE:
+                record = item
+            else:
+                contexts = results[name].contexts
+                if not contexts:
+                    raise PipelineError(f"Шаг {name} не вернул записей для ссылки {match.group(0)}")
+                record = contexts[0]
+            if key not in record:
+                raise PipelineError(f"В результате {name} нет поля {key}")
+            return format_value(record[key])
+
+        return _REFERENCE_RE.sub(replace, value)
+
+    def _start_step(self, pipeline: Pipeline, step: PipelineStep, results: Dict[str, StepResult],
+                    pipeline_started: float, finished: "queue.Queue[StepResult]"):
+        """Запуск команд шага; результат помещается в очередь после завершения последней"""
+        step_started = time.monotonic()
+        step_result = StepResult(step.id, started=step_started - pipeline_started)
+        # Элемент foreach: запись исходного шага для вывода и ее контекст для ссылок
+        if step.foreach:
+            source = results[step.foreach]
+            items: List[Any] = list(zip(source.records, source.contexts))
+        else:
+            items = [(None, None)]
+        executor = self.async_executor.executor
+        host = step.host or pipeline.host
+        port = step.port or pipeline.port
+
+        try:
+            commands = []
+            for item, context in items:
+                params = {key: self._resolve(value, context, results) for key, value in step.params.items()}
+                commands.append(((item, {**(context or {}), **params}),
+                                 executor.build_command_args(step.mode, step.command, params, host, port)))
+        except PipelineError as e:
+            step_result.errors.append(str(e))
+            finished.put(step_result)
+            return
+
+        step_result.command_count = len(commands)
+        if not commands:
+            step_result.success = True
+            finished.put(step_result)
+            return
+
+        outputs: List[Any] = [None] * len(commands)
+        remaining = [len(commands)]
+        lock = threading.Lock()
+
+        def finish():
+            for (item, context), success, output in outputs:
+                if not success:
+                    step_result.errors.append(str(output).strip())
+                    continue
+                for record in output:
+                    if matches(record, step.where):
+                        step_result.records.append({**item, **record} if item else record)
+                        step_result.contexts.append({**context, **record})
+            step_result.success = not step_result.errors
+            step_result.duration = time.monotonic() - step_started
+            finished.put(step_result)
+
+        def on_done(index: int, item: Optional[RacRecord]):
+            def handler(handle: CommandHandle, success: bool, output):
+                with lock:
+                    outputs[index] = (item, success, output)
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    finish()
+            return handler
+
+        for index, (item, args) in enumerate(commands):
+            handle = self.async_executor.submit(args, on_done(index, item))
+            with self._lock:
+                self._handles.append(handle)
+            # Регистрируется после добавления: для завершенной команды вызывается сразу
+            handle.future.add_done_callback(lambda _future, handle=handle: self._forget(handle))
+
+    def _forget(self, handle: CommandHandle):
+        with self._lock:
+            if handle in self._handles:
+                self._handles.remove(handle)
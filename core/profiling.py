@@ -0,0 +1,213 @@
+"""Профилирование по запросу: интервалы трассировки, cProfile и tracemalloc
+
+Режим включается переменной окружения RAC_ADMIN_PROFILE со списком через
+запятую (или флагом main.py --profile[=...]):
+
+    trace        — интервалы горячих путей в формате Chrome Trace (chrome://tracing, Perfetto)
+    cprofile     — cProfile главного потока за весь сеанс (.prof для pstats/snakeviz)
+    tracemalloc  — крупнейшие места выделения памяти на момент завершения
+    1 / all      — все режимы сразу
+
+Файлы пишутся в каталог RAC_ADMIN_PROFILE_DIR (по умолчанию profiles) при
+завершении процесса. Без переменной span() возвращает общий пустой контекст,
+а traced() не оборачивает функцию вовсе, так что накладных расходов нет.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Optional
+
+PROFILE_ENV = "RAC_ADMIN_PROFILE"
+PROFILE_DIR_ENV = "RAC_ADMIN_PROFILE_DIR"
+DEFAULT_PROFILE_DIR = "profiles"
+PROFILE_MODES = ("trace", "cprofile", "tracemalloc")
+
+# Ограничение числа событий трассировки: старые вытесняются
+MAX_TRACE_EVENTS = 1_000_000
+TRACEMALLOC_FRAMES = 10
+TRACEMALLOC_TOP = 50
+
+
+def parse_modes(value: str) -> set:
+    """Разбор значения RAC_ADMIN_PROFILE в набор режимов"""
+    modes = {mode.strip().lower() for mode in (value or "").split(",") if mode.strip()}
+    if modes & {"1", "all", "yes", "true"}:
+        return set(PROFILE_MODES)
+    return modes & set(PROFILE_MODES)
+
+
+class _NullSpan:
+    """Пустой контекст для выключенной трассировки"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "category", "args", "start")
+
+    def __init__(self, profiler: "Profiler", name: str, category: str, args: dict):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.complete(self.name, self.category, self.start, self.args)
+        return False
+
+
+class Profiler:
+    """Сбор событий трассировки и профилей сеанса"""
+
+    def __init__(self, modes: set = None, output_dir: str = DEFAULT_PROFILE_DIR):
+        self.modes = set(modes or ())
+        self.output_dir = output_dir
+        self.tracing = "trace" in self.modes
+        self.events = deque(maxlen=MAX_TRACE_EVENTS)
+        self.thread_names = {}
+        self.pid = os.getpid()
+        self.session = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.started = False
+        self._profile = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls) -> "Profiler":
+        return cls(parse_modes(os.environ.get(PROFILE_ENV, "")),
+                   os.environ.get(PROFILE_DIR_ENV) or DEFAULT_PROFILE_DIR)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.modes)
+
+    def span(self, name: str, category: str = "app", **args):
+        """Контекст интервала трассировки"""
+        if not self.tracing:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def complete(self, name: str, category: str, start_ns: int, args: dict = None):
+        """Завершенный интервал от start_ns (time.perf_counter_ns) до текущего момента"""
+        if not self.tracing:
+            return
+        end_ns = time.perf_counter_ns()
+        thread = threading.current_thread()
+        self.thread_names.setdefault(thread.ident, thread.name)
+        event = {"name": name, "cat": category, "ph": "X", "ts": start_ns / 1000,
+                 "dur": (end_ns - start_ns) / 1000, "pid": self.pid, "tid": thread.ident}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def instant(self, name: str, category: str = "app", **args):
+        """Мгновенное событие (например, обнаруженное зависание)"""
+        if not self.tracing:
+            return
+        thread = threading.current_thread()
+        self.thread_names.setdefault(thread.ident, thread.name)
+        self.events.append({"name": name, "cat": category, "ph": "i", "s": "p",
+                            "ts": time.perf_counter_ns() / 1000, "pid": self.pid,
+                            "tid": thread.ident, "args": args})
+
+    def start(self):
+        """Запуск профилирования сеанса; файлы записываются при завершении процесса"""
+        with self._lock:
+            if self.started or not self.enabled:
+                return
+            self.started = True
+        if "cprofile" in self.modes:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        if "tracemalloc" in self.modes:
+            import tracemalloc
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        atexit.register(self.stop)
+
+    def stop(self) -> list:
+        """Остановка профилирования и запись файлов; возвращает пути записанных файлов"""
+        with self._lock:
+            if not self.started:
+                return []
+            self.started = False
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        written = []
+        if self.tracing:
+            written.append(self.write_trace(self._path("trace", "json")))
+        if self._profile is not None:
+            self._profile.disable()
+            path = self._path("cprofile", "prof")
+            self._profile.dump_stats(path)
+            self._profile = None
+            written.append(path)
+        if "tracemalloc" in self.modes:
+            written.append(self._write_tracemalloc(self._path("memory", "txt")))
+        for path in written:
+            print(f"Профиль записан: {path}")
+        return written
+
+    def write_trace(self, path: str) -> str:
+        """Запись событий в формате Chrome Trace Event"""
+        events = list(self.events)
+        metadata = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                    for tid, name in list(self.thread_names.items())]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return path
+
+    def _write_tracemalloc(self, path: str) -> str:
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"Текущий объем: {current / 1024 / 1024:.1f} МБ, пик: {peak / 1024 / 1024:.1f} МБ\n\n")
+            for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]:
+                f.write(f"{stat}\n")
+        return path
+
+    def _path(self, kind: str, extension: str) -> str:
+        return os.path.join(self.output_dir, f"{kind}_{self.session}_{self.pid}.{extension}")
+
+
+PROFILER = Profiler.from_environment()
+
+
+def span(name: str, category: str = "app", **args):
+    """Интервал трассировки глобального профилировщика"""
+    return PROFILER.span(name, category, **args)
+
+
+def traced(name: Optional[str] = None, category: str = "app") -> Callable:
+    """Декоратор интервала трассировки; без режима trace функция не оборачивается"""
+    def decorator(func):
+        if not PROFILER.tracing:
+            return func
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.complete(span_name, category, start)
+        return wrapper
+    return decorator
@@ -0,0 +1,117 @@
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+# Запись вывода rac: имя поля -> типизированное значение
+RacRecord = Dict[str, Any]
+
+_UUID_RE = re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+_INT_RE = re.compile(r'^-?\d+$')
+_FLOAT_RE = re.compile(r'^-?\d+\.\d+$')
+_DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}$')
+_BOOL_VALUES = {"yes": True, "no": False, "true": True, "false": False}
+
+
+def convert_value(raw: str) -> Any:
+    """Преобразование строкового значения rac в типизированное (UUID, int, float, datetime, bool)"""
+    value = raw.strip()
+    if not value:
+        return ""
+
+    # Значения в кавычках — всегда строки
+    if len(value) >= 2 and value.startswith('"') and value.endswith('"'):
+        return value[1:-1].replace('""', '"')
+
+    if _UUID_RE.match(value):
+        return uuid.UUID(value)
+    if _INT_RE.match(value):
+        return int(value)
+    if _FLOAT_RE.match(value):
+        return float(value)
+    if _DATETIME_RE.match(value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S")
+        except ValueError:
+            return value
+
+    lowered = value.lower()
+    if lowered in _BOOL_VALUES:
+        return _BOOL_VALUES[lowered]
+
+    return value
+
+
+def format_value(value: Any) -> str:
+    """Обратное преобразование значения записи в текстовый вид rac"""
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%dT%H:%M:%S")
+    return str(value)
+
+
+def format_record(record: RacRecord) -> Iterator[str]:
+    """Строки 'key : value' записи в формате вывода rac"""
+    width = max((len(key) for key in record), default=0)
+    for key, value in record.items():
+        # Строки в кавычках, если без них значение было бы прочитано как другой тип
+        if isinstance(value, str) and value and (" " in value or '"' in value or convert_value(value) != value):
+            text = '"' + value.replace('"', '""') + '"'
+        else:
+            text = format_value(value)
+        yield f"{key.ljust(width)} : {text}"
+
+
+def parse_line(line: str) -> Optional[Tuple[str, Any]]:
+    """Разбор строки формата 'key : value', None для строк другого формата"""
+    key, separator, raw_value = line.partition(":")
+    if not separator:
+        return None
+
+    key = key.strip()
+    if not key or " " in key:
+        return None
+
+    return key, convert_value(raw_value)
+
+
+class RecordParser:
+    """Инкрементальный разбор вывода rac: записи разделены пустыми строками"""
+
+    def __init__(self):
+        self._current: RacRecord = {}
+
+    def feed(self, line: str) -> Optional[RacRecord]:
+        """Обработка очередной строки, возвращает запись при ее завершении"""
+        if not line.strip():
+            return self._flush()
+
+        parsed = parse_line(line)
+        if parsed is not None:
+            key, value = parsed
+            self._current[key] = value
+        return None
+
+    def finish(self) -> Optional[RacRecord]:
+        """Завершение разбора, возвращает последнюю незакрытую запись"""
+        return self._flush()
+
+    def _flush(self) -> Optional[RacRecord]:
+        if not self._current:
+            return None
+        record, self._current = self._current, {}
+        return record
+
+
+def parse_records(lines: Iterable[str]) -> Iterator[RacRecord]:
+    """Потоковый разбор строк вывода rac в записи"""
+    parser = RecordParser()
+    for line in lines:
+        record = parser.feed(line)
+        if record is not None:
+            yield record
+
+    record = parser.finish()
+    if record is not None:
+        yield record
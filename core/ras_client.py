@@ -0,0 +1,208 @@
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set, Tuple
+
+from .rac_parser import RacRecord
+from .result_cache import CommandKey
+from . import ras_protocol as proto
+from .ras_protocol import Decoder, Encoder, RASProtocolError, RASServiceError
+
+
+class RASConnection:
+    """Постоянное TCP-соединение с сервером администрирования (RAS)"""
+
+    def __init__(self, host: str, port: int, timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock: Optional[socket.socket] = None
+        self.endpoint_id: Optional[int] = None
+        # Кластеры (и пользователи), для которых уже выполнена аутентификация
+        self.authenticated: Set[Tuple[str, str]] = set()
+
+    def open(self):
+        """Подключение, согласование протокола и открытие конечной точки сервиса"""
+        self.sock = socket.create_connection((self.host, self.port), self.timeout)
+        self.sock.settimeout(self.timeout)
+        self.sock.sendall(proto.encode_negotiate())
+
+        connect_body = Encoder().params({"connect.timeout": 2000}).to_bytes()
+        self.sock.sendall(proto.encode_packet(proto.PACKET_CONNECT, connect_body))
+        self._expect(proto.PACKET_CONNECT_ACK)
+
+        open_body = (Encoder().string(proto.SERVICE_NAME).string(proto.SERVICE_VERSION)
+                     .params({}).to_bytes())
+        self.sock.sendall(proto.encode_packet(proto.PACKET_ENDPOINT_OPEN, open_body))
+        decoder = Decoder(self._expect(proto.PACKET_ENDPOINT_OPEN_ACK))
+        decoder.string()  # сервис
+        decoder.string()  # версия
+        self.endpoint_id = decoder.size()
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.sendall(proto.encode_packet(proto.PACKET_DISCONNECT, b""))
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def _recv_exact(self, count: int) -> bytes:
+        data = bytearray()
+        while len(data) < count:
+            chunk = self.sock.recv(count - len(data))
+            if not chunk:
+                raise RASProtocolError("Сервер RAS закрыл соединение")
+            data += chunk
+        return bytes(data)
+
+    def read_packet(self) -> Tuple[int, bytes]:
+        packet_type = self._recv_exact(1)[0]
+        first = self._recv_exact(1)[0]
+        size = first & 0x3F
+        shift = 6
+        more = first & 0x40
+        while more:
+            current = self._recv_exact(1)[0]
+            size |= (current & 0x7F) << shift
+            shift += 7
+            more = current & 0x80
+        return packet_type, self._recv_exact(size)
+
+    def _expect(self, packet_type: int) -> bytes:
+        received_type, body = self.read_packet()
+        if received_type == proto.PACKET_ENDPOINT_FAILURE:
+            decoder = Decoder(body)
+            decoder.string()  # сервис
+            decoder.string()  # версия
+            decoder.size()  # идентификатор конечной точки
+            decoder.string()  # класс ошибки
+            raise RASProtocolError(decoder.string())
+        if received_type != packet_type:
+            raise RASProtocolError(f"Ожидался пакет RAS {packet_type}, получен {received_type}")
+        return body
+
+    def request(self, message_type: int, payload: bytes = b"") -> Tuple[int, Decoder]:
+        """Отправка сообщения сервису и получение ответа"""
+        self.sock.sendall(proto.encode_endpoint_message(self.endpoint_id, message_type, payload))
+        return proto.decode_endpoint_message(self._expect(proto.PACKET_ENDPOINT_MESSAGE))
+
+    def authenticate_cluster(self, cluster, user: str, password: str):
+        """Аутентификация администратора кластера (один раз на соединение)"""
+        key = (str(cluster), user or "")
+        if key in self.authenticated:
+            return
+        payload = Encoder().uuid(cluster).string(user or "").string(password or "").to_bytes()
+        self.request(proto.AUTHENTICATE_REQUEST, payload)
+        self.authenticated.add(key)
+
+    def authenticate_agent(self, user: str, password: str):
+        key = ("agent", user or "")
+        if key in self.authenticated:
+            return
+        payload = Encoder().string(user or "").string(password or "").to_bytes()
+        self.request(proto.AUTHENTICATE_AGENT_REQUEST, payload)
+        self.authenticated.add(key)
+
+
+class RASConnectionPool:
+    """Пул постоянных соединений RAS по адресам host:port"""
+
+    def __init__(self, max_idle_per_host: int = 4, timeout: float = 10):
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, int], List[RASConnection]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self, host: str, port: int):
+        """Выдача соединения из пула; сломанное соединение в пул не возвращается"""
+        key = (host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+
+        if conn is None:
+            conn = RASConnection(host, port, self.timeout)
+            conn.open()
+
+        try:
+            yield conn
+        except RASServiceError:
+            # Исключение сервиса не нарушает протокол — соединение остается рабочим
+            self._release(key, conn)
+            raise
+        except BaseException:
+            conn.close()
+            raise
+        else:
+            self._release(key, conn)
+
+    def _release(self, key: Tuple[str, int], conn: RASConnection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+        for conn in connections:
+            conn.close()
+
+
+class RASClient:
+    """Клиент RAS, выполняющий часть команд rac без запуска процесса
+
+    Поддерживаются читающие команды, для которых известен формат сообщений:
+    agent version, cluster list, cluster info, infobase summary list.
+    Для остальных команд supports() возвращает False, и исполнитель
+    использует утилиту rac.
+    """
+
+    SUPPORTED_COMMANDS = {
+        ("agent", ("version",)),
+        ("cluster", ("list",)),
+        ("cluster", ("info",)),
+        ("infobase", ("summary", "list")),
+    }
+
+    def __init__(self, pool: RASConnectionPool = None):
+        self.pool = pool or RASConnectionPool()
+
+    def supports(self, key: CommandKey) -> bool:
+        return (key.mode, key.command) in self.SUPPORTED_COMMANDS
+
+    def execute(self, key: CommandKey) -> List[RacRecord]:
+        """Выполнение команды через протокол RAS, результат в формате записей rac"""
+        host, _, port = key.endpoint.rpartition(":")
+        params = dict(key.params)
+
+        with self.pool.connection(host, int(port)) as conn:
+            if key.mode == "agent":
+                conn.authenticate_agent(params.get("agent-user", ""), params.get("agent-pwd", ""))
+                _, decoder = conn.request(proto.GET_AGENT_VERSION_REQUEST)
+                return [{"version": decoder.string()}]
+
+            if key.mode == "cluster" and key.command == ("list",):
+                _, decoder = conn.request(proto.GET_CLUSTERS_REQUEST)
+                return [proto.decode_cluster_info(decoder) for _ in range(decoder.size())]
+
+            cluster = params.get("cluster")
+            if not cluster:
+                raise RASProtocolError("Не указан параметр --cluster")
+            conn.authenticate_cluster(cluster, params.get("cluster-user", ""), params.get("cluster-pwd", ""))
+
+            if key.mode == "cluster":
+                _, decoder = conn.request(proto.GET_CLUSTER_INFO_REQUEST, Encoder().uuid(cluster).to_bytes())
+                return [proto.decode_cluster_info(decoder)]
+
+            _, decoder = conn.request(proto.GET_INFOBASES_SHORT_REQUEST, Encoder().uuid(cluster).to_bytes())
+            return [proto.decode_infobase_summary(decoder) for _ in range(decoder.size())]
+
+    def close(self):
+        self.pool.close_all()
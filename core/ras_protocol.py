@@ -0,0 +1,262 @@
+"""Кодек бинарного протокола сервера администрирования 1С (RAS)
+
+Формат восстановлен по открытым реализациям клиента RAS для протокола
+версии 10.0 (платформа 8.3.15+): пакеты «тип + размер + тело», размеры
+в кодировке переменной длины, целые числа в big-endian, строки в UTF-8.
+"""
+import struct
+import uuid
+from typing import Any, Dict, Tuple
+
+# Приветствие, отправляемое без заголовка пакета сразу после подключения
+NEGOTIATE_MAGIC = 475223888
+PROTOCOL_VERSION = 256
+NEGOTIATE_VERSION = 256
+
+SERVICE_NAME = "v8.service.Admin.Cluster"
+SERVICE_VERSION = "10.0"
+
+# Типы пакетов
+PACKET_CONNECT = 1
+PACKET_CONNECT_ACK = 2
+PACKET_DISCONNECT = 4
+PACKET_ENDPOINT_OPEN = 11
+PACKET_ENDPOINT_OPEN_ACK = 12
+PACKET_ENDPOINT_CLOSE = 13
+PACKET_ENDPOINT_MESSAGE = 14
+PACKET_ENDPOINT_FAILURE = 15
+PACKET_KEEP_ALIVE = 16
+
+# Виды сообщений конечной точки
+MESSAGE_VOID = 0
+MESSAGE = 1
+MESSAGE_EXCEPTION = 0xFF
+
+# Типы сообщений сервиса администрирования
+AUTHENTICATE_AGENT_REQUEST = 8
+AUTHENTICATE_REQUEST = 9
+GET_CLUSTERS_REQUEST = 11
+GET_CLUSTERS_RESPONSE = 12
+GET_CLUSTER_INFO_REQUEST = 13
+GET_CLUSTER_INFO_RESPONSE = 14
+GET_INFOBASES_SHORT_REQUEST = 42
+GET_INFOBASES_SHORT_RESPONSE = 43
+GET_AGENT_VERSION_REQUEST = 87
+GET_AGENT_VERSION_RESPONSE = 88
+
+# Коды типов значений в параметрах пакетов
+VALUE_BOOLEAN = 0x01
+VALUE_INT = 0x04
+VALUE_LONG = 0x05
+VALUE_STRING = 0x0A
+
+LOAD_BALANCING_MODES = {0: "performance", 1: "memory"}
+
+
+class RASProtocolError(Exception):
+    """Ошибка протокола RAS: соединение дальше использовать нельзя"""
+
+
+class RASServiceError(RASProtocolError):
+    """Сервис RAS ответил исключением: соединение остается рабочим"""
+
+
+class Encoder:
+    """Сериализация значений протокола RAS"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def bool(self, value: bool) -> "Encoder":
+        self.buffer.append(1 if value else 0)
+        return self
+
+    def byte(self, value: int) -> "Encoder":
+        self.buffer.append(value & 0xFF)
+        return self
+
+    def short(self, value: int) -> "Encoder":
+        self.buffer += struct.pack(">h", value)
+        return self
+
+    def int(self, value: int) -> "Encoder":
+        self.buffer += struct.pack(">i", value)
+        return self
+
+    def long(self, value: int) -> "Encoder":
+        self.buffer += struct.pack(">q", value)
+        return self
+
+    def size(self, value: int) -> "Encoder":
+        """Размер переменной длины: 6 бит в первом байте, далее по 7 бит"""
+        first = value & 0x3F
+        value >>= 6
+        if value:
+            first |= 0x40
+        self.buffer.append(first)
+        while value:
+            current = value & 0x7F
+            value >>= 7
+            if value:
+                current |= 0x80
+            self.buffer.append(current)
+        return self
+
+    def string(self, value: str) -> "Encoder":
+        data = (value or "").encode("utf-8")
+        self.size(len(data))
+        self.buffer += data
+        return self
+
+    def uuid(self, value) -> "Encoder":
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        self.buffer += value.bytes
+        return self
+
+    def typed_value(self, value: Any) -> "Encoder":
+        """Значение параметра с предшествующим кодом типа"""
+        if isinstance(value, bool):
+            return self.byte(VALUE_BOOLEAN).bool(value)
+        if isinstance(value, int):
+            return self.byte(VALUE_LONG).long(value)
+        return self.byte(VALUE_STRING).string(str(value))
+
+    def params(self, params: Dict[str, Any]) -> "Encoder":
+        self.size(len(params))
+        for name, value in params.items():
+            self.string(name)
+            self.typed_value(value)
+        return self
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.buffer)
+
+
+class Decoder:
+    """Разбор значений протокола RAS"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def _take(self, count: int) -> bytes:
+        if self.pos + count > len(self.data):
+            raise RASProtocolError("Неожиданный конец данных пакета RAS")
+        chunk = self.data[self.pos:self.pos + count]
+        self.pos += count
+        return chunk
+
+    def bool(self) -> bool:
+        return self._take(1)[0] != 0
+
+    def byte(self) -> int:
+        return self._take(1)[0]
+
+    def short(self) -> int:
+        return struct.unpack(">h", self._take(2))[0]
+
+    def int(self) -> int:
+        return struct.unpack(">i", self._take(4))[0]
+
+    def long(self) -> int:
+        return struct.unpack(">q", self._take(8))[0]
+
+    def size(self) -> int:
+        first = self.byte()
+        value = first & 0x3F
+        shift = 6
+        more = first & 0x40
+        while more:
+            current = self.byte()
+            value |= (current & 0x7F) << shift
+            shift += 7
+            more = current & 0x80
+        return value
+
+    def string(self) -> str:
+        return self._take(self.size()).decode("utf-8", errors="replace")
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(bytes=self._take(16))
+
+    def typed_value(self) -> Any:
+        value_type = self.byte()
+        if value_type == VALUE_BOOLEAN:
+            return self.bool()
+        if value_type == VALUE_INT:
+            return self.int()
+        if value_type == VALUE_LONG:
+            return self.long()
+        if value_type == VALUE_STRING:
+            return self.string()
+        raise RASProtocolError(f"Неизвестный тип значения RAS: {value_type}")
+
+    def params(self) -> Dict[str, Any]:
+        return {self.string(): self.typed_value() for _ in range(self.size())}
+
+    def remaining(self) -> int:
+        return len(self.data) - self.pos
+
+
+def encode_negotiate() -> bytes:
+    return struct.pack(">ihh", NEGOTIATE_MAGIC, PROTOCOL_VERSION, NEGOTIATE_VERSION)
+
+
+def encode_packet(packet_type: int, body: bytes) -> bytes:
+    return Encoder().byte(packet_type).size(len(body)).to_bytes() + body
+
+
+def encode_endpoint_message(endpoint_id: int, message_type: int, payload: bytes) -> bytes:
+    body = Encoder().size(endpoint_id).short(0).byte(MESSAGE).byte(message_type).to_bytes() + payload
+    return encode_packet(PACKET_ENDPOINT_MESSAGE, body)
+
+
+def decode_endpoint_message(body: bytes) -> Tuple[int, Decoder]:
+    """Разбор ответа конечной точки: (тип сообщения, декодер тела); VOID -> (-1, ...)"""
+    decoder = Decoder(body)
+    decoder.size()  # идентификатор конечной точки
+    decoder.short()  # формат
+    kind = decoder.byte()
+    if kind == MESSAGE_VOID:
+        return -1, decoder
+    if kind == MESSAGE_EXCEPTION:
+        decoder.string()  # класс исключения
+        raise RASServiceError(decoder.string())
+    if kind != MESSAGE:
+        raise RASProtocolError(f"Неизвестный вид сообщения RAS: {kind}")
+    return decoder.byte(), decoder
+
+
+def decode_cluster_info(decoder: Decoder) -> Dict[str, Any]:
+    """Описание кластера в полях, совпадающих с выводом rac cluster list"""
+    record = {"cluster": decoder.uuid(), "expiration-timeout": decoder.int(), "host": decoder.string(),
+              "lifetime-limit": decoder.int(), "port": decoder.short(), "max-memory-size": decoder.int(),
+              "max-memory-time-limit": decoder.int(), "name": decoder.string(),
+              "security-level": decoder.int(), "session-fault-tolerance-level": decoder.int()}
+    mode = decoder.int()
+    record["load-balancing-mode"] = LOAD_BALANCING_MODES.get(mode, mode)
+    record["errors-count-threshold"] = decoder.int()
+    record["kill-problem-processes"] = decoder.bool()
+    record["kill-by-memory-with-dump"] = decoder.bool()
+    return record
+
+
+def encode_cluster_info(encoder: Encoder, record: Dict[str, Any]) -> Encoder:
+    """Обратное преобразование, используется заглушкой RAS при подготовке записей обмена"""
+    modes = {name: code for code, name in LOAD_BALANCING_MODES.items()}
+    (encoder.uuid(record["cluster"]).int(record.get("expiration-timeout", 0)).string(record.get("host", ""))
+     .int(record.get("lifetime-limit", 0)).short(record.get("port", 1541)).int(record.get("max-memory-size", 0))
+     .int(record.get("max-memory-time-limit", 0)).string(record.get("name", ""))
+     .int(record.get("security-level", 0)).int(record.get("session-fault-tolerance-level", 0))
+     .int(modes.get(record.get("load-balancing-mode"), 0)).int(record.get("errors-count-threshold", 0))
+     .bool(record.get("kill-problem-processes", False)).bool(record.get("kill-by-memory-with-dump", False)))
+    return encoder
+
+
+def decode_infobase_summary(decoder: Decoder) -> Dict[str, Any]:
+    return {"infobase": decoder.uuid(), "descr": decoder.string(), "name": decoder.string()}
+
+
+def encode_infobase_summary(encoder: Encoder, record: Dict[str, Any]) -> Encoder:
+    return encoder.uuid(record["infobase"]).string(record.get("descr", "")).string(record.get("name", ""))
@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .rac_parser import RacRecord
+
+# Время жизни результатов по режимам (сек): справочные данные кластера меняются
+# редко, сеансы и блокировки — постоянно. 0 отключает кеширование режима
+DEFAULT_TTLS = {
+    "help": 300,
+    "agent": 30,
+    "cluster": 30,
+    "manager": 30,
+    "server": 30,
+    "service": 30,
+    "infobase": 15,
+    "rule": 15,
+    "profile": 15,
+    "counter": 15,
+    "limit": 15,
+    "process": 5,
+    "connection": 3,
+    "session": 3,
+    "lock": 2,
+}
+DEFAULT_TTL = 5
+
+# Последнее слово команды, по которому она считается только читающей
+READ_ONLY_COMMANDS = {"list", "info", "version"}
+
+# Слова команд, изменяющих состояние кластера
+MUTATING_COMMANDS = {"update", "remove", "terminate", "disconnect", "insert",
+                     "register", "create", "drop", "interrupt-current-server-call"}
+
+DEFAULT_ENDPOINT = "localhost:1545"
+
+
+class CommandKey(NamedTuple):
+    """Нормализованный вектор аргументов команды RAC"""
+    endpoint: str
+    mode: str
+    command: Tuple[str, ...]
+    params: Tuple[Tuple[str, object], ...]
+
+    @property
+    def cluster(self) -> Optional[str]:
+        for name, value in self.params:
+            if name == "cluster":
+                return str(value).lower()
+        return None
+
+
+def normalize_args(args: List[str]) -> Optional[CommandKey]:
+    """Разбор аргументов rac в ключ (host:port, режим, команда, параметры)"""
+    positional = []
+    params: Dict[str, object] = {}
+    for arg in args:
+        if arg.startswith("--"):
+            name, separator, value = arg[2:].partition("=")
+            params[name] = value.strip('"') if separator else True
+        else:
+            positional.append(arg)
+
+    endpoint = DEFAULT_ENDPOINT
+    if positional and ":" in positional[0]:
+        endpoint = positional.pop(0).lower()
+
+    if not positional:
+        return None
+
+    return CommandKey(endpoint, positional[0], tuple(positional[1:]), tuple(sorted(params.items())))
+
+
+def is_read_only(key: CommandKey) -> bool:
+    return bool(key.command) and key.command[-1] in READ_ONLY_COMMANDS
+
+
+def is_mutating(key: CommandKey) -> bool:
+    return any(word in MUTATING_COMMANDS for word in key.command)
+
+
+class ResultCache:
+    """LRU-кеш результатов читающих команд RAC с временем жизни по режимам
+
+    Изменяющая команда сбрасывает записи того же host:port, относящиеся
+    к тому же кластеру, а также записи без привязки к кластеру, и увеличивает
+    номер поколения этих записей. Читающая команда запоминает поколение до
+    запуска и передает его в put(): результат, полученный до изменения, но
+    завершившийся после него, в кеш не попадает.
+    """
+
+    def __init__(self, max_entries: int = 128, ttls: Dict[str, float] = None):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self._entries: "OrderedDict[CommandKey, Tuple[float, List[RacRecord]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Счетчики сбросов: по host:port в целом и по (host:port, кластер);
+        # кластер None — изменяющие команды без привязки к кластеру
+        self._endpoint_generations: Dict[str, int] = {}
+        self._cluster_generations: Dict[Tuple[str, Optional[str]], int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_ttl(self, mode: str) -> float:
+        return self.ttls.get(mode, DEFAULT_TTL)
+
+    def get(self, key: CommandKey) -> Optional[List[RacRecord]]:
+        """Получение результата из кеша, None если записи нет или она устарела"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, records = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Копии записей: вызывающий код может дополнять их своими полями
+        return [dict(record) for record in records]
+
+    def generation(self, key: CommandKey) -> Tuple[int, ...]:
+        """Поколение записи key: меняется при каждом сбросе, который ее затрагивает"""
+        with self._lock:
+            return self._generation(key)
+
+    def _generation(self, key: CommandKey) -> Tuple[int, ...]:
+        cluster = key.cluster
+        if cluster is None:
+            return (self._endpoint_generations.get(key.endpoint, 0),)
+        return (self._cluster_generations.get((key.endpoint, None), 0),
+                self._cluster_generations.get((key.endpoint, cluster), 0))
+
+    def put(self, key: CommandKey, records: List[RacRecord], generation: Tuple[int, ...] = None):
+        """Сохранение результата читающей команды
+
+        generation — поколение, полученное до запуска команды: если с тех пор
+        выполнилась изменяющая команда, результат мог устареть и не сохраняется.
+        """
+        ttl = self.get_ttl(key.mode)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generation(key):
+                return
+            self._entries[key] = (time.monotonic() + ttl, [dict(record) for record in records])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: CommandKey) -> int:
+        """Сброс записей, которые могла изменить команда key"""
+        cluster = key.cluster
+        with self._lock:
+            self._endpoint_generations[key.endpoint] = self._endpoint_generations.get(key.endpoint, 0) + 1
+            generation_key = (key.endpoint, cluster)
+            self._cluster_generations[generation_key] = self._cluster_generations.get(generation_key, 0) + 1
+            stale = [
+                cached for cached in self._entries
+                if cached.endpoint == key.endpoint
+                and (cluster is None or cached.cluster is None or cached.cluster == cluster)
+            ]
+            for cached in stale:
+                del self._entries[cached]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
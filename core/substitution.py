@@ -0,0 +1,201 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple, Union
+
+VARIABLE_RE = re.compile(r'\$\(([^)]+)\)')
+VARIABLE_MARKER = "$("
+
+# Число подставленных строк в кеше; при переполнении кеш очищается целиком
+MAX_CACHED_RESULTS = 10000
+
+
+class SubstitutionError(ValueError):
+    """Циклическая ссылка между переменными"""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__("Циклическая ссылка переменных: " + " → ".join(f"$({name})" for name in cycle))
+
+
+class Reference(NamedTuple):
+    """Ссылка на переменную в шаблоне"""
+    name: str
+    text: str  # исходная запись $(имя), остающаяся при неизвестной переменной
+
+
+Token = Union[str, Reference]
+
+
+class Template(NamedTuple):
+    """Разобранная строка: литералы и ссылки на переменные"""
+    tokens: Tuple[Token, ...]
+    names: FrozenSet[str]
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text: str) -> Template:
+    """Разбор строки в последовательность литералов и ссылок (результат кешируется)"""
+    tokens: List[Token] = []
+    position = 0
+    for match in VARIABLE_RE.finditer(text):
+        if match.start() > position:
+            tokens.append(text[position:match.start()])
+        tokens.append(Reference(match.group(1), match.group(0)))
+        position = match.end()
+    if position < len(text):
+        tokens.append(text[position:])
+    return Template(tuple(tokens), frozenset(token.name for token in tokens if isinstance(token, Reference)))
+
+
+def quote_value(value: str) -> str:
+    """Значение с пробелами обрамляется кавычками, если еще не обрамлено"""
+    if ' ' in value and not (value.startswith('"') and value.endswith('"')):
+        return f'"{value}"'
+    return value
+
+
+class SubstitutionEngine:
+    """Подстановка переменных $(имя) с вложенными ссылками и кешем результатов
+
+    Значение переменной может ссылаться на другие переменные; раскрытые
+    значения и подставленные строки кешируются. Для каждой переменной
+    хранится список зависящих от нее переменных и строк, поэтому изменение
+    переменной сбрасывает только затронутые записи кеша. Ссылка, входящая
+    в цикл, и ссылка на неизвестную переменную остаются в тексте как есть.
+    """
+
+    def __init__(self, lookup: Callable[[str], Optional[str]]):
+        self.lookup = lookup
+        self._lock = threading.RLock()
+        # Раскрытые значения переменных; None — переменная неизвестна или входит в цикл
+        self._values: Dict[str, Optional[str]] = {}
+        # Подставленные строки
+        self._results: Dict[str, str] = {}
+        # Обратные зависимости: переменная -> переменные и строки, которые на нее ссылаются
+        self._dependent_names: Dict[str, Set[str]] = {}
+        self._dependent_texts: Dict[str, Set[str]] = {}
+
+    def substitute(self, text: str) -> str:
+        """Подстановка переменных в текст с автоматическим обрамлением значений с пробелами"""
+        if not text or VARIABLE_MARKER not in text:
+            return text
+        result = self._results.get(text)
+        if result is not None:
+            return result
+
+        with self._lock:
+            template = compile_template(text)
+            parts = []
+            for token in template.tokens:
+                if isinstance(token, str):
+                    parts.append(token)
+                    continue
+                value = self._expand(token.name, ())
+                parts.append(token.text if value is None else quote_value(value))
+
+            result = "".join(parts)
+            if len(self._results) >= MAX_CACHED_RESULTS:
+                self._results.clear()
+                self._dependent_texts.clear()
+            self._results[text] = result
+            for name in template.names:
+                self._dependent_texts.setdefault(name, set()).add(text)
+            return result
+
+    def expand(self, name: str) -> Optional[str]:
+        """Полностью раскрытое значение переменной (None — неизвестна или входит в цикл)"""
+        with self._lock:
+            return self._expand(name, ())
+
+    def _expand(self, name: str, stack: Tuple[str, ...]) -> Optional[str]:
+        if name in self._values:
+            return self._values[name]
+        if name in stack:
+            raise SubstitutionError(list(stack[stack.index(name):]) + [name])
+
+        raw = self.lookup(name)
+        if raw is None or VARIABLE_MARKER not in raw:
+            self._values[name] = raw
+            return raw
+
+        template = compile_template(raw)
+        for dependency in template.names:
+            self._dependent_names.setdefault(dependency, set()).add(name)
+
+        parts = []
+        for token in template.tokens:
+            if isinstance(token, str):
+                parts.append(token)
+                continue
+            try:
+                value = self._expand(token.name, stack + (name,))
+            except SubstitutionError as e:
+                if name in e.cycle:
+                    if e.cycle[0] != name:
+                        raise  # Цикл замыкается на переменной выше по стеку
+                    # Переменные, входящие в цикл, не подставляются
+                    for cycle_name in e.cycle:
+                        self._values[cycle_name] = None
+                    return None
+                value = None
+            parts.append(token.text if value is None else value)
+
+        value = "".join(parts)
+        self._values[name] = value
+        return value
+
+    def find_cycle(self, name: str, value: str) -> Optional[List[str]]:
+        """Цикл ссылок, который образуется, если переменной name присвоить value"""
+        def lookup(other: str) -> Optional[str]:
+            return value if other == name else self.lookup(other)
+
+        path: List[str] = []
+        visiting: Set[str] = set()
+        done: Set[str] = set()
+
+        def visit(current: str) -> Optional[List[str]]:
+            if current in visiting:
+                return path[path.index(current):] + [current]
+            if current in done:
+                return None
+            raw = lookup(current)
+            if raw is None or VARIABLE_MARKER not in raw:
+                done.add(current)
+                return None
+            visiting.add(current)
+            path.append(current)
+            for dependency in sorted(compile_template(raw).names):
+                cycle = visit(dependency)
+                if cycle:
+                    return cycle
+            path.pop()
+            visiting.discard(current)
+            done.add(current)
+            return None
+
+        return visit(name)
+
+    def invalidate(self, name: str):
+        """Сброс кеша после изменения переменной name и всего, что от нее зависит"""
+        with self._lock:
+            pending = [name]
+            affected: Set[str] = set()
+            while pending:
+                current = pending.pop()
+                if current in affected:
+                    continue
+                affected.add(current)
+                pending.extend(self._dependent_names.pop(current, ()))
+
+            for current in affected:
+                self._values.pop(current, None)
+                for text in self._dependent_texts.pop(current, ()):
+                    self._results.pop(text, None)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._results.clear()
+            self._dependent_names.clear()
+            self._dependent_texts.clear()
@@ -0,0 +1,96 @@
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+
+# Длина n-грамм индекса; более короткие запросы проверяются перебором
+GRAM_SIZE = 3
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[start:start + GRAM_SIZE] for start in range(len(text) - GRAM_SIZE + 1)}
+
+
+class TextIndex:
+    """Поиск ключей по подстроке текста без учета регистра
+
+    Длинный запрос ищется пересечением множеств ключей по его триграммам
+    с проверкой кандидатов, короткий — перебором. Результат последнего
+    запроса запоминается: при наборе следующего символа поиск идет только
+    среди уже найденных ключей. Изменения текстов применяются к индексу
+    по одному ключу и откладываются до первого поиска, которому он нужен.
+    """
+
+    def __init__(self, items: Iterable[Tuple[Hashable, str]] = ()):
+        self._texts: Dict[Hashable, str] = {}
+        # Тексты, уже разложенные на триграммы, и ключи, ожидающие разложения
+        self._indexed: Dict[Hashable, str] = {}
+        self._pending: Set[Hashable] = set()
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._last: Optional[Tuple[str, Set[Hashable]]] = None
+        for key, text in items:
+            self.update(key, text)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._texts
+
+    def update(self, key: Hashable, text: str):
+        """Добавление или замена текста ключа"""
+        text = text.casefold()
+        if self._texts.get(key) == text:
+            return
+        self._texts[key] = text
+        self._pending.add(key)
+        self._last = None
+
+    def remove(self, key: Hashable):
+        if self._texts.pop(key, None) is None:
+            return
+        self._pending.add(key)
+        self._last = None
+
+    def clear(self):
+        self._texts.clear()
+        self._indexed.clear()
+        self._pending.clear()
+        self._postings.clear()
+        self._last = None
+
+    def _sync(self):
+        """Применение отложенных изменений к триграммам"""
+        for key in self._pending:
+            old = self._indexed.pop(key, None)
+            new = self._texts.get(key)
+            old_grams = _grams(old) if old is not None else set()
+            new_grams = _grams(new) if new is not None else set()
+            for gram in old_grams - new_grams:
+                keys = self._postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._postings[gram]
+            for gram in new_grams - old_grams:
+                self._postings.setdefault(gram, set()).add(key)
+            if new is not None:
+                self._indexed[key] = new
+        self._pending.clear()
+
+    def search(self, query: str) -> Set[Hashable]:
+        """Ключи, текст которых содержит query (пустой запрос — все ключи)"""
+        query = query.casefold()
+        if not query:
+            return set(self._texts)
+
+        if self._last is not None and self._last[0] in query:
+            # Уточнение предыдущего запроса: кандидаты — его результат
+            candidates = self._last[1]
+        elif len(query) < GRAM_SIZE:
+            candidates = self._texts
+        else:
+            self._sync()
+            postings = sorted((self._postings.get(gram, set()) for gram in _grams(query)), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+
+        result = {key for key in candidates if query in self._texts[key]}
+        self._last = (query, result)
+        return set(result)
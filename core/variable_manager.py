@@ -1,9 +1,35 @@
+import atexit
 import json
 import os
 import re
-from typing import Dict, List, Optional, Tuple
+import shutil
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass, asdict
 
+from .profiling import traced
+from .substitution import SubstitutionEngine, SubstitutionError
+
+# Задержка записи файла переменных: изменения за это время сохраняются одной записью
+SAVE_DELAY = 0.5
+# Пауза перед повторной записью после ошибки сохранения
+SAVE_RETRY_DELAY = 5
+
+# Расширение копии файла переменных, который не удалось разобрать при загрузке
+BACKUP_SUFFIX = ".bak"
+
+# Ключ файла переменных, под которым хранятся профили
+PROFILES_KEY = "@profiles"
+
+# Зарезервированные переменные: значение по умолчанию и назначение
+RESERVED_VARIABLES = {
+    "rac_path": ("rac.exe", "Путь к утилите RAC (rac.exe)"),  # Будет перезаписано пользователем
+    "ras_service": ("1C:Enterprise 8.3 Remote Server", "Имя службы RAS"),
+    "default_host": ("localhost", "Хост по умолчанию для подключения"),
+    "default_port": ("1545", "Порт по умолчанию для подключения"),
+}
+
 
 @dataclass
 class Variable:
@@ -14,48 +40,77 @@ class Variable:
 
 
 class VariableManager:
-    """Менеджер для работы с переменными с поддержкой зарезервированных переменных"""
+    """Менеджер для работы с переменными с поддержкой зарезервированных переменных
 
-    def __init__(self, config_file: str = "config/variables.json"):
+    Переменные могут переопределяться в именованных профилях (prod, test, ...).
+    Значение ищется по слоям: активный профиль, глобальные переменные,
+    значения зарезервированных переменных по умолчанию. Переключение профиля
+    не перезаписывает файл, а у каждого профиля свой кеш подстановки.
+    """
+
+    def __init__(self, config_file: str = "config/variables.json", save_delay: float = SAVE_DELAY):
         self.config_file = config_file
+        self.save_delay = save_delay
         self.variables: Dict[str, Variable] = {}
+        self.profiles: Dict[str, Dict[str, Variable]] = {}
+        self.active_profile: Optional[str] = None
+        # Разобранные шаблоны и раскрытые значения с учетом вложенных ссылок, по профилям
+        self._engines: Dict[Optional[str], SubstitutionEngine] = {}
+        # Подписчики на изменение переменных: получают множество измененных имен
+        self._listeners: List[Callable[[Set[str]], None]] = []
+
+        # Отложенная запись: изменения помечают хранилище, таймер сохраняет их пачкой
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        # Содержимое файла на диске: запись без изменений пропускается
+        self._saved_text: Optional[str] = None
+        # Текст файла, прочитанный или записанный последним: база для применения внешних изменений
+        self._disk_text: Optional[str] = None
+        # Файл не удалось разобрать: он не перезаписывается значениями по умолчанию,
+        # а перед первой записью изменений сохраняется копия BACKUP_SUFFIX
+        self._load_failed = False
+
         self.load_variables()
         self.initialize_reserved_variables()
+        # Несохраненные изменения записываются при завершении процесса
+        atexit.register(self.flush)
+
+    @property
+    def engine(self) -> SubstitutionEngine:
+        """Движок подстановки активного профиля"""
+        return self._engine_for(self.active_profile)
+
+    def _engine_for(self, profile: Optional[str]) -> SubstitutionEngine:
+        engine = self._engines.get(profile)
+        if engine is None:
+            engine = self._engines.setdefault(profile, SubstitutionEngine(lambda name: self._lookup(profile, name)))
+        return engine
+
+    def _invalidate(self, name: str, profile: Optional[str] = None):
+        """Сброс кеша подстановки: глобальная переменная влияет на все профили"""
+        if profile is None:
+            for engine in list(self._engines.values()):
+                engine.invalidate(name)
+        elif profile in self._engines:
+            self._engines[profile].invalidate(name)
 
     def initialize_reserved_variables(self):
         """Инициализация зарезервированных переменных"""
-        reserved_vars = {
-            "rac_path": {
-                "value": "rac.exe",  # Будет перезаписано пользователем
-                "comment": "Путь к утилите RAC (rac.exe)",
-                "reserved": True
-            },
-            "ras_service": {
-                "value": "1C:Enterprise 8.3 Remote Server",
-                "comment": "Имя службы RAS",
-                "reserved": True
-            },
-            "default_host": {
-                "value": "localhost",  # Значение по умолчанию
-                "comment": "Хост по умолчанию для подключения",
-                "reserved": True
-            },
-            "default_port": {
-                "value": "1545",  # Значение по умолчанию
-                "comment": "Порт по умолчанию для подключения",
-                "reserved": True
-            }
-        }
-
-        for name, config in reserved_vars.items():
+        for name, (value, comment) in RESERVED_VARIABLES.items():
             if name not in self.variables:
                 self.variables[name] = Variable(
                     name=name,
-                    value=config["value"],
-                    comment=config["comment"],
-                    reserved=config["reserved"]
+                    value=value,
+                    comment=comment,
+                    reserved=True
                 )
+                self._invalidate(name)
 
+        if self._load_failed:
+            return
+        # Файл перезаписывается только если добавлены недостающие переменные
         self.save_variables()
 
     def load_variables(self):
@@ -63,95 +118,301 @@ class VariableManager:
         try:
             if os.path.exists(self.config_file):
                 with open(self.config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.variables = {
-                        name: Variable(**var_data)
-                        for name, var_data in data.items()
-                    }
+                    text = f.read()
+                self.variables, self.profiles = parse_variables(text)
+                if self.active_profile not in self.profiles:
+                    self.active_profile = None
+                self._saved_text = self._serialize()
+                self._disk_text = text
+                self._engines.clear()
+                self._load_failed = False
         except Exception as e:
             print(f"Ошибка загрузки переменных: {e}")
             self.variables = {}
+            self.profiles = {}
+            self._load_failed = True
+
+    def reload_from_disk(self) -> Set[str]:
+        """Применение внешних изменений файла переменных; возвращает имена измененных переменных
+
+        Сравнивается версия файла, прочитанная или записанная последней, с текущей:
+        применяются только записи, измененные на диске, поэтому несохраненные
+        локальные правки других переменных не теряются. Собственная запись
+        (содержимое совпадает с последним сохраненным) пропускается.
+        """
+        with self._write_lock:
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    text = f.read()
+            except FileNotFoundError:
+                return set()
+            except OSError as e:
+                print(f"Ошибка чтения переменных: {e}")
+                return set()
+            if text == self._disk_text:
+                return set()
+            try:
+                variables, profiles = parse_variables(text)
+                base_variables, base_profiles = parse_variables(self._disk_text or "{}")
+            except Exception as e:
+                # Файл мог быть прочитан в момент записи другим процессом: повтор при следующем изменении
+                print(f"Ошибка загрузки переменных: {e}")
+                return set()
+
+            changed: Set[str] = set()
+            with self._lock:
+                for name in _changed_names(base_variables, variables):
+                    if name in variables:
+                        self.variables[name] = variables[name]
+                    else:
+                        self.variables.pop(name, None)
+                    self._invalidate(name)
+                    changed.add(name)
+
+                for profile in set(base_profiles) | set(profiles):
+                    if profile not in profiles:
+                        removed = self.profiles.pop(profile, {})
+                        self._engines.pop(profile, None)
+                        if profile == self.active_profile:
+                            self.active_profile = None
+                        changed.update(removed)
+                        continue
+                    overrides = self.profiles.setdefault(profile, {})
+                    for name in _changed_names(base_profiles.get(profile, {}), profiles[profile]):
+                        if name in profiles[profile]:
+                            overrides[name] = profiles[profile][name]
+                        else:
+                            overrides.pop(name, None)
+                        self._invalidate(name, profile)
+                        changed.add(name)
+                self._saved_text = serialize_variables(variables, profiles)
+                self._disk_text = text
+                self._load_failed = False
+
+        # Зарезервированная переменная, удаленная из файла, восстанавливается
+        if any(name not in self.variables for name in RESERVED_VARIABLES):
+            self.initialize_reserved_variables()
+        self._notify(changed)
+        return changed
+
+    def _serialize(self) -> str:
+        return serialize_variables(self.variables, self.profiles)
 
     def save_variables(self):
-        """Сохранение переменных в файл"""
-        try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(
-                    {name: asdict(var) for name, var in self.variables.items()},
-                    f,
-                    ensure_ascii=False,
-                    indent=2
+        """Отложенное сохранение переменных: запись выполняется через save_delay секунд"""
+        with self._lock:
+            self._dirty = True
+            if self.save_delay > 0:
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(self.save_delay, self.flush)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """Немедленная запись несохраненных изменений в файл"""
+        with self._write_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                text = self._serialize()
+                if text == self._saved_text:
+                    return
+
+            try:
+                if self._load_failed:
+                    # Копия неразобранного файла снимается до первой перезаписи
+                    backup = self.config_file + BACKUP_SUFFIX
+                    if os.path.exists(self.config_file):
+                        shutil.copyfile(self.config_file, backup)
+                        print(f"Файл переменных не удалось разобрать, сохранена копия: {backup}")
+                    self._load_failed = False
+                write_atomic(self.config_file, text)
+                self._saved_text = text
+                # Уведомление наблюдателя о собственной записи сверяется с этим текстом
+                self._disk_text = text
+            except OSError as e:
+                print(f"Ошибка сохранения переменных: {e}")
+                # Изменения остаются несохраненными: повторная запись по таймеру или при следующем flush
+                with self._lock:
+                    self._dirty = True
+                    if self.save_delay > 0 and self._save_timer is None:
+                        self._save_timer = threading.Timer(max(self.save_delay, SAVE_RETRY_DELAY), self.flush)
+                        self._save_timer.daemon = True
+                        self._save_timer.start()
+
+    def add_listener(self, listener: Callable[[Set[str]], None]):
+        """Подписка на изменение значений переменных (в том числе при смене профиля)"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Set[str]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, names: Set[str]):
+        if not names:
+            return
+        for listener in list(self._listeners):
+            try:
+                listener(names)
+            except Exception as e:
+                print(f"Ошибка обработчика изменения переменных: {e}")
+
+    def _target_profile(self, name: str, profile: Optional[str]) -> Optional[str]:
+        """Слой для записи: явно указанный профиль или активный, если он переопределяет переменную"""
+        if profile is not None:
+            return profile
+        if self.active_profile is not None and name in self.profiles.get(self.active_profile, {}):
+            return self.active_profile
+        return None
+
+    def set_variable(self, name: str, value: str, comment: str = "", reserved: bool = False,
+                     profile: Optional[str] = None):
+        """Установка переменной
+
+        Без profile значение записывается в активный профиль, если он переопределяет
+        переменную, иначе — в глобальные переменные.
+        """
+        with self._lock:
+            target = self._target_profile(name, profile)
+            if target is not None:
+                variables = self.profiles.setdefault(target, {})
+                existing = variables.get(name) or self.variables.get(name)
+                variables[name] = Variable(
+                    name=name,
+                    value=value,
+                    comment=comment or (existing.comment if existing else ""),
+                    reserved=bool(existing and existing.reserved)
                 )
-        except Exception as e:
-            print(f"Ошибка сохранения переменных: {e}")
-
-    def set_variable(self, name: str, value: str, comment: str = "", reserved: bool = False):
-        """Установка переменной"""
-        # Для зарезервированных переменных обновляем только значение
-        if name in self.variables and self.variables[name].reserved:
-            self.variables[name].value = value
-        else:
-            self.variables[name] = Variable(
-                name=name,
-                value=value,
-                comment=comment,
-                reserved=reserved
-            )
+            # Для зарезервированных переменных обновляем только значение
+            elif name in self.variables and self.variables[name].reserved:
+                self.variables[name].value = value
+            else:
+                self.variables[name] = Variable(
+                    name=name,
+                    value=value,
+                    comment=comment,
+                    reserved=reserved
+                )
+            self._invalidate(name, target)
         self.save_variables()
+        self._notify({name})
 
     def get_variable(self, name: str) -> Optional[str]:
-        """Получение значения переменной"""
+        """Получение значения переменной с учетом активного профиля"""
+        return self._lookup(self.active_profile, name)
+
+    def _lookup(self, profile: Optional[str], name: str) -> Optional[str]:
+        """Поиск по слоям: профиль, глобальные переменные, значения по умолчанию"""
+        if profile is not None:
+            var = self.profiles.get(profile, {}).get(name)
+            if var is not None:
+                return var.value
         var = self.variables.get(name)
-        return var.value if var else None
+        if var is not None:
+            return var.value
+        default = RESERVED_VARIABLES.get(name)
+        return default[0] if default else None
 
     def get_variable_with_comment(self, name: str) -> Optional[Variable]:
         """Получение переменной с комментарием"""
+        if self.active_profile is not None:
+            var = self.profiles.get(self.active_profile, {}).get(name)
+            if var is not None:
+                return var
         return self.variables.get(name)
 
-    def remove_variable(self, name: str):
-        """Удаление переменной (нельзя удалять зарезервированные)"""
-        var = self.variables.get(name)
-        if var and not var.reserved:
-            del self.variables[name]
-            self.save_variables()
-            return True
-        return False
+    def remove_variable(self, name: str, profile: Optional[str] = None):
+        """Удаление переменной (нельзя удалять зарезервированные)
+
+        Переопределение в профиле удаляется всегда: переменная снова берется из глобальных.
+        """
+        with self._lock:
+            target = self._target_profile(name, profile)
+            if target is not None:
+                if self.profiles.get(target, {}).pop(name, None) is None:
+                    return False
+            else:
+                var = self.variables.get(name)
+                if not var or var.reserved:
+                    return False
+                del self.variables[name]
+            self._invalidate(name, target)
+        self.save_variables()
+        self._notify({name})
+        return True
+
+    def is_overridden(self, name: str) -> bool:
+        """Переопределена ли переменная в активном профиле"""
+        return self.active_profile is not None and name in self.profiles.get(self.active_profile, {})
+
+    def get_profiles(self) -> List[str]:
+        """Имена профилей переменных"""
+        return sorted(self.profiles)
+
+    def create_profile(self, name: str, copy_from: Optional[str] = None):
+        """Создание профиля (пустого или копии существующего)"""
+        with self._lock:
+            source = self.profiles.get(copy_from, {}) if copy_from else {}
+            self.profiles[name] = {var_name: Variable(**asdict(var)) for var_name, var in source.items()}
+            self._engines.pop(name, None)
+        self.save_variables()
+
+    def delete_profile(self, name: str) -> bool:
+        with self._lock:
+            variables = self.profiles.pop(name, None)
+            if variables is None:
+                return False
+            self._engines.pop(name, None)
+            was_active = self.active_profile == name
+            if was_active:
+                self.active_profile = None
+        self.save_variables()
+        if was_active:
+            self._notify(set(variables))
+        return True
+
+    def set_active_profile(self, name: Optional[str]):
+        """Переключение профиля: без записи файла, кеш подстановки профиля сохраняется"""
+        if name is not None and name not in self.profiles:
+            raise KeyError(f"Профиль переменных не найден: {name}")
+        if name == self.active_profile:
+            return
+        changed = set(self.profiles.get(self.active_profile, {})) | set(self.profiles.get(name, {}))
+        self.active_profile = name
+        self._notify(changed)
+
+    def _effective_variables(self) -> List[Variable]:
+        """Переменные с учетом активного профиля"""
+        overrides = self.profiles.get(self.active_profile, {}) if self.active_profile else {}
+        result = [overrides.get(name, var) for name, var in self.variables.items()]
+        result.extend(var for name, var in overrides.items() if name not in self.variables)
+        return result
 
     def get_all_variables(self) -> List[Variable]:
         """Получение всех переменных"""
-        return list(self.variables.values())
+        return self._effective_variables()
 
     def get_reserved_variables(self) -> List[Variable]:
         """Получение зарезервированных переменных"""
-        return [var for var in self.variables.values() if var.reserved]
+        return [var for var in self._effective_variables() if var.reserved]
 
     def get_user_variables(self) -> List[Variable]:
         """Получение пользовательских переменных"""
-        return [var for var in self.variables.values() if not var.reserved]
+        return [var for var in self._effective_variables() if not var.reserved]
 
+    @traced("substitute_variables", "variables")
     def substitute_variables(self, text: str) -> str:
         """Подстановка переменных в текст используя синтаксис $(variable_name)
-        Автоматически обрамляет в кавычки значения с пробелами"""
-        if not text:
-            return text
-
-        def replace_match(match):
-            var_name = match.group(1)
-            value = self.get_variable(var_name)
-
-            if value is None:
-                return match.group(0)  # Оставляем как есть, если переменная не найдена
-
-            # Если значение содержит пробелы, обрамляем в кавычки
-            if ' ' in value and not (value.startswith('"') and value.endswith('"')):
-                return f'"{value}"'
-            else:
-                return value
-
-        # Регулярное выражение для поиска $(variable_name)
-        pattern = r'\$\(([^)]+)\)'
-        return re.sub(pattern, replace_match, text)
+        Автоматически обрамляет в кавычки значения с пробелами.
+        Значения переменных могут ссылаться на другие переменные."""
+        return self.engine.substitute(text)
 
     def validate_variable_name(self, name: str) -> Tuple[bool, str]:
         """Валидация имени переменной"""
@@ -165,4 +426,72 @@ class VariableManager:
         if existing_var and existing_var.reserved:
             return False, f"Имя '{name}' зарезервировано системой"
 
-        return True, ""
\ No newline at end of file
+        return True, ""
+
+    def validate_variable_value(self, name: str, value: str) -> Tuple[bool, str]:
+        """Проверка значения на циклические ссылки между переменными"""
+        cycle = self.engine.find_cycle(name, value)
+        if cycle:
+            return False, str(SubstitutionError(cycle))
+        return True, ""
+
+    def validate_profile_name(self, name: str) -> Tuple[bool, str]:
+        """Валидация имени профиля"""
+        if not name:
+            return False, "Имя профиля не может быть пустым"
+        if name.startswith("@"):
+            return False, "Имя профиля не может начинаться с @"
+        if name in self.profiles:
+            return False, f"Профиль '{name}' уже существует"
+        return True, ""
+
+
+def parse_variables(text: str) -> Tuple[Dict[str, Variable], Dict[str, Dict[str, Variable]]]:
+    """Разбор файла переменных: глобальные переменные и профили"""
+    data = json.loads(text)
+    profiles = data.pop(PROFILES_KEY, {})
+    variables = {name: Variable(**var_data) for name, var_data in data.items()}
+    return variables, {
+        profile: {name: Variable(**var_data) for name, var_data in overrides.items()}
+        for profile, overrides in profiles.items()
+    }
+
+
+def serialize_variables(variables: Dict[str, Variable], profiles: Dict[str, Dict[str, Variable]]) -> str:
+    data = {name: asdict(var) for name, var in variables.items()}
+    if profiles:
+        data[PROFILES_KEY] = {
+            profile: {name: asdict(var) for name, var in overrides.items()}
+            for profile, overrides in profiles.items()
+        }
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        indent=2
+    )
+
+
+def _changed_names(old: Dict[str, Variable], new: Dict[str, Variable]) -> Set[str]:
+    return {name for name in old.keys() | new.keys() if old.get(name) != new.get(name)}
+
+
+def write_atomic(path: str, text: str):
+    """Атомарная запись: временный файл в том же каталоге, fsync и замена
+
+    При сбое во время записи на диске остается прежняя версия файла.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".variables_", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
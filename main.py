@@ -1,12 +1,26 @@
 import sys
 import os
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QDir
-from PyQt6.QtGui import QFont
 
-from ui.main_window import MainWindow
+
+def enable_profiling(arguments):
+    """Флаг --profile[=trace,cprofile,tracemalloc] включает профилирование сеанса"""
+    for argument in list(arguments):
+        if argument == "--profile" or argument.startswith("--profile="):
+            arguments.remove(argument)
+            os.environ["RAC_ADMIN_PROFILE"] = argument.partition("=")[2] or "trace"
+    if os.environ.get("RAC_ADMIN_PROFILE"):
+        from core.profiling import PROFILER
+        PROFILER.start()
+
 
 def main():
+    # Импорт Qt только для графического режима: --cli работает без PyQt6
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QDir
+    from PyQt6.QtGui import QFont
+
+    from ui.main_window import MainWindow
+
     # Создание приложения
     app = QApplication(sys.argv)
     
@@ -22,4 +36,12 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Профилирование включается до импорта модулей: без него traced() не оборачивает функции
+    enable_profiling(sys.argv)
+    if "--cli" in sys.argv[1:]:
+        from core.cli import main as cli_main
+
+        arguments = sys.argv[1:]
+        arguments.remove("--cli")
+        sys.exit(cli_main(arguments))
     main()
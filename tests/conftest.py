@@ -0,0 +1,55 @@
+import logging
+import os
+import sys
+
+import pytest
+
+# Тесты запускаются из корня проекта: python -m pytest tests
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.command_executor import RACCommandExecutor  # noqa: E402
+from core.logger import RACLogger  # noqa: E402
+from core.variable_manager import VariableManager  # noqa: E402
+
+FAKE_RAC = os.path.join(ROOT, "tools", "fake_rac.py")
+
+# Эмулятор запускается как исполняемый скрипт
+needs_fake_rac = pytest.mark.skipif(sys.platform == "win32", reason="нужен запуск tools/fake_rac.py по shebang")
+
+
+class ListHandler(logging.Handler):
+    """Сообщения журнала в списке для проверок"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def logger(tmp_path):
+    logger = RACLogger(log_dir=str(tmp_path / "logs"), console=False)
+    logger.messages = ListHandler()
+    logger.add_handler(logger.messages)
+    yield logger
+    logger.close()
+
+
+@pytest.fixture
+def variable_manager(tmp_path):
+    manager = VariableManager(str(tmp_path / "config" / "variables.json"))
+    yield manager
+    manager.flush()
+
+
+@pytest.fixture
+def executor(logger, variable_manager, monkeypatch):
+    monkeypatch.setenv("FAKE_RAC_SEED", "1")
+    monkeypatch.setenv("FAKE_RAC_LATENCY", "0")
+    monkeypatch.setenv("FAKE_RAC_ERROR_RATE", "0")
+    executor = RACCommandExecutor(logger, variable_manager, rac_path=FAKE_RAC)
+    yield executor
+    executor.close()
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from core.async_executor import AsyncCommandExecutor
+
+TIMEOUT = 5
+
+
+class BlockingExecutor:
+    """Исполнитель, команды которого ждут разрешения завершиться"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = []
+        self.release = {}
+
+    def gate(self, host: str) -> threading.Event:
+        with self.lock:
+            return self.release.setdefault(host, threading.Event())
+
+    def execute_command(self, args, cancel_token=None, on_records=None):
+        host = args[0]
+        with self.lock:
+            self.started.append(args)
+        self.gate(host).wait(TIMEOUT)
+        return True, args
+
+
+@pytest.fixture
+def fake():
+    return BlockingExecutor()
+
+
+@pytest.fixture
+def async_executor(fake):
+    executor = AsyncCommandExecutor(fake, max_concurrency=2, per_host_limit=1)
+    yield executor
+    for event in fake.release.values():
+        event.set()
+    executor.shutdown(wait=True)
+
+
+def test_saturated_host_does_not_block_other_hosts(fake, async_executor):
+    first = async_executor.submit(["a:1545", "cluster", "list"])
+    queued = async_executor.submit(["a:1545", "infobase", "summary", "list"])
+    other = async_executor.submit(["b:1545", "cluster", "list"])
+    # Вторая команда хоста a ждет в очереди хоста, а не в рабочем потоке
+    fake.gate("b:1545").set()
+    assert other.result(TIMEOUT) == (True, ["b:1545", "cluster", "list"])
+    assert not queued.done()
+    assert [args[0] for args in fake.started] == ["a:1545", "b:1545"]
+
+    fake.gate("a:1545").set()
+    assert first.result(TIMEOUT)[0]
+    assert queued.result(TIMEOUT) == (True, ["a:1545", "infobase", "summary", "list"])
+    assert async_executor.active_count() == 0
+
+
+def test_queued_command_is_cancelled_without_running(fake, async_executor):
+    results = []
+    first = async_executor.submit(["a:1545", "cluster", "list"])
+    queued = async_executor.submit(["a:1545", "session", "list"],
+                                   callback=lambda handle, success, output: results.append((success, output)))
+    queued.cancel()
+    assert queued.result() == (False, "Команда отменена")
+    assert results == [(False, "Команда отменена")]
+
+    fake.gate("a:1545").set()
+    first.result(TIMEOUT)
+    assert fake.started == [["a:1545", "cluster", "list"]]
+
+
+def test_host_slot_is_passed_to_next_queued_command(fake, async_executor):
+    fake.gate("a:1545").set()
+    handles = [async_executor.submit(["a:1545", "cluster", "list", str(i)]) for i in range(5)]
+    assert [handle.result(TIMEOUT)[0] for handle in handles] == [True] * 5
+    assert [args[-1] for args in fake.started] == ["0", "1", "2", "3", "4"]
+    assert async_executor._host_running == {}
@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+from tools.benchmarks import Benchmark, format_time, load_previous
+
+BENCHMARKS = os.path.join(ROOT, "tools", "benchmarks.py")
+
+
+def run_benchmarks(history, *args):
+    return subprocess.run([sys.executable, BENCHMARKS, "-k", "entity_search", "--repeat", "1",
+                           "--history", str(history), *args],
+                          capture_output=True, text=True, encoding="utf-8", timeout=120)
+
+
+def test_benchmark_measures_time_per_operation():
+    calls = []
+    result = Benchmark("calls", lambda: calls.append(1), number=10).run(repeat=3)
+    # Прогрев и три повтора по десять операций
+    assert len(calls) == 31
+    assert result["number"] == 10 and result["repeat"] == 3
+    assert 0 <= result["min"] <= result["median"]
+
+
+def test_format_time():
+    assert format_time(2.5e-6).strip() == "2.50 мкс"
+    assert format_time(0.0125).strip() == "12.50 мс"
+    assert format_time(3).strip() == "3.00 с"
+
+
+def test_load_previous_returns_last_entry(tmp_path):
+    history = tmp_path / "history.jsonl"
+    assert load_previous(str(history)) is None
+    history.write_text('{"revision": "a"}\n{"revision": "b"}\n\n', encoding="utf-8")
+    assert load_previous(str(history)) == {"revision": "b"}
+
+
+def test_results_are_compared_with_previous_run(tmp_path):
+    history = tmp_path / "history.jsonl"
+    first = run_benchmarks(history)
+    assert first.returncode == 0, first.stderr
+    entry = json.loads(history.read_text(encoding="utf-8"))
+    assert list(entry["results"]) == ["entity_search[5000 sessions]"]
+
+    # Порог -100%: любое время считается регрессией
+    second = run_benchmarks(history, "--no-save", "--threshold", "-1", "--fail-on-regression")
+    assert second.returncode == 1
+    assert "РЕГРЕССИЯ" in second.stdout
+    assert len(history.read_text(encoding="utf-8").splitlines()) == 1
@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+from conftest import FAKE_RAC, ROOT, needs_fake_rac
+from core.cli import parse_command, split_argv, write_records
+
+RECORDS = [{"cluster": uuid.UUID("6d6958e1-a96c-4999-a995-698a0298161e"), "name": "Кластер, главный", "port": 1541},
+           {"cluster": uuid.UUID("6d6958e1-a96c-4999-a995-698a0298161f"), "kill-problem-processes": True}]
+
+
+def run_cli(*args, tmp_path):
+    # Журнал пишется в logs/ текущего каталога, поэтому запуск — из временного
+    env = dict(os.environ, PYTHONPATH=ROOT, FAKE_RAC_SEED="1", FAKE_RAC_LATENCY="0", FAKE_RAC_ERROR_RATE="0")
+    return subprocess.run([sys.executable, "-m", "core", "--rac", FAKE_RAC,
+                           "--config", str(tmp_path / "config" / "variables.json"), *args],
+                          cwd=tmp_path, env=env, capture_output=True, text=True, encoding="utf-8", timeout=60)
+
+
+def test_split_argv_separates_tool_options_from_rac_command():
+    assert split_argv(["--host", "srv", "--format", "csv", "session", "list", "--cluster=c"]) == \
+           (["--host", "srv", "--format", "csv"], ["session", "list", "--cluster=c"])
+    assert split_argv(["--list-commands", "infobase"]) == (["--list-commands", "infobase"], [])
+    assert split_argv(["--list-commands", "--verbose"]) == (["--list-commands", "--verbose"], [])
+
+
+def test_parse_command():
+    assert parse_command(["infobase", "summary", "list", "--cluster=c", "--force"]) == \
+           ("infobase", "summary list", {"cluster": "c", "force": True})
+
+
+def test_write_records_csv_uses_all_columns():
+    stream = io.StringIO()
+    write_records(RECORDS, "csv", stream)
+    assert stream.getvalue().splitlines() == [
+        "cluster,name,port,kill-problem-processes",
+        '6d6958e1-a96c-4999-a995-698a0298161e,"Кластер, главный",1541,',
+        "6d6958e1-a96c-4999-a995-698a0298161f,,,yes",
+    ]
+
+
+def test_write_records_json():
+    stream = io.StringIO()
+    write_records(RECORDS[:1], "json", stream)
+    assert json.loads(stream.getvalue()) == [
+        {"cluster": "6d6958e1-a96c-4999-a995-698a0298161e", "name": "Кластер, главный", "port": 1541}]
+
+
+def test_cli_does_not_import_qt():
+    code = "import sys, core.cli; print(sorted(m for m in sys.modules if m.startswith('PyQt')))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.stdout.strip() == "[]", result.stderr
+
+
+@needs_fake_rac
+def test_cli_runs_command(tmp_path):
+    result = run_cli("cluster", "list", tmp_path=tmp_path)
+    assert result.returncode == 0, result.stderr
+    clusters = json.loads(result.stdout)
+    assert len(clusters) == 1 and "cluster" in clusters[0]
+
+
+@needs_fake_rac
+def test_cli_checks_required_parameters(tmp_path):
+    result = run_cli("session", "list", tmp_path=tmp_path)
+    assert result.returncode == 2
+    assert "cluster" in result.stderr
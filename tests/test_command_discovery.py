@@ -0,0 +1,116 @@
+import os
+
+from conftest import FAKE_RAC, needs_fake_rac
+from core.command_discovery import SchemaCache, merge_commands, parse_help
+from core.rac_commands import CommandParam, ParamType, RACCommands, RacCommand
+
+# Справка режима session в разметке настоящей rac: параметры кластера один раз в «Общих параметрах»
+SESSION_HELP = """\
+1С:Предприятие 8.3 (x86-64) (8.3.24.1342). Утилита администрирования кластера серверов
+
+rac [<адрес>[:<порт>]] session <команда> [<параметры команды>...]
+
+Общие параметры:
+
+    --version | -v
+        получение версии утилиты
+
+    --help | -h | -?
+        вывод краткой информации об утилите
+
+    --cluster=<uuid>
+        (обязательный) идентификатор кластера серверов
+
+    --cluster-user=<name>
+        имя администратора кластера
+
+    --cluster-pwd=<pwd>
+        пароль администратора кластера
+
+Команды:
+
+    info
+        получение информации о сеансе
+
+        --session=<uuid>
+            (обязательный) идентификатор сеанса информационной базы
+
+        --licenses
+            вывод информации о лицензиях, выданных сеансу
+
+    list
+        получение списка информации о сеансах
+
+        --infobase=<uuid>
+            идентификатор информационной базы
+"""
+
+
+def names(command: RacCommand):
+    return [param.name for param in command.parameters]
+
+
+def test_parse_help_adds_common_parameters_to_every_command():
+    commands = {command.command: command for command in parse_help("session", SESSION_HELP)}
+
+    assert list(commands) == ["info", "list"]
+    assert names(commands["info"]) == ["cluster", "cluster-user", "cluster-pwd", "session", "licenses"]
+    assert names(commands["list"]) == ["cluster", "cluster-user", "cluster-pwd", "infobase"]
+
+    cluster = commands["list"].parameters[0]
+    assert cluster.param_type == ParamType.UUID and cluster.required
+    assert cluster.description == "Идентификатор кластера серверов"
+    assert commands["info"].parameters[2].param_type == ParamType.PASSWORD
+    assert commands["info"].parameters[4].param_type == ParamType.BOOLEAN
+    assert commands["info"].description == "Получение информации о сеансе"
+
+
+def test_parse_help_ignores_utility_options():
+    commands = parse_help("session", SESSION_HELP)
+    assert all(param.name not in ("version", "help") for command in commands for param in command.parameters)
+
+
+def test_merge_keeps_catalog_parameters_missing_from_help():
+    known = [RacCommand("session", "list", "Список сеансов", [
+        CommandParam("cluster", ParamType.UUID, True, "Кластер"),
+        CommandParam("infobase", ParamType.UUID, False, "База"),
+        CommandParam("licenses", ParamType.BOOLEAN, False, "Лицензии"),
+    ])]
+    discovered = [RacCommand("session", "list", "", [
+        CommandParam("cluster", ParamType.UUID, True),
+        CommandParam("infobase", ParamType.UUID, True),
+        CommandParam("new-flag", ParamType.BOOLEAN),
+    ])]
+
+    merged = merge_commands(discovered, known)[0]
+
+    assert names(merged) == ["cluster", "infobase", "licenses", "new-flag"]
+    assert merged.description == "Список сеансов"
+    assert merged.parameters[0] is known[0].parameters[0]
+    # Обязательность — из справки, описание — из каталога
+    assert merged.parameters[1].required and merged.parameters[1].description == "База"
+
+
+@needs_fake_rac
+def test_discover_from_fake_rac_round_trips_builtin_catalog(tmp_path):
+    builtin = RACCommands.get_builtin_commands()
+    cache = SchemaCache(str(tmp_path))
+
+    catalog = cache.discover(FAKE_RAC, builtin)
+
+    for mode in builtin:
+        assert catalog[mode] == builtin[mode], mode
+    assert cache.load(FAKE_RAC) is not None
+
+
+@needs_fake_rac
+def test_catalog_from_previous_parser_is_not_used(tmp_path):
+    cache = SchemaCache(str(tmp_path))
+    cache.discover(FAKE_RAC, RACCommands.get_builtin_commands())
+    index_path = os.path.join(str(tmp_path), "index.json")
+    with open(index_path, encoding="utf-8") as f:
+        text = f.read()
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write(text.replace('"parser": 2', '"parser": 1'))
+
+    assert cache.load(FAKE_RAC) is None
@@ -0,0 +1,82 @@
+import uuid
+
+from conftest import needs_fake_rac
+from core.command_executor import CancelToken, RACCommandExecutor
+
+pytestmark = needs_fake_rac
+
+
+def test_stream_command_yields_typed_records(executor, monkeypatch):
+    monkeypatch.setenv("FAKE_RAC_SESSIONS", "50")
+    clusters = list(executor.stream_command(["cluster", "list"]))
+    assert len(clusters) == 1
+    assert isinstance(clusters[0]["cluster"], uuid.UUID)
+
+    cluster = str(clusters[0]["cluster"])
+    sessions = list(executor.stream_command(["session", "list", f"--cluster={cluster}"]))
+    assert len(sessions) == 50
+    assert all(isinstance(record["session-id"], int) for record in sessions)
+
+
+def test_records_are_delivered_in_batches_while_reading(executor, monkeypatch):
+    monkeypatch.setenv("FAKE_RAC_SESSIONS", "450")
+    monkeypatch.setattr("core.command_executor.RECORDS_BATCH_INTERVAL", 60)
+    success, clusters = executor.execute_command(["cluster", "list"])
+    assert success
+
+    batches = []
+    success, sessions = executor.execute_command(["session", "list", f"--cluster={clusters[0]['cluster']}"],
+                                                 on_records=batches.append)
+    assert success
+    assert [len(batch) for batch in batches] == [200, 200, 50]
+    assert [record for batch in batches for record in batch] == sessions
+
+
+def test_second_read_comes_from_cache(executor):
+    executor.execute_command(["cluster", "list"])
+    executor.execute_command(["cluster", "list"])
+    metrics = executor.metrics.snapshot()[("localhost:1545", "cluster", "list")]
+    assert metrics.sources == {"rac": 1, "cache": 1}
+    assert metrics.duration.count == 1
+
+
+def test_errors_are_returned_as_text(executor, monkeypatch):
+    monkeypatch.setenv("FAKE_RAC_ERROR_RATE", "1")
+    success, output = executor.execute_command(["cluster", "list"])
+    assert not success
+    assert "внесенная ошибка" in output
+    metrics = executor.metrics.snapshot()[("localhost:1545", "cluster", "list")]
+    assert metrics.outcomes["error"] == 1
+
+
+def test_cancelled_command_is_not_started(executor):
+    token = CancelToken()
+    token.cancel()
+    assert executor.execute_command(["cluster", "list"], token) == (False, "Команда отменена")
+    assert executor.metrics.snapshot()[("localhost:1545", "cluster", "list")].outcomes["cancelled"] == 1
+
+
+def test_missing_rac_is_reported(logger, variable_manager, tmp_path):
+    executor = RACCommandExecutor(logger, variable_manager, rac_path=str(tmp_path / "rac"))
+    try:
+        success, output = executor.execute_command(["cluster", "list"])
+    finally:
+        executor.close()
+    assert not success
+    assert output.startswith("Файл RAC не найден")
+
+
+def test_command_args_are_prefix_and_parameter_fragments(executor, variable_manager):
+    variable_manager.set_variable("cluster_user", "Иванов И.И.")
+    parameters = {"cluster": "c1", "cluster-user": "$(cluster_user)", "sessions-deny": True,
+                  "denied-message": "", "scheduled-jobs-deny": False}
+    args = executor.build_command_args("infobase", "update", parameters, "srv", "1545")
+    assert args == ["srv:1545", "infobase", "update", "--cluster=c1", '--cluster-user="Иванов И.И."',
+                    "--sessions-deny"]
+    # Предпросмотр собирается из тех же частей по отдельности
+    fragments = [executor.build_param_fragment(key, value) for key, value in parameters.items()]
+    assert args == executor.build_command_prefix("infobase", "update", "srv", "1545") + \
+        [fragment for fragment in fragments if fragment is not None]
+    assert executor.build_param_fragment("cluster-user", "$(cluster_user)", substitute=False) == \
+        "--cluster-user=$(cluster_user)"
+    assert executor.build_command_prefix("session", "list") == ["session", "list"]
@@ -0,0 +1,83 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from core.command_history import REDACTED, CommandHistory, redact_args
+from core.result_cache import normalize_args
+
+SESSION = uuid.UUID("0cd03fed-43c7-5e97-8364-8e91997f9d88")
+CLUSTER = "e4070c85-212a-5c09-a279-ba972a0e71c8"
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = CommandHistory(str(tmp_path / "history.db"))
+    yield history
+    history.close()
+
+
+def record(history, args, success=True, output=()):
+    history.record(args, normalize_args(args), time.time(), 0.1, success, list(output) if success else output, "rac")
+    assert history.flush()
+
+
+def test_redact_args_hides_passwords_but_keeps_variable_references():
+    args = ["infobase", "info", "--cluster-pwd=secret", "--infobase-pwd=$(ib_pwd)", "--PASSWORD=x", "--name=pwd"]
+    assert redact_args(args) == ["infobase", "info", f"--cluster-pwd={REDACTED}", "--infobase-pwd=$(ib_pwd)",
+                                 f"--PASSWORD={REDACTED}", "--name=pwd"]
+
+
+def test_passwords_are_not_stored(history):
+    record(history, ["srv:1545", "session", "list", f"--cluster={CLUSTER}", "--cluster-pwd=secret"])
+    entry, = history.search()
+    assert "secret" not in entry.command_line
+    assert f"--cluster-pwd={REDACTED}" in entry.args
+
+
+def test_search_by_uuid_finds_parameters_and_results(history):
+    record(history, ["srv:1545", "session", "list", f"--cluster={CLUSTER}"],
+           output=[{"session": SESSION, "user-name": "Иванов"}])
+    record(history, ["srv:1545", "session", "terminate", f"--cluster={CLUSTER}", f"--session={SESSION}"])
+    record(history, ["srv:1545", "cluster", "list"])
+
+    found = history.search(entity=str(SESSION).upper())
+    assert sorted(entry.command for entry in found) == ["list", "terminate"]
+    assert len(history.search(entity=CLUSTER)) == 2
+
+
+def test_search_filters_and_stored_records(history):
+    record(history, ["srv1:1545", "cluster", "list"], output=[{"cluster": uuid.UUID(CLUSTER), "name": "Кластер"}])
+    record(history, ["srv2:1545", "session", "list", f"--cluster={CLUSTER}"], success=False, output="нет доступа")
+
+    assert [entry.host for entry in history.search(host="srv1:1545")] == ["srv1:1545"]
+    failed, = history.search(failed_only=True)
+    assert failed.error == "нет доступа" and failed.mode == "session"
+    assert [entry.mode for entry in history.search(text="доступа")] == ["session"]
+
+    listed, = history.search(mode="cluster")
+    assert history.get_records(listed.id) == [{"cluster": uuid.UUID(CLUSTER), "name": "Кластер"}]
+    assert history.hosts() == ["srv1:1545", "srv2:1545"]
+
+
+def test_bad_record_does_not_stop_writer(history, capsys):
+    # Запись результата не словарь — вставка завершается ошибкой, не связанной с SQLite
+    history.record(["srv:1545", "cluster", "list"], None, time.time(), 0.1, True, ["не запись"], "rac")
+    record(history, ["srv:1545", "session", "list", f"--cluster={CLUSTER}"])
+    assert [entry.mode for entry in history.search()] == ["session"]
+    assert "Ошибка записи истории команд" in capsys.readouterr().out
+
+
+def test_notify_written_is_called_after_queued_records(history):
+    written = threading.Event()
+    history.record(["srv:1545", "cluster", "list"], None, time.time(), 0.1, True, [], "rac")
+    history.notify_written(written.set)
+    assert written.wait(5)
+    assert len(history.search()) == 1
+
+    # При остановленном потоке записи callback вызывается сразу
+    history.close()
+    called = []
+    history.notify_written(lambda: called.append(True))
+    assert called == [True]
@@ -0,0 +1,79 @@
+from conftest import needs_fake_rac
+from core.entity_index import Entity, EntityIndex, EntityPrefetcher, entity_from_record
+
+ENDPOINT = "srv:1545"
+
+
+def infobase(uuid: str, label: str, cluster: str = "c1") -> Entity:
+    return Entity("infobase", uuid, label, cluster)
+
+
+def test_update_reports_only_changes():
+    index = EntityIndex()
+    assert index.update(ENDPOINT, "infobase", "c1", [infobase("i1", "base1"), infobase("i2", "base2")]) == 2
+    assert index.update(ENDPOINT, "infobase", "c1", [infobase("i1", "base1"), infobase("i2", "base2")]) == 0
+    # Одна измененная и одна удаленная
+    assert index.update(ENDPOINT, "infobase", "c1", [infobase("i1", "Бухгалтерия")]) == 2
+    assert [entity.uuid for entity in index.search(ENDPOINT, "infobase", "")] == ["i1"]
+
+
+def test_update_of_one_cluster_keeps_other_clusters():
+    index = EntityIndex()
+    index.update(ENDPOINT, "infobase", "c1", [infobase("i1", "base", "c1")])
+    index.update(ENDPOINT, "infobase", "c2", [infobase("i2", "base", "c2")])
+    index.update(ENDPOINT, "infobase", "c1", [])
+    assert [entity.uuid for entity in index.search(ENDPOINT, "infobase", "base")] == ["i2"]
+
+
+def test_search_by_substring_of_label_or_uuid_in_label_order():
+    index = EntityIndex()
+    index.update(ENDPOINT, "infobase", "c1", [infobase("aaaa-1", "Склад"), infobase("bbbb-2", "Бухгалтерия"),
+                                              infobase("cccc-3", "бухгалтерия филиала")])
+    assert [entity.uuid for entity in index.search(ENDPOINT, "infobase", "БУХ")] == ["bbbb-2", "cccc-3"]
+    assert [entity.uuid for entity in index.search(ENDPOINT, "infobase", "aaaa")] == ["aaaa-1"]
+    assert len(index.search(ENDPOINT, "infobase", "", limit=2)) == 2
+    assert index.search("other:1545", "infobase", "") == []
+
+
+def test_search_filters_by_cluster():
+    index = EntityIndex()
+    index.update(ENDPOINT, "infobase", "c1", [infobase("i1", "base", "c1")])
+    index.update(ENDPOINT, "infobase", "c2", [infobase("i2", "base", "c2")])
+    assert [entity.uuid for entity in index.search(ENDPOINT, "infobase", "base", cluster="c2")] == ["i2"]
+
+
+def test_remove_cluster_drops_its_entities_and_load_times():
+    index = EntityIndex()
+    index.update(ENDPOINT, "cluster", "", [Entity("cluster", "c1", "Кластер")])
+    index.update(ENDPOINT, "infobase", "c1", [infobase("i1", "base")])
+    assert index.expires_in(ENDPOINT, "infobase", "c1") > 0
+
+    index.remove_cluster(ENDPOINT, "c1")
+
+    assert index.search(ENDPOINT, "infobase", "") == []
+    assert index.expires_in(ENDPOINT, "infobase", "c1") == 0
+
+
+def test_entity_from_record_builds_label_from_source_fields():
+    entity = entity_from_record("session", {"session": "s1", "user-name": "Иванов", "host": "ws-1",
+                                            "app-id": "", "session-id": 7}, "c1")
+    assert entity == Entity("session", "s1", "Иванов — ws-1 — 7", "c1")
+    assert entity_from_record("session", {"user-name": "Иванов"}) is None
+
+
+@needs_fake_rac
+def test_prefetch_is_quiet(executor, logger):
+    prefetcher = EntityPrefetcher(executor, logger=logger)
+    endpoint = "localhost:1545"
+
+    prefetcher.load(endpoint, "localhost", "1545", "cluster", "")
+    clusters = prefetcher.index.clusters(endpoint)
+    prefetcher.load(endpoint, "localhost", "1545", "infobase", clusters[0])
+    logger.close()
+
+    assert clusters
+    assert prefetcher.index.search(endpoint, "infobase", "", cluster=clusters[0])
+    # Вывод фоновых команд не попадает в журнал, метрики и кеш результатов
+    assert logger.messages.messages == []
+    assert executor.metrics.snapshot() == {}
+    assert len(executor.result_cache) == 0
@@ -0,0 +1,63 @@
+import pytest
+
+from core.rac_parser import parse_records
+from tools.fake_rac import ENCODING, FakeRac, FakeRacError, Topology, render_record, share
+
+
+@pytest.fixture
+def topology(monkeypatch):
+    monkeypatch.setenv("FAKE_RAC_SEED", "7")
+    monkeypatch.setenv("FAKE_RAC_CLUSTERS", "2")
+    monkeypatch.setenv("FAKE_RAC_INFOBASES", "5")
+    monkeypatch.setenv("FAKE_RAC_SESSIONS", "11")
+    return Topology()
+
+
+def run(topology, mode, command, **params):
+    return list(FakeRac(topology).run(mode, command, params))
+
+
+def test_objects_are_shared_between_clusters():
+    assert [share(11, 2, index) for index in range(2)] == [6, 5]
+    assert share(3, 0, 0) == 0
+
+
+def test_topology_is_deterministic(topology, monkeypatch):
+    clusters = run(topology, "cluster", "list")
+    assert len(clusters) == 2
+    assert run(Topology(), "cluster", "list") == clusters
+    monkeypatch.setenv("FAKE_RAC_SEED", "8")
+    assert run(Topology(), "cluster", "list")[0]["cluster"] != clusters[0]["cluster"]
+
+
+def test_lists_are_filtered_by_cluster_and_infobase(topology):
+    clusters = [str(record["cluster"]) for record in run(topology, "cluster", "list")]
+    assert [len(run(topology, "session", "list", cluster=cluster)) for cluster in clusters] == [6, 5]
+    infobases = run(topology, "infobase", "summary list", cluster=clusters[0])
+    assert len(infobases) == 3
+
+    infobase = str(infobases[0]["infobase"])
+    sessions = run(topology, "session", "list", cluster=clusters[0], infobase=infobase)
+    assert all(str(record["infobase"]) == infobase for record in sessions)
+
+
+def test_errors(topology):
+    with pytest.raises(FakeRacError, match="обязательный параметр: --cluster"):
+        run(topology, "session", "list")
+    with pytest.raises(FakeRacError, match="не найден"):
+        run(topology, "session", "list", cluster="00000000-0000-0000-0000-000000000000")
+    with pytest.raises(FakeRacError, match="Неизвестная команда"):
+        run(topology, "session", "nothing")
+
+
+def test_mutating_commands_print_nothing(topology):
+    cluster = str(run(topology, "cluster", "list")[0]["cluster"])
+    session = str(run(topology, "session", "list", cluster=cluster)[0]["session"])
+    assert run(topology, "session", "terminate", cluster=cluster, session=session) == []
+
+
+def test_rendered_records_parse_back(topology):
+    cluster = str(run(topology, "cluster", "list")[0]["cluster"])
+    sessions = run(topology, "session", "list", cluster=cluster)
+    text = b"".join(render_record(record) for record in sessions).decode(ENCODING)
+    assert list(parse_records(text.splitlines())) == sessions
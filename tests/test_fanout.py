@@ -0,0 +1,51 @@
+import threading
+
+from core.async_executor import AsyncCommandExecutor
+from core.fanout import HOST_COLUMN, FanOutExecutor, parse_hosts
+
+TIMEOUT = 5
+
+
+class SharedRecordsExecutor:
+    """Исполнитель, возвращающий одни и те же записи, как кэш результатов"""
+
+    def __init__(self):
+        self.records = {}
+
+    def build_command_args(self, mode, command, parameters, host, port):
+        return [f"{host}:{port}", mode, *command.split()]
+
+    def execute_command(self, args, cancel_token=None, on_records=None):
+        records = self.records.setdefault(args[0], [{"cluster": f"uuid-{args[0]}", "name": "main"}])
+        if on_records is not None:
+            on_records(records)
+        return True, records
+
+
+def test_parse_hosts_adds_default_port_and_skips_duplicates():
+    assert parse_hosts("srv1, srv2:1645\nsrv1;srv3", "1545") == ["srv1:1545", "srv2:1645", "srv3:1545"]
+    assert parse_hosts("") == []
+
+
+def test_host_column_is_added_to_copies_of_records():
+    fake = SharedRecordsExecutor()
+    async_executor = AsyncCommandExecutor(fake, max_concurrency=2)
+    done = threading.Event()
+    merged = []
+    batches = []
+    try:
+        FanOutExecutor(async_executor).submit(
+            ["srv1:1545", "srv2:1545"], "cluster", "list", {},
+            callback=lambda _fanout, result: (merged.append(result), done.set()),
+            on_records=lambda _fanout, batch: batches.extend(batch))
+        assert done.wait(TIMEOUT)
+    finally:
+        async_executor.shutdown(wait=True)
+
+    result = merged[0]
+    assert result.success
+    assert [record[HOST_COLUMN] for record in result.records] == ["srv1:1545", "srv2:1545"]
+    assert sorted(record[HOST_COLUMN] for record in batches) == ["srv1:1545", "srv2:1545"]
+    # Записи, которые хранит исполнитель, не изменились
+    for records in fake.records.values():
+        assert all(HOST_COLUMN not in record for record in records)
@@ -0,0 +1,94 @@
+import gzip
+import logging
+import os
+import time
+
+from conftest import ListHandler
+from core.logger import LOG_PREFIX, BufferedRotatingFileHandler, RACLogger, compress_file
+
+
+def make_record(message: str, created: float = None) -> logging.LogRecord:
+    record = logging.LogRecord("RACAdmin", logging.INFO, __file__, 1, message, None, None)
+    if created is not None:
+        record.created = created
+    return record
+
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_messages_are_written_on_close(tmp_path):
+    logger = RACLogger(log_dir=str(tmp_path), console=False)
+    path = logger.file_handler.current_file
+    for index in range(1000):
+        logger.log_info(f"строка {index}", "TEST")
+    logger.log_error("ошибка", "TEST")
+    logger.close()
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 1001
+    assert lines[0].endswith("[RACAdmin] [TEST] строка 0")
+    assert lines[-1].endswith("[TEST] ошибка")
+
+
+def test_buffer_is_flushed_by_size(tmp_path):
+    handler = BufferedRotatingFileHandler(str(tmp_path), flush_interval=3600, buffer_size=1024)
+    try:
+        handler.emit(make_record("short"))
+        assert os.path.getsize(handler.current_file) == 0
+        handler.emit(make_record("x" * 2000))
+        assert os.path.getsize(handler.current_file) > 2000
+    finally:
+        handler.close()
+
+
+def test_rotation_by_size_compresses_previous_part(tmp_path):
+    handler = BufferedRotatingFileHandler(str(tmp_path), max_bytes=100)
+    try:
+        handler.emit(make_record("a" * 200))
+        handler.emit(make_record("b"))
+        rotated = os.path.join(str(tmp_path), f"{LOG_PREFIX}{handler.day}.1.log.gz")
+        wait_for(lambda: os.path.exists(rotated) and not os.path.exists(rotated[:-3]))
+    finally:
+        handler.close()
+
+    with gzip.open(rotated, "rt", encoding="utf-8") as f:
+        assert "a" * 200 in f.read()
+    with open(handler.current_file, encoding="utf-8") as f:
+        assert f.read().rstrip().endswith("b")
+
+
+def test_stale_logs_are_compressed_on_start(tmp_path):
+    stale = tmp_path / f"{LOG_PREFIX}20200101.log"
+    stale.write_text("старый журнал\n", encoding="utf-8")
+    handler = BufferedRotatingFileHandler(str(tmp_path))
+    try:
+        wait_for(lambda: not stale.exists())
+    finally:
+        handler.close()
+    with gzip.open(str(stale) + ".gz", "rt", encoding="utf-8") as f:
+        assert f.read() == "старый журнал\n"
+
+
+def test_compress_missing_file_is_ignored(tmp_path):
+    compress_file(str(tmp_path / "missing.log"))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_added_handler_receives_messages_until_removed(tmp_path):
+    logger = RACLogger(log_dir=str(tmp_path), console=False)
+    handler = ListHandler()
+    try:
+        logger.add_handler(handler)
+        logger.log_warning("первое", "PANEL")
+        wait_for(lambda: handler.messages == ["[PANEL] первое"])
+        logger.remove_handler(handler)
+        logger.log_info("второе", "PANEL")
+    finally:
+        logger.close()
+    assert handler.messages == ["[PANEL] первое"]
@@ -0,0 +1,61 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+from core.metrics import ExecutionStats, Histogram, MetricsRegistry, MetricsServer
+
+KEY = ("srv:1545", "session", "list")
+
+
+def test_histogram_quantiles_are_interpolated_within_buckets():
+    histogram = Histogram((1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.count == 4
+    assert histogram.mean == pytest.approx(1.625)
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(1.0) == pytest.approx(3.0)
+    assert histogram.cumulative() == [("1.0", 1), ("2.0", 3), ("4.0", 4), ("+Inf", 4)]
+    assert Histogram((1.0,)).quantile(0.5) == 0.0
+
+
+def test_cache_hits_count_only_outcome_and_source():
+    registry = MetricsRegistry()
+    registry.observe(KEY, "rac", 0.2, ExecutionStats(spawn_time=0.01, bytes_read=512), 3)
+    registry.observe(KEY, "cache", 0.0001, ExecutionStats(), 3)
+    registry.observe(KEY, "rac", 30.0, ExecutionStats(outcome="timeout"), 0)
+
+    metrics = registry.snapshot()[KEY]
+    assert metrics.outcomes["success"] == 2 and metrics.outcomes["timeout"] == 1
+    assert metrics.failures == 1
+    assert metrics.sources == {"rac": 2, "cache": 1}
+    assert metrics.duration.count == 2
+    assert metrics.records.count == 1
+    assert metrics.spawn.count == 1 and metrics.bytes.sum == 512
+
+
+def test_prometheus_format_escapes_labels():
+    registry = MetricsRegistry()
+    registry.observe(("srv:1545", "infobase", 'summary "list"'), "ras", 0.01, ExecutionStats(), 2)
+    text = registry.render_prometheus()
+    labels = 'host="srv:1545",mode="infobase",command="summary \\"list\\""'
+    assert f'rac_commands_total{{{labels},outcome="success"}} 1' in text
+    assert f'rac_command_source_total{{{labels},source="ras"}} 1' in text
+    assert f'rac_command_duration_seconds_count{{{labels}}} 1' in text
+    # Процесс rac не запускался
+    assert "rac_command_spawn_seconds_count" not in text
+
+
+def test_metrics_server():
+    registry = MetricsRegistry()
+    registry.observe(KEY, "rac", 0.1, ExecutionStats(), 1)
+    server = MetricsServer(registry, 0)
+    try:
+        with urllib.request.urlopen(server.address, timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert response.read().decode("utf-8") == registry.render_prometheus()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(server.address.replace("/metrics", "/other"), timeout=5)
+    finally:
+        server.close()
@@ -0,0 +1,101 @@
+import pytest
+
+from core.async_executor import AsyncCommandExecutor
+from core.pipeline import STEP_COLUMN, PipelineError, PipelineRunner, parse_pipeline
+from core.result_cache import normalize_args
+
+CLUSTER = "c0000000-0000-0000-0000-000000000001"
+INFOBASES = [{"infobase": "i1", "name": "Бухгалтерия"}, {"infobase": "i2", "name": "Склад"}]
+
+
+class CannedExecutor:
+    """Аргументы строит настоящий исполнитель, результаты заданы заранее"""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.commands = []
+
+    def build_command_args(self, *args, **kwargs):
+        return self.executor.build_command_args(*args, **kwargs)
+
+    def execute_command(self, args, cancel_token=None, on_records=None):
+        key = normalize_args(args)
+        params = dict(key.params)
+        self.commands.append((key.mode, " ".join(key.command), params))
+        if key.mode == "cluster":
+            return True, [{"cluster": CLUSTER, "name": "main"}]
+        if key.mode == "infobase" and key.command == ("summary", "list"):
+            return True, [dict(record) for record in INFOBASES]
+        if key.mode == "session":
+            if params.get("cluster") != CLUSTER:
+                return False, f"Неизвестный кластер: {params.get('cluster')}"
+            return True, [{"session": f"s-{params['infobase']}", "infobase": params["infobase"]}]
+        return False, "Команда не поддерживается"
+
+
+@pytest.fixture
+def runner(executor):
+    async_executor = AsyncCommandExecutor(CannedExecutor(executor), max_concurrency=4)
+    yield PipelineRunner(async_executor)
+    async_executor.shutdown(wait=True)
+
+
+def test_parse_rejects_invalid_pipelines():
+    with pytest.raises(PipelineError, match="непустой список"):
+        parse_pipeline({"steps": []})
+    with pytest.raises(PipelineError, match="неизвестная команда"):
+        parse_pipeline({"steps": [{"id": "a", "mode": "cluster", "command": "nothing"}]})
+    with pytest.raises(PipelineError, match="item без foreach"):
+        parse_pipeline({"steps": [{"id": "a", "mode": "cluster", "command": "info",
+                                   "params": {"cluster": "${item.cluster}"}}]})
+    with pytest.raises(PipelineError, match="неизвестные шаги"):
+        parse_pipeline({"steps": [{"id": "a", "mode": "session", "command": "list", "foreach": "b"}]})
+    with pytest.raises(PipelineError, match="Циклическая"):
+        parse_pipeline({"steps": [
+            {"id": "a", "mode": "cluster", "command": "info", "params": {"cluster": "${b.cluster}"}},
+            {"id": "b", "mode": "cluster", "command": "info", "params": {"cluster": "${a.cluster}"}},
+        ]})
+
+
+def test_dependencies_come_from_references_and_foreach():
+    pipeline = parse_pipeline({"steps": [
+        {"id": "clusters", "mode": "cluster", "command": "list"},
+        {"id": "infobases", "mode": "infobase", "command": "summary list",
+         "params": {"cluster": "${clusters.cluster}"}},
+        {"id": "sessions", "mode": "session", "command": "list", "foreach": "infobases",
+         "params": {"infobase": "${item.infobase}"}},
+    ]})
+    assert [step.dependencies for step in pipeline.steps] == [set(), {"clusters"}, {"infobases"}]
+
+
+def test_foreach_items_see_parameters_of_the_source_command(runner):
+    pipeline = parse_pipeline({"steps": [
+        {"id": "clusters", "mode": "cluster", "command": "list"},
+        {"id": "infobases", "mode": "infobase", "command": "summary list",
+         "params": {"cluster": "${clusters.cluster}"}, "where": {"name": "Бухгалтерия"}},
+        # cluster не выводится infobase summary list, а берется из параметров шага infobases
+        {"id": "sessions", "mode": "session", "command": "list", "foreach": "infobases",
+         "params": {"cluster": "${item.cluster}", "infobase": "${item.infobase}"}},
+    ]})
+    result = runner.run(pipeline)
+
+    assert result.success, result.summary_lines()
+    assert result.steps["infobases"].records == [INFOBASES[0]]
+    assert result.steps["sessions"].records == [
+        {"infobase": "i1", "name": "Бухгалтерия", "session": "s-i1"}]
+    assert [record[STEP_COLUMN] for record in result.records()] == ["clusters", "infobases", "sessions"]
+    assert runner._handles == []
+
+
+def test_steps_after_failed_step_are_skipped(runner):
+    pipeline = parse_pipeline({"steps": [
+        {"id": "sessions", "mode": "session", "command": "list",
+         "params": {"cluster": "unknown", "infobase": "i1"}},
+        {"id": "infobase", "mode": "infobase", "command": "info", "foreach": "sessions",
+         "params": {"cluster": "${item.cluster}", "infobase": "${item.infobase}"}},
+    ]})
+    result = runner.run(pipeline)
+
+    assert not result.success
+    assert result.steps["sessions"].errors == ["Неизвестный кластер: unknown"]
+    assert result.steps["infobase"].skipped
@@ -0,0 +1,57 @@
+import json
+import os
+import pstats
+
+import pytest
+
+from core.profiling import PROFILE_MODES, Profiler, parse_modes
+
+
+@pytest.mark.parametrize("value, modes", [
+    ("", set()),
+    ("trace", {"trace"}),
+    (" Trace , cprofile,unknown", {"trace", "cprofile"}),
+    ("1", set(PROFILE_MODES)),
+    ("all", set(PROFILE_MODES)),
+])
+def test_parse_modes(value, modes):
+    assert parse_modes(value) == modes
+
+
+def test_disabled_profiler_collects_nothing(tmp_path):
+    profiler = Profiler(set(), str(tmp_path))
+    with profiler.span("command"):
+        pass
+    profiler.instant("stall")
+    profiler.start()
+    assert not profiler.events
+    assert profiler.stop() == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_trace_is_written_in_chrome_format(tmp_path):
+    profiler = Profiler({"trace"}, str(tmp_path))
+    profiler.start()
+    with profiler.span("execute_command", "executor", command="cluster list"):
+        pass
+    profiler.instant("gui_stall", "ui", duration_ms=250)
+    [path] = profiler.stop()
+
+    with open(path, encoding="utf-8") as f:
+        trace = json.load(f)
+    events = {event["name"]: event for event in trace["traceEvents"]}
+    assert events["thread_name"]["ph"] == "M"
+    assert events["execute_command"]["ph"] == "X"
+    assert events["execute_command"]["cat"] == "executor"
+    assert events["execute_command"]["args"] == {"command": "cluster list"}
+    assert events["execute_command"]["dur"] >= 0
+    assert events["gui_stall"]["ph"] == "i"
+
+
+def test_cprofile_session(tmp_path):
+    profiler = Profiler({"cprofile"}, str(tmp_path))
+    profiler.start()
+    sorted(range(1000), key=lambda value: -value)
+    [path] = profiler.stop()
+    assert os.path.basename(path).startswith("cprofile_")
+    assert pstats.Stats(path).total_calls > 0
@@ -0,0 +1,73 @@
+import json
+import re
+
+import pytest
+
+from core.rac_commands import (CATALOG_FILE, CatalogError, ParamType, RACCommands, compile_catalog,
+                               load_compiled, validate_catalog)
+
+# Слово, в котором кириллица смешана с латиницей (например, «кластera»)
+MIXED_WORD_RE = re.compile(r'\b(?=\w*[а-яё])(?=\w*[a-z])\w+\b', re.IGNORECASE)
+
+
+def load_catalog() -> dict:
+    with open(CATALOG_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_builtin_catalog_is_valid():
+    assert validate_catalog(load_catalog()) == []
+
+
+def test_descriptions_do_not_mix_alphabets():
+    catalog = load_catalog()
+    descriptions = [param.get("description", "") for param in catalog["shared_params"].values()]
+    for commands in catalog["modes"].values():
+        for command in commands:
+            descriptions.append(command.get("description", ""))
+            descriptions.extend(param.get("description", "") for param in command.get("parameters", [])
+                                if isinstance(param, dict))
+    assert [text for text in descriptions if MIXED_WORD_RE.search(text)] == []
+
+
+def test_validation_reports_mode_and_command():
+    errors = validate_catalog({
+        "schema": 1,
+        "shared_params": {"cluster": {"type": "uuid", "required": True}},
+        "modes": {"session": [
+            {"command": "list", "parameters": ["cluster", "cluster", "infobase"]},
+            {"command": "list", "parameters": [{"name": "mode", "type": "enum"}]},
+        ]},
+    })
+    assert errors == [
+        "session list: параметр cluster указан повторно",
+        "session list: неизвестный общий параметр infobase",
+        "session list: команда описана повторно",
+        "session list: для типа enum не заданы значения",
+    ]
+
+
+def test_shared_params_are_compiled_once():
+    compiled = compile_catalog({
+        "schema": 1,
+        "shared_params": {"cluster": {"type": "uuid", "required": True}},
+        "modes": {"session": [{"command": "list", "parameters": ["cluster"]},
+                              {"command": "info", "parameters": ["cluster", {"name": "session", "type": "uuid"}]}]},
+    })
+    assert len(compiled.params) == 2
+    assert compiled.modes["session"][0][2] == (0,)
+    assert compiled.modes["session"][1][2] == (0, 1)
+
+
+def test_invalid_catalog_file_raises(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps({"schema": 1, "modes": {}}), encoding="utf-8")
+    with pytest.raises(CatalogError, match="не заданы режимы"):
+        load_compiled(str(path), cache_dir=None)
+
+
+def test_find_command():
+    command = RACCommands.find_command("session", "terminate")
+    assert command is not None
+    assert {param.name: param.param_type for param in command.parameters}["session"] == ParamType.UUID
+    assert RACCommands.find_command("session", "nothing") is None
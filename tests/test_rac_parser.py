@@ -0,0 +1,63 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from core.rac_parser import RecordParser, convert_value, format_record, format_value, parse_line, parse_records
+
+CLUSTER = "8a4c2e1f-1234-4a5b-9c8d-0123456789ab"
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (CLUSTER, uuid.UUID(CLUSTER)),
+    ("1541", 1541),
+    ("-3", -3),
+    ("0.25", 0.25),
+    ("2024-03-01T10:15:00", datetime(2024, 3, 1, 10, 15)),
+    ("yes", True),
+    ("NO", False),
+    ('"1541"', "1541"),
+    ('"Склад ""Север"""', 'Склад "Север"'),
+    ("  ", ""),
+    ("Центральный кластер", "Центральный кластер"),
+    ("2024-13-45T99:99:99", "2024-13-45T99:99:99"),
+])
+def test_convert_value(raw, expected):
+    assert convert_value(raw) == expected
+
+
+def test_parse_line_keeps_colons_in_value():
+    assert parse_line("started-at : 2024-03-01T10:15:00") == ("started-at", datetime(2024, 3, 1, 10, 15))
+    assert parse_line("descr      : host:1541") == ("descr", "host:1541")
+    assert parse_line("no separator") is None
+    assert parse_line("two words : value") is None
+
+
+def test_records_are_separated_by_blank_lines():
+    text = f"""cluster : {CLUSTER}
+host    : srv
+port    : 1541
+
+cluster : {CLUSTER}
+name    : "Кластер"
+"""
+    records = list(parse_records(text.splitlines()))
+    assert records == [{"cluster": uuid.UUID(CLUSTER), "host": "srv", "port": 1541},
+                       {"cluster": uuid.UUID(CLUSTER), "name": "Кластер"}]
+
+
+def test_parser_returns_record_when_it_ends():
+    parser = RecordParser()
+    assert parser.feed("a : 1") is None
+    assert parser.feed("") == {"a": 1}
+    assert parser.feed("") is None
+    assert parser.feed("b : 2") is None
+    assert parser.finish() == {"b": 2}
+    assert parser.finish() is None
+
+
+def test_format_record_round_trip():
+    record = {"session": uuid.UUID(CLUSTER), "port": 1541, "hibernate": False,
+              "started-at": datetime(2024, 3, 1, 10, 15), "descr": "Склад 1", "code": "1541", "empty": ""}
+    assert next(parse_records(format_record(record))) == record
+    assert format_value(True) == "yes"
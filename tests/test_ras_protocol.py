@@ -0,0 +1,85 @@
+import threading
+import uuid
+
+import pytest
+
+from core import ras_protocol as proto
+from core.ras_client import RASClient, RASConnectionPool
+from core.ras_protocol import Decoder, Encoder, RASProtocolError, RASServiceError
+from core.result_cache import normalize_args
+from tools.ras_replay_server import ReplayServer, build_sample_recording
+
+CLUSTER = uuid.UUID("6d6958e1-a96c-4999-a995-698a0298161e")
+
+
+@pytest.mark.parametrize("value", [0, 1, 63, 64, 127, 8191, 8192, 2 ** 20, 2 ** 31])
+def test_size_round_trip(value):
+    decoder = Decoder(Encoder().size(value).to_bytes())
+    assert decoder.size() == value
+    assert decoder.remaining() == 0
+
+
+def test_size_encoding_uses_six_bits_in_first_byte():
+    assert Encoder().size(63).to_bytes() == b"\x3f"
+    assert Encoder().size(64).to_bytes() == b"\x40\x01"
+
+
+def test_values_round_trip():
+    data = (Encoder().bool(True).short(-2).int(1541).long(2 ** 40).string("Кластер").uuid(str(CLUSTER))
+            .params({"flag": False, "count": 5, "name": "srv"}).to_bytes())
+    decoder = Decoder(data)
+    assert [decoder.bool(), decoder.short(), decoder.int(), decoder.long(), decoder.string(), decoder.uuid()] == \
+           [True, -2, 1541, 2 ** 40, "Кластер", CLUSTER]
+    assert decoder.params() == {"flag": False, "count": 5, "name": "srv"}
+
+
+def test_truncated_data_and_unknown_type_are_errors():
+    with pytest.raises(RASProtocolError, match="конец данных"):
+        Decoder(Encoder().string("abc").to_bytes()[:2]).string()
+    with pytest.raises(RASProtocolError, match="тип значения"):
+        Decoder(b"\x7f").typed_value()
+
+
+def test_cluster_info_round_trip():
+    record = {"cluster": CLUSTER, "expiration-timeout": 60, "host": "srv", "lifetime-limit": 86400,
+              "port": 1541, "max-memory-size": 0, "max-memory-time-limit": 0, "name": "Кластер",
+              "security-level": 0, "session-fault-tolerance-level": 0, "load-balancing-mode": "memory",
+              "errors-count-threshold": 0, "kill-problem-processes": True, "kill-by-memory-with-dump": False}
+    assert proto.decode_cluster_info(Decoder(proto.encode_cluster_info(Encoder(), record).to_bytes())) == record
+
+
+def test_endpoint_exception_is_service_error():
+    body = Encoder().size(1).short(0).byte(proto.MESSAGE_EXCEPTION).string("Exception").string("Нет доступа")
+    with pytest.raises(RASServiceError, match="Нет доступа"):
+        proto.decode_endpoint_message(body.to_bytes())
+
+
+@pytest.fixture
+def replay_server():
+    server = ReplayServer(build_sample_recording(), ("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "127.0.0.1:%d" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_against_replay_server(replay_server):
+    client = RASClient(RASConnectionPool(timeout=5))
+    try:
+        clusters = client.execute(normalize_args([replay_server, "cluster", "list"]))
+        assert [(record["cluster"], record["name"]) for record in clusters] == [(CLUSTER, "Локальный кластер")]
+        infobases = client.execute(normalize_args([replay_server, "infobase", "summary", "list",
+                                                   f"--cluster={CLUSTER}"]))
+        assert [record["name"] for record in infobases] == ["base1", "base2", "base3"]
+        assert client.execute(normalize_args([replay_server, "agent", "version"])) == [{"version": "8.3.24.1342"}]
+        # Соединение переиспользуется из пула
+        assert sum(len(idle) for idle in client.pool._idle.values()) == 1
+    finally:
+        client.close()
+
+
+def test_unsupported_commands_go_to_rac():
+    client = RASClient(RASConnectionPool())
+    assert client.supports(normalize_args(["cluster", "list"]))
+    assert not client.supports(normalize_args(["session", "list", f"--cluster={CLUSTER}"]))
@@ -0,0 +1,82 @@
+from core.result_cache import ResultCache, is_mutating, is_read_only, normalize_args
+
+CLUSTER = "5a4d8c1e-0000-0000-0000-000000000001"
+OTHER_CLUSTER = "5a4d8c1e-0000-0000-0000-000000000002"
+
+
+def key(*args):
+    return normalize_args(list(args))
+
+
+def test_normalize_args_ignores_parameter_order_and_quotes():
+    first = key("srv:1545", "infobase", "summary", "list", f"--cluster={CLUSTER}", "--cluster-user=admin")
+    second = key("SRV:1545", "infobase", "summary", "list", "--cluster-user=admin", f'--cluster="{CLUSTER}"')
+    assert first == second
+    assert first.endpoint == "srv:1545"
+    assert first.cluster == CLUSTER
+    assert key("cluster", "list").endpoint == "localhost:1545"
+    assert key("srv:1545") is None
+
+
+def test_read_only_and_mutating_commands():
+    assert is_read_only(key("cluster", "list"))
+    assert not is_mutating(key("cluster", "list"))
+    assert is_mutating(key("session", "terminate", f"--cluster={CLUSTER}"))
+    assert not is_read_only(key("session", "terminate", f"--cluster={CLUSTER}"))
+
+
+def test_get_returns_copies_and_expires():
+    cache = ResultCache(ttls={"cluster": 30, "session": 0})
+    cache.put(key("cluster", "list"), [{"cluster": CLUSTER}])
+    records = cache.get(key("cluster", "list"))
+    records[0]["extra"] = 1
+    assert cache.get(key("cluster", "list")) == [{"cluster": CLUSTER}]
+    # Нулевое время жизни отключает кеширование режима
+    cache.put(key("session", "list", f"--cluster={CLUSTER}"), [])
+    assert cache.get(key("session", "list", f"--cluster={CLUSTER}")) is None
+
+
+def test_lru_limit():
+    cache = ResultCache(max_entries=2)
+    for mode in ("cluster", "server", "manager"):
+        cache.put(key(mode, "list"), [])
+    assert len(cache) == 2
+    assert cache.get(key("cluster", "list")) is None
+
+
+def test_mutation_invalidates_same_cluster_and_cluster_free_entries():
+    cache = ResultCache()
+    same = key("srv:1545", "session", "list", f"--cluster={CLUSTER}")
+    other = key("srv:1545", "session", "list", f"--cluster={OTHER_CLUSTER}")
+    cluster_free = key("srv:1545", "cluster", "list")
+    other_host = key("other:1545", "session", "list", f"--cluster={CLUSTER}")
+    for entry in (same, other, cluster_free, other_host):
+        cache.put(entry, [])
+
+    assert cache.invalidate(key("srv:1545", "session", "terminate", f"--cluster={CLUSTER}")) == 2
+    assert cache.get(same) is None
+    assert cache.get(cluster_free) is None
+    assert cache.get(other) == []
+    assert cache.get(other_host) == []
+
+
+def test_result_of_read_started_before_mutation_is_not_cached():
+    cache = ResultCache()
+    read = key("srv:1545", "session", "list", f"--cluster={CLUSTER}")
+    generation = cache.generation(read)
+    cache.invalidate(key("srv:1545", "session", "terminate", f"--cluster={CLUSTER}"))
+    cache.put(read, [{"session": "stale"}], generation)
+    assert cache.get(read) is None
+
+    # Изменение в другом кластере не мешает сохранению
+    generation = cache.generation(read)
+    cache.invalidate(key("srv:1545", "session", "terminate", f"--cluster={OTHER_CLUSTER}"))
+    cache.put(read, [{"session": "fresh"}], generation)
+    assert cache.get(read) == [{"session": "fresh"}]
+
+    # Запись без кластера зависит от изменений в любом кластере хоста
+    cluster_free = key("srv:1545", "cluster", "list")
+    generation = cache.generation(cluster_free)
+    cache.invalidate(key("srv:1545", "infobase", "update", f"--cluster={OTHER_CLUSTER}"))
+    cache.put(cluster_free, [], generation)
+    assert cache.get(cluster_free) is None
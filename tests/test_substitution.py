@@ -0,0 +1,73 @@
+from core.substitution import Reference, SubstitutionEngine, compile_template, quote_value
+
+
+class CountingLookup:
+    def __init__(self, values: dict):
+        self.values = values
+        self.calls = []
+
+    def __call__(self, name: str):
+        self.calls.append(name)
+        return self.values.get(name)
+
+
+def test_compile_template():
+    template = compile_template("--cluster=$(cluster) --name=$(name)!")
+    assert template.tokens == ("--cluster=", Reference("cluster", "$(cluster)"), " --name=",
+                               Reference("name", "$(name)"), "!")
+    assert template.names == {"cluster", "name"}
+
+
+def test_quote_value():
+    assert quote_value("Иванов И.И.") == '"Иванов И.И."'
+    assert quote_value('"уже в кавычках"') == '"уже в кавычках"'
+    assert quote_value("srv") == "srv"
+
+
+def test_nested_references_and_unknown_variables():
+    engine = SubstitutionEngine(CountingLookup({"host": "srv", "port": "1541", "conn": "Srvr=$(host):$(port)"}))
+    assert engine.substitute("--conn=$(conn) --user=$(user)") == "--conn=Srvr=srv:1541 --user=$(user)"
+    assert engine.substitute("без ссылок") == "без ссылок"
+
+
+def test_cycles_are_left_unexpanded():
+    engine = SubstitutionEngine(CountingLookup({"a": "$(b)", "b": "x$(a)", "c": "[$(a)]", "d": "ok"}))
+    assert engine.expand("a") is None
+    assert engine.expand("b") is None
+    assert engine.substitute("$(c) $(d)") == "[$(a)] ok"
+
+
+def test_find_cycle():
+    engine = SubstitutionEngine(CountingLookup({"a": "$(b)", "b": "$(c)", "c": "plain"}))
+    assert engine.find_cycle("c", "$(a)") == ["c", "a", "b", "c"]
+    assert engine.find_cycle("c", "$(c)") == ["c", "c"]
+    assert engine.find_cycle("c", "plain again") is None
+    assert engine.find_cycle("d", "$(a)$(b)") is None
+
+
+def test_results_are_cached_until_dependency_changes():
+    values = {"host": "srv", "conn": "$(host):1541", "user": "admin"}
+    lookup = CountingLookup(values)
+    engine = SubstitutionEngine(lookup)
+    text = "--conn=$(conn) --user=$(user)"
+    assert engine.substitute(text) == "--conn=srv:1541 --user=admin"
+    calls = len(lookup.calls)
+    assert engine.substitute(text) == "--conn=srv:1541 --user=admin"
+    assert len(lookup.calls) == calls
+
+    # Изменение вложенной переменной сбрасывает зависящую от нее переменную и строку,
+    # значение user остается в кеше
+    values["host"] = "srv2"
+    engine.invalidate("host")
+    assert engine.substitute(text) == "--conn=srv2:1541 --user=admin"
+    assert sorted(lookup.calls[calls:]) == ["conn", "host"]
+
+
+def test_variable_manager_rejects_cyclic_values(variable_manager):
+    variable_manager.set_variable("host", "srv")
+    variable_manager.set_variable("conn", "Srvr=$(host):1541")
+    assert variable_manager.substitute_variables("--conn=$(conn)") == "--conn=Srvr=srv:1541"
+    valid, message = variable_manager.validate_variable_value("host", "$(conn)")
+    assert not valid
+    assert message == "Циклическая ссылка переменных: $(host) → $(conn) → $(host)"
+    assert variable_manager.validate_variable_value("host", "srv2") == (True, "")
@@ -0,0 +1,54 @@
+import random
+
+from core.text_index import TextIndex
+
+
+def brute_force(texts: dict, query: str) -> set:
+    return {key for key, text in texts.items() if query.casefold() in text.casefold()}
+
+
+def test_search_by_substring_ignores_case():
+    index = TextIndex([(1, "Бухгалтерия"), (2, "Склад"), (3, "БУХ филиала")])
+    assert index.search("бух") == {1, 3}
+    assert index.search("Ух") == {1, 3}
+    assert index.search("склад") == {2}
+    assert index.search("") == {1, 2, 3}
+    assert index.search("нет такого") == set()
+    assert len(index) == 3 and 2 in index
+
+
+def test_updates_and_removals_are_applied_before_search():
+    index = TextIndex([(1, "session list"), (2, "session info")])
+    assert index.search("session") == {1, 2}
+    index.update(1, "cluster list")
+    index.remove(2)
+    index.remove(3)
+    assert index.search("session") == set()
+    assert index.search("list") == {1}
+    index.clear()
+    assert index.search("") == set()
+
+
+def test_refined_query_after_update_sees_new_texts():
+    index = TextIndex([(1, "base1")])
+    assert index.search("bas") == {1}
+    index.update(2, "base2")
+    assert index.search("base") == {1, 2}
+
+
+def test_matches_brute_force_search():
+    rnd = random.Random(5)
+    alphabet = "абвгaAbB 1"
+    texts = {key: "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 12))) for key in range(200)}
+    index = TextIndex(texts.items())
+    for step in range(300):
+        if step % 10 == 0:
+            key = rnd.randrange(250)
+            if rnd.random() < 0.3:
+                texts.pop(key, None)
+                index.remove(key)
+            else:
+                texts[key] = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 12)))
+                index.update(key, texts[key])
+        query = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 4)))
+        assert index.search(query) == brute_force(texts, query), query
@@ -0,0 +1,165 @@
+import json
+
+import core.variable_manager as variable_module
+from core.variable_manager import VariableManager
+
+
+def read_file(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_changes_are_saved_by_one_delayed_write(tmp_path, monkeypatch):
+    path = tmp_path / "variables.json"
+    manager = VariableManager(str(path), save_delay=60)
+    writes = []
+    original = variable_module.write_atomic
+    monkeypatch.setattr(variable_module, "write_atomic", lambda *args: (writes.append(args), original(*args)))
+
+    manager.set_variable("a", "1")
+    manager.set_variable("b", "2")
+    assert writes == []
+    manager.flush()
+    assert len(writes) == 1
+    assert {"a", "b"} <= set(read_file(path))
+    # Без изменений повторная запись не выполняется
+    manager.flush()
+    assert len(writes) == 1
+
+
+def test_failed_write_keeps_changes_unsaved(tmp_path, monkeypatch):
+    path = tmp_path / "variables.json"
+    manager = VariableManager(str(path), save_delay=60)
+    manager.flush()
+    original = variable_module.write_atomic
+
+    def failing_write(*args):
+        raise OSError("диск переполнен")
+
+    monkeypatch.setattr(variable_module, "write_atomic", failing_write)
+    manager.set_variable("a", "1")
+    manager.flush()
+    assert "a" not in read_file(path)
+    # Повторная запись запланирована
+    assert manager._save_timer is not None
+
+    monkeypatch.setattr(variable_module, "write_atomic", original)
+    manager.flush()
+    assert read_file(path)["a"]["value"] == "1"
+    assert manager._save_timer is None
+
+
+def test_profile_overrides_global_variables(variable_manager):
+    variable_manager.set_variable("host", "srv-test")
+    variable_manager.set_variable("user", "admin")
+    variable_manager.create_profile("prod")
+    variable_manager.set_variable("host", "srv-prod", profile="prod")
+    notified = []
+    variable_manager.add_listener(notified.append)
+
+    assert variable_manager.substitute_variables("$(host) $(user)") == "srv-test admin"
+    variable_manager.set_active_profile("prod")
+    assert notified == [{"host"}]
+    assert variable_manager.is_overridden("host")
+    assert variable_manager.substitute_variables("$(host) $(user)") == "srv-prod admin"
+
+    # Изменение переопределенной переменной остается в профиле, остальных — в глобальных
+    variable_manager.set_variable("host", "srv-prod2")
+    variable_manager.set_variable("user", "operator")
+    assert variable_manager.substitute_variables("$(host) $(user)") == "srv-prod2 operator"
+    variable_manager.set_active_profile(None)
+    assert variable_manager.substitute_variables("$(host) $(user)") == "srv-test operator"
+
+
+def test_deleting_active_profile_returns_to_global_variables(variable_manager):
+    variable_manager.set_variable("host", "srv-test")
+    variable_manager.create_profile("prod")
+    variable_manager.set_variable("host", "srv-prod", profile="prod")
+    variable_manager.create_profile("prod-copy", copy_from="prod")
+    variable_manager.set_active_profile("prod")
+
+    assert variable_manager.delete_profile("prod")
+    assert variable_manager.active_profile is None
+    assert variable_manager.get_variable("host") == "srv-test"
+    assert variable_manager.get_profiles() == ["prod-copy"]
+    assert variable_manager.validate_profile_name("prod-copy")[0] is False
+    assert variable_manager.validate_profile_name("@profiles")[0] is False
+
+
+def test_profiles_are_saved_to_file(tmp_path):
+    path = tmp_path / "variables.json"
+    manager = VariableManager(str(path), save_delay=0)
+    manager.create_profile("prod")
+    manager.set_variable("host", "srv-prod", profile="prod")
+    assert read_file(path)["@profiles"]["prod"]["host"]["value"] == "srv-prod"
+
+    reloaded = VariableManager(str(path), save_delay=0)
+    reloaded.set_active_profile("prod")
+    assert reloaded.get_variable("host") == "srv-prod"
+
+
+def edit_file(path, edit):
+    data = read_file(path)
+    edit(data)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def test_external_changes_are_merged_with_unsaved_edits(tmp_path):
+    path = tmp_path / "variables.json"
+    manager = VariableManager(str(path), save_delay=60)
+    manager.set_variable("host", "srv")
+    manager.set_variable("user", "admin")
+    manager.flush()
+    assert manager.substitute_variables("$(host)") == "srv"
+
+    # Несохраненная локальная правка и внешнее изменение другой переменной
+    manager.set_variable("user", "operator")
+
+    def external(data):
+        data["host"]["value"] = "srv2"
+        data["port"] = {"name": "port", "value": "1645", "comment": "", "reserved": False}
+
+    edit_file(path, external)
+    notified = []
+    manager.add_listener(notified.append)
+    assert manager.reload_from_disk() == {"host", "port"}
+    assert notified == [{"host", "port"}]
+    assert manager.substitute_variables("$(host):$(port) $(user)") == "srv2:1645 operator"
+
+    # Собственная запись повторно не применяется
+    manager.flush()
+    assert manager.reload_from_disk() == set()
+    assert read_file(path)["user"]["value"] == "operator"
+
+
+def test_reload_restores_removed_reserved_variables(tmp_path):
+    path = tmp_path / "variables.json"
+    manager = VariableManager(str(path), save_delay=0)
+    edit_file(path, lambda data: data.pop("default_port"))
+    assert manager.reload_from_disk() == {"default_port"}
+    assert manager.get_variable("default_port") == "1545"
+
+
+def test_unreadable_file_is_ignored_until_next_change(tmp_path):
+    path = tmp_path / "variables.json"
+    manager = VariableManager(str(path), save_delay=0)
+    manager.set_variable("host", "srv")
+    path.write_text("{ обрыв записи", encoding="utf-8")
+    assert manager.reload_from_disk() == set()
+    assert manager.get_variable("host") == "srv"
+
+
+def test_broken_file_is_not_overwritten_by_defaults(tmp_path):
+    path = tmp_path / "variables.json"
+    broken = '{"host": {"name": "host", "value": "srv", "comment": "", "reser'
+    path.write_text(broken, encoding="utf-8")
+    manager = VariableManager(str(path), save_delay=0)
+    manager.flush()
+    assert path.read_text(encoding="utf-8") == broken
+    assert manager.get_variable("default_port") == "1545"
+
+    # Перед первой записью изменений сохраняется копия исходного файла
+    manager.set_variable("user", "admin")
+    assert read_file(path)["user"]["value"] == "admin"
+    assert (tmp_path / "variables.json.bak").read_text(encoding="utf-8") == broken
@@ -0,0 +1,287 @@
+"""Замеры производительности основных путей выполнения команд
+
+Каждый замер запускается несколько раз, в историю (JSON Lines) записываются
+медиана и минимум времени одной операции вместе с ревизией git, что позволяет
+сравнивать версии между собой. После замеров выводится сравнение с
+предыдущей записью истории; изменения хуже порога отмечаются как регрессии.
+
+    python tools/benchmarks.py                      # все замеры
+    python tools/benchmarks.py -k execute --repeat 3
+    python tools/benchmarks.py --no-save --fail-on-regression
+
+Выполнение команд замеряется на эмуляторе tools/fake_rac.py, замеры
+диалогов требуют PyQt6 и пропускаются без него.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.command_executor import RACCommandExecutor  # noqa: E402
+from core.entity_index import Entity, EntityIndex  # noqa: E402
+from core.logger import RACLogger  # noqa: E402
+from core.rac_commands import RACCommands  # noqa: E402
+from core.text_index import TextIndex  # noqa: E402
+from core.variable_manager import VariableManager  # noqa: E402
+
+FAKE_RAC = os.path.join(ROOT, "tools", "fake_rac.py")
+DEFAULT_HISTORY = os.path.join(ROOT, "tools", "benchmark_history.jsonl")
+# Режимы с наибольшим числом команд и параметров
+DIALOG_MODES = ("counter", "limit", "infobase")
+
+
+class BenchmarkSkipped(Exception):
+    """Замер невозможен в текущем окружении"""
+
+
+@dataclass
+class Benchmark:
+    """Замер: func выполняет number операций, время делится на их число"""
+    name: str
+    func: Callable[[], None]
+    number: int = 1
+
+    def run(self, repeat: int) -> Dict[str, float]:
+        self.func()  # прогрев
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(self.number):
+                self.func()
+            timings.append((time.perf_counter() - started) / self.number)
+        return {"median": statistics.median(timings), "min": min(timings),
+                "number": self.number, "repeat": repeat}
+
+
+class BenchmarkEnvironment:
+    """Временные каталоги переменных и журналов, эмулятор rac вместо настоящего"""
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix="rac_bench_")
+        self.logger = RACLogger(log_dir=os.path.join(self.directory, "logs"), console=False)
+        self.variable_manager = VariableManager(os.path.join(self.directory, "config", "variables.json"))
+        self.variable_manager.set_variable("rac_path", FAKE_RAC)
+        self.variable_manager.set_variable("cluster_uid", "e4070c85-212a-5c09-a279-ba972a0e71c8")
+        self.variable_manager.set_variable("cluster_user", "Администратор")
+        self.variable_manager.set_variable("cluster_pwd", "secret password")
+        self.executor = RACCommandExecutor(self.logger, self.variable_manager)
+        os.environ.setdefault("FAKE_RAC_SESSIONS", "5000")
+
+    def close(self):
+        self.executor.close()
+        self.variable_manager.flush()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def build_benchmarks(env: BenchmarkEnvironment) -> List[Benchmark]:
+    variable_manager = env.variable_manager
+    executor = env.executor
+    logger = env.logger
+
+    template = "--cluster=$(cluster_uid) --cluster-user=$(cluster_user) --cluster-pwd=$(cluster_pwd) --name=x"
+    update_command = RACCommands.find_command("infobase", "update")
+    update_params = {param.name: f"value {index}" for index, param in enumerate(update_command.parameters)}
+    update_params.update({"cluster": "$(cluster_uid)", "sessions-deny": True})
+
+    cluster_args = ["cluster", "list"]
+    session_args = ["session", "list", "--cluster=$(cluster_uid)"]
+
+    def execute(args: List[str]):
+        def run():
+            success, output = executor.execute_command(args, use_cache=False)
+            if not success:
+                raise RuntimeError(output)
+        return run
+
+    # Фильтр диалога переменных: набор запроса по символу среди 5000 переменных с UUID
+    filter_texts = [(f"infobase_{index}_uid", f"infobase_{index}_uid\n{index:08x}-9c1e-4f5a-8d2b-{index:012x}\n"
+                     f"Информационная база {index}") for index in range(5000)]
+
+    def filter_variables():
+        index = TextIndex(filter_texts)
+        for length in range(1, 8):
+            index.search("base_42"[:length])
+
+    # Автодополнение сеанса: набор имени пользователя среди 5000 сеансов
+    entity_index = EntityIndex()
+    entity_index.update("srv:1545", "session", "cluster", [
+        Entity("session", f"{index:08x}-5c09-4a27-9ba9-{index:012x}", f"Пользователь{index % 300} — ws-{index % 500:03d}",
+               "cluster") for index in range(5000)])
+
+    def search_entities():
+        for length in range(1, 14):
+            entity_index.search("srv:1545", "session", "пользователь42"[:length], "cluster")
+
+    def log_messages():
+        for index in range(1000):
+            logger.log_info(f"Сообщение {index}", "BENCHMARK")
+
+    benchmarks = [
+        Benchmark("substitute_variables", lambda: variable_manager.substitute_variables(template), 10000),
+        Benchmark("build_command_args[infobase update]",
+                  lambda: executor.build_command_args("infobase", "update", update_params, "srv", "1545"), 2000),
+        Benchmark("execute_command[cluster list]", execute(cluster_args), 5),
+        Benchmark(f"execute_command[session list x{os.environ['FAKE_RAC_SESSIONS']}]", execute(session_args)),
+        Benchmark("logger[1000 messages]", log_messages, 5),
+        Benchmark("variables_filter[5000 variables]", filter_variables, 5),
+        Benchmark("entity_search[5000 sessions]", search_entities, 5),
+    ]
+    benchmarks.extend(build_dialog_benchmarks(env))
+    return benchmarks
+
+
+def build_dialog_benchmarks(env: BenchmarkEnvironment) -> List[Benchmark]:
+    """Создание диалогов команд для крупнейших режимов (нужен PyQt6)"""
+    def skipped(reason: str) -> List[Benchmark]:
+        def run():
+            raise BenchmarkSkipped(reason)
+        return [Benchmark(f"{name}[{mode}]", run) for name in ("command_dialog", "command_dialog_reopen")
+                for mode in DIALOG_MODES] + [Benchmark("command_preview[infobase update, 32 keystrokes]", run)]
+
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication
+        from ui.command_dialogs import CommandDialog
+    except ImportError as e:
+        return skipped(f"PyQt6 недоступен: {e}")
+
+    app = QApplication.instance() or QApplication([])
+    commands = RACCommands.get_all_commands()
+
+    def construct(mode: str):
+        def run():
+            dialog = CommandDialog(mode, commands[mode], env.executor, env.logger, "localhost", "1545")
+            dialog.show()
+            dialog.hide()
+            dialog.deleteLater()
+            app.processEvents()
+        return run
+
+    # Повторное открытие диалога, сохраненного главным окном, с другим хостом
+    dialogs = {}
+
+    def reopen(mode: str):
+        def run():
+            dialog = dialogs.get(mode)
+            if dialog is None:
+                dialog = dialogs[mode] = CommandDialog(mode, commands[mode], env.executor, env.logger,
+                                                       "localhost", "1545")
+            dialog.set_connection("srv1" if dialog.host != "srv1" else "srv2", "1545")
+            dialog.show()
+            dialog.hide()
+        return run
+
+    # Ввод пароля из 32 символов в поле команды infobase update с пересчетом предпросмотра на каждый символ
+    preview_dialog = CommandDialog("infobase", commands["infobase"], env.executor, env.logger, "localhost", "1545")
+    preview_tab = next(index for index, data in enumerate(preview_dialog.tabs_data)
+                       if data.command.command == "update")
+    preview_dialog.ensure_tab(preview_tab)
+    password_edit = preview_dialog.tabs_data[preview_tab].param_widgets["infobase-pwd"]
+    password = "$(infobase_pwd)" + "x" * 17
+
+    def type_password():
+        for length in range(1, len(password) + 1):
+            password_edit.setText(password[:length])
+            preview_dialog.refresh_previews()
+
+    return ([Benchmark(f"command_dialog[{mode}]", construct(mode), 3) for mode in DIALOG_MODES] +
+            [Benchmark(f"command_dialog_reopen[{mode}]", reopen(mode), 20) for mode in DIALOG_MODES] +
+            [Benchmark("command_preview[infobase update, 32 keystrokes]", type_password, 5)])
+
+
+def git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def load_previous(path: str) -> Optional[dict]:
+    """Последняя запись истории замеров"""
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                previous = json.loads(line)
+    return previous
+
+
+def format_time(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:9.2f} мкс"
+    if seconds < 1:
+        return f"{seconds * 1e3:9.2f} мс"
+    return f"{seconds:9.2f} с"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности RAC Admin GUI")
+    parser.add_argument("-k", dest="filter", default="", help="запускать только замеры, содержащие подстроку")
+    parser.add_argument("--repeat", type=int, default=5, help="число повторов каждого замера")
+    parser.add_argument("--history", default=DEFAULT_HISTORY, help="файл истории замеров (JSON Lines)")
+    parser.add_argument("--no-save", action="store_true", help="не дописывать результат в историю")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="относительное замедление, считающееся регрессией (0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="код возврата 1 при регрессиях")
+    args = parser.parse_args()
+
+    env = BenchmarkEnvironment()
+    results: Dict[str, dict] = {}
+    try:
+        for benchmark in build_benchmarks(env):
+            if args.filter not in benchmark.name:
+                continue
+            try:
+                results[benchmark.name] = benchmark.run(max(1, args.repeat))
+            except BenchmarkSkipped as e:
+                print(f"{benchmark.name:45} пропущен: {e}")
+    finally:
+        env.close()
+
+    previous = load_previous(args.history)
+    previous_results = previous["results"] if previous else {}
+    regressions = []
+    for name, result in results.items():
+        line = f"{name:45} {format_time(result['median'])} (мин {format_time(result['min']).strip()})"
+        before = previous_results.get(name)
+        if before:
+            change = result["median"] / before["median"] - 1
+            line += f"  {change:+.1%} к {previous.get('revision') or 'предыдущему'}"
+            if change > args.threshold:
+                line += "  РЕГРЕССИЯ"
+                regressions.append(name)
+        print(line)
+
+    if results and not args.no_save:
+        entry = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.history)), exist_ok=True)
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
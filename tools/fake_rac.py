@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""Эмулятор утилиты rac с синтетическим кластером для тестов и замеров
+
+Понимает режимы и команды из RACCommands.get_all_commands(), проверяет
+обязательные параметры и выводит записи в формате rac в кодировке cp866.
+Записи генерируются детерминированно и выводятся по мере генерации, поэтому
+даже 100 тысяч блокировок не требуют памяти под весь список.
+
+Использование: указать путь к скрипту в переменной rac_path или передать
+его в консольный режим: python -m core --rac tools/fake_rac.py cluster list
+
+Топология и поведение задаются переменными окружения:
+    FAKE_RAC_CLUSTERS     число кластеров (1)
+    FAKE_RAC_SERVERS      рабочих серверов на кластер (2)
+    FAKE_RAC_INFOBASES    информационных баз всего (10)
+    FAKE_RAC_SESSIONS     сеансов всего (100)
+    FAKE_RAC_LOCKS        блокировок всего (100)
+    FAKE_RAC_LATENCY      задержка перед выводом, секунды (0)
+    FAKE_RAC_ERROR_RATE   доля команд, завершающихся ошибкой, 0..1 (0)
+    FAKE_RAC_SEED         начальное значение генератора (0)
+    FAKE_RAC_VERSION      версия, выводимая по --version (8.3.24.1342)
+
+Базы, сеансы и блокировки распределяются между кластерами поровну.
+Изменяющие команды проверяют параметры и ничего не выводят. Справка
+rac help <режим> выводится в формате rac по описаниям команд каталога.
+"""
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.rac_commands import RACCommands, ParamType  # noqa: E402
+from core.rac_parser import RacRecord  # noqa: E402
+
+# Код завершения rac при ошибке
+ERROR_EXIT_CODE = 255
+ENCODING = "cp866"
+DEFAULT_VERSION = "8.3.24.1342"
+# Обозначение значения параметра в справке rac
+HELP_PLACEHOLDERS = {ParamType.UUID: "<uuid>", ParamType.PASSWORD: "<pwd>", ParamType.INTEGER: "<number>",
+                     ParamType.PORT: "<port>", ParamType.HOST: "<host>", ParamType.STRING: "<string>"}
+NAMESPACE = uuid.UUID("0c6f2a7e-6f0b-4a55-9d43-7a1c5e0d3b21")
+BASE_TIME = datetime(2024, 1, 15, 9, 0, 0)
+USER_NAMES = ["Администратор", "Иванов", "Петров", "Сидорова", "Кузнецов", "Бухгалтер", "Склад", "Обмен"]
+APP_IDS = ["1CV8C", "1CV8", "WebClient", "Designer", "BackgroundJob", "COMConnection"]
+LOCK_OBJECTS = ["РегистрНакопления.ТоварыНаСкладах", "Документ.РеализацияТоваровУслуг",
+                "Справочник.Номенклатура", "РегистрСведений.ЦеныНоменклатуры", "Константа.ОсновнаяВалюта"]
+
+
+class FakeRacError(Exception):
+    """Ошибка, которую rac выводит в stderr"""
+
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+@lru_cache(maxsize=None)
+def stable_uuid(seed: str, kind: str, indexes: Tuple[int, ...]) -> uuid.UUID:
+    """Детерминированный UUID объекта (базы и процессы запрашиваются многократно)"""
+    return uuid.uuid5(NAMESPACE, f"{seed}:{kind}:{':'.join(map(str, indexes))}")
+
+
+def render_value(value: Any) -> str:
+    """Значение в формате rac; строки с пробелами выводятся в кавычках"""
+    if value is True:
+        return "yes"
+    if value is False:
+        return "no"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and (" " in value or '"' in value):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+@lru_cache(maxsize=None)
+def key_prefix(key: str, width: int) -> bytes:
+    return f"{key.ljust(width)} : ".encode(ENCODING)
+
+
+def render_record(record: RacRecord) -> bytes:
+    """Запись целиком в cp866; перекодируются только не-ASCII значения (charmap-кодек медленный)"""
+    width = max(map(len, record))
+    parts = []
+    for key, value in record.items():
+        text = render_value(value)
+        parts.append(key_prefix(key, width))
+        parts.append(text.encode("ascii") if text.isascii() else text.encode(ENCODING, "replace"))
+        parts.append(b"\n")
+    parts.append(b"\n")
+    return b"".join(parts)
+
+
+def render_param_help(param, indent: str) -> List[str]:
+    if param.param_type == ParamType.BOOLEAN:
+        usage = f"--{param.name}"
+    elif param.param_type == ParamType.ENUM:
+        usage = f"--{param.name}=<{'|'.join(param.enum_values)}>"
+    else:
+        usage = f"--{param.name}={HELP_PLACEHOLDERS[param.param_type]}"
+    if param.short_name:
+        usage += f" | -{param.short_name}"
+    description = param.description[:1].lower() + param.description[1:]
+    if param.required:
+        description = f"(обязательный) {description}"
+    return [f"{indent}{usage}", f"{indent}    {description}", ""]
+
+
+def render_help(mode: str) -> str:
+    """Справка режима в формате rac help <режим>
+
+    Как и настоящая rac, параметры, которые есть у всех команд режима
+    (cluster, cluster-user, cluster-pwd), выводятся один раз в разделе
+    «Общие параметры», а не у каждой команды.
+    """
+    commands = RACCommands.get_all_commands()
+    if mode not in commands or mode == "help":
+        raise FakeRacError(f"Неизвестный режим: {mode}")
+    mode_commands = commands[mode]
+    common = [param for param in mode_commands[0].parameters
+              if all(param in command.parameters for command in mode_commands[1:])] if len(mode_commands) > 1 else []
+
+    lines = [f"1С:Предприятие 8.3 (x86-64) ({rac_version()}). Утилита администрирования кластера серверов", "",
+             f"rac [<адрес>[:<порт>]] {mode} <команда> [<параметры команды>...]", "",
+             "Общие параметры:", "",
+             "    --version | -v", "        получение версии утилиты", "",
+             "    --help | -h | -?", "        вывод краткой информации об утилите", ""]
+    for param in common:
+        lines += render_param_help(param, "    ")
+    lines += ["Команды:", ""]
+    for command in mode_commands:
+        lines += [f"    {command.command}", f"        {command.description[:1].lower()}{command.description[1:]}", ""]
+        for param in command.parameters:
+            if param not in common:
+                lines += render_param_help(param, "        ")
+    return "\n".join(lines)
+
+
+def rac_version() -> str:
+    return os.environ.get("FAKE_RAC_VERSION") or DEFAULT_VERSION
+
+
+def share(total: int, parts: int, index: int) -> int:
+    """Число объектов, приходящихся на часть index при равном распределении"""
+    return total // parts + (1 if index < total % parts else 0) if parts else 0
+
+
+class Topology:
+    """Синтетический кластер: объекты вычисляются по индексам, без хранения списков"""
+
+    def __init__(self):
+        self.clusters = max(1, env_int("FAKE_RAC_CLUSTERS", 1))
+        self.servers = max(1, env_int("FAKE_RAC_SERVERS", 2))
+        self.infobases = env_int("FAKE_RAC_INFOBASES", 10)
+        self.sessions = env_int("FAKE_RAC_SESSIONS", 100)
+        self.locks = env_int("FAKE_RAC_LOCKS", 100)
+        self.seed = os.environ.get("FAKE_RAC_SEED", "0")
+
+    def uid(self, kind: str, *indexes: int) -> uuid.UUID:
+        return stable_uuid(self.seed, kind, indexes)
+
+    def random(self, kind: str, *indexes: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{':'.join(map(str, indexes))}")
+
+    def find_cluster(self, value: str) -> int:
+        for index in range(self.clusters):
+            if str(self.uid("cluster", index)) == value:
+                return index
+        raise FakeRacError(f"Кластер с идентификатором {value} не найден")
+
+    def infobase_count(self, cluster: int) -> int:
+        return share(self.infobases, self.clusters, cluster)
+
+    def session_count(self, cluster: int) -> int:
+        return share(self.sessions, self.clusters, cluster)
+
+    def lock_count(self, cluster: int) -> int:
+        return share(self.locks, self.clusters, cluster)
+
+    def find_index(self, kind: str, cluster: int, count: int, value: str) -> int:
+        for index in range(count):
+            if str(self.uid(kind, cluster, index)) == value:
+                return index
+        raise FakeRacError(f"Объект {kind} с идентификатором {value} не найден")
+
+    # Записи объектов
+
+    def cluster(self, index: int) -> RacRecord:
+        return {
+            "cluster": self.uid("cluster", index),
+            "host": f"srv-1c-{index + 1:02d}",
+            "port": 1541 + index * 100,
+            "name": f"Кластер {index + 1}",
+            "expiration-timeout": 60,
+            "lifetime-limit": 86400,
+            "max-memory-size": 0,
+            "max-memory-time-limit": 0,
+            "security-level": 0,
+            "session-fault-tolerance-level": 0,
+            "load-balancing-mode": "performance",
+            "errors-count-threshold": 0,
+            "kill-problem-processes": True,
+            "kill-by-memory-with-dump": False,
+        }
+
+    def manager(self, cluster: int) -> RacRecord:
+        return {
+            "manager": self.uid("manager", cluster, 0),
+            "pid": 4000 + cluster,
+            "using": "normal",
+            "host": f"srv-1c-{cluster + 1:02d}",
+            "main-port": 1541 + cluster * 100,
+            "descr": "Главный менеджер кластера",
+        }
+
+    def server(self, cluster: int, index: int) -> RacRecord:
+        return {
+            "server": self.uid("server", cluster, index),
+            "agent-host": f"srv-1c-{cluster + 1:02d}-{index + 1}",
+            "agent-port": 1540,
+            "port-range": "1560:1591",
+            "name": f"Рабочий сервер {index + 1}",
+            "using": "main",
+            "dedicate-managers": "none",
+            "infobases-limit": 8,
+            "memory-limit": 0,
+            "connections-limit": 256,
+            "safe-working-processes-memory-limit": 0,
+            "safe-call-memory-limit": 0,
+            "cluster-port": 1541 + cluster * 100,
+            "critical-total-memory": 0,
+        }
+
+    def process(self, cluster: int, index: int) -> RacRecord:
+        rnd = self.random("process", cluster, index)
+        return {
+            "process": self.uid("process", cluster, index),
+            "host": f"srv-1c-{cluster + 1:02d}-{index + 1}",
+            "port": 1560 + index,
+            "pid": 10000 + cluster * 100 + index,
+            "turned-on": True,
+            "running": True,
+            "started-at": BASE_TIME,
+            "use": "used",
+            "available-perfomance": rnd.randint(100, 300),
+            "capacity": 1000,
+            "connections": 0,
+            "memory-size": rnd.randint(500000, 4000000),
+            "memory-excess-time": 0,
+            "selection-size": 0,
+            "avg-call-time": round(rnd.uniform(0.01, 0.5), 3),
+            "reserve": False,
+        }
+
+    def infobase(self, cluster: int, index: int) -> RacRecord:
+        return {
+            "infobase": self.uid("infobase", cluster, index),
+            "name": f"base{cluster + 1:02d}_{index + 1:03d}",
+            "descr": f"Информационная база {index + 1}",
+        }
+
+    def infobase_info(self, cluster: int, index: int) -> RacRecord:
+        record = self.infobase(cluster, index)
+        record.update({
+            "dbms": "PostgreSQL",
+            "db-server": f"db-{cluster + 1:02d}",
+            "db-name": record["name"],
+            "db-user": "postgres",
+            "security-level": 0,
+            "license-distribution": "allow",
+            "scheduled-jobs-deny": False,
+            "sessions-deny": False,
+            "denied-from": "",
+            "denied-message": "",
+            "denied-parameter": "",
+            "denied-to": "",
+            "permission-code": "",
+            "external-session-manager-connection-string": "",
+            "external-session-manager-required": False,
+            "security-profile-name": "",
+            "safe-mode-security-profile-name": "",
+            "reserve-working-processes": False,
+        })
+        return record
+
+    def session(self, cluster: int, index: int) -> RacRecord:
+        rnd = self.random("session", cluster, index)
+        infobases = self.infobase_count(cluster)
+        started = BASE_TIME + timedelta(seconds=rnd.randint(0, 8 * 3600))
+        return {
+            "session": self.uid("session", cluster, index),
+            "session-id": index + 1,
+            "infobase": self.uid("infobase", cluster, index % infobases) if infobases else "",
+            "connection": self.uid("connection", cluster, index),
+            "process": self.uid("process", cluster, index % self.servers),
+            "user-name": rnd.choice(USER_NAMES),
+            "host": f"ws-{rnd.randint(1, 500):03d}",
+            "app-id": rnd.choice(APP_IDS),
+            "locale": "ru_RU",
+            "started-at": started,
+            "last-active-at": started + timedelta(seconds=rnd.randint(0, 3600)),
+            "hibernate": False,
+            "passive-session-hibernate-time": 1200,
+            "hibernate-session-terminate-time": 86400,
+            "blocked-by-dbms": 0,
+            "blocked-by-ls": 0,
+            "bytes-all": rnd.randint(0, 10 ** 9),
+            "bytes-last-5min": rnd.randint(0, 10 ** 6),
+            "calls-all": rnd.randint(0, 10 ** 5),
+            "calls-last-5min": rnd.randint(0, 500),
+            "dbms-bytes-all": rnd.randint(0, 10 ** 9),
+            "dbms-bytes-last-5min": rnd.randint(0, 10 ** 6),
+            "db-proc-info": "",
+            "db-proc-took": 0,
+            "db-proc-took-at": "",
+            "duration-all": rnd.randint(0, 10 ** 6),
+            "duration-all-dbms": rnd.randint(0, 10 ** 5),
+            "duration-current": 0,
+            "duration-current-dbms": 0,
+            "duration-last-5min": rnd.randint(0, 10 ** 4),
+            "duration-last-5min-dbms": rnd.randint(0, 10 ** 3),
+            "memory-current": rnd.randint(0, 10 ** 7),
+            "memory-last-5min": rnd.randint(0, 10 ** 8),
+            "memory-total": rnd.randint(0, 10 ** 9),
+            "read-current": 0,
+            "read-last-5min": rnd.randint(0, 10 ** 6),
+            "read-total": rnd.randint(0, 10 ** 8),
+            "write-current": 0,
+            "write-last-5min": rnd.randint(0, 10 ** 5),
+            "write-total": rnd.randint(0, 10 ** 7),
+            "duration-current-service": 0,
+            "duration-last-5min-service": 0,
+            "duration-all-service": 0,
+            "current-service-name": "",
+            "cpu-time-current": 0,
+            "cpu-time-last-5min": rnd.randint(0, 10 ** 4),
+            "cpu-time-total": rnd.randint(0, 10 ** 6),
+            "data-separation": "",
+            "client-ip": f"10.0.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}",
+        }
+
+    def connection(self, cluster: int, index: int) -> RacRecord:
+        session = self.session(cluster, index)
+        return {
+            "connection": session["connection"],
+            "conn-id": index + 1,
+            "host": session["host"],
+            "process": session["process"],
+            "infobase": session["infobase"],
+            "application": session["app-id"],
+            "connected-at": session["started-at"],
+            "session-number": session["session-id"],
+            "blocked-by-ls": 0,
+        }
+
+    def lock(self, cluster: int, index: int) -> RacRecord:
+        rnd = self.random("lock", cluster, index)
+        sessions = self.session_count(cluster)
+        session_index = index % sessions if sessions else 0
+        infobases = self.infobase_count(cluster)
+        return {
+            "connection": self.uid("connection", cluster, session_index) if sessions else "",
+            "session": self.uid("session", cluster, session_index) if sessions else "",
+            "object": self.uid("lock-object", cluster, index),
+            "locked": BASE_TIME + timedelta(seconds=rnd.randint(0, 8 * 3600)),
+            "descr": f"{'Разделяемая' if rnd.random() < 0.7 else 'Исключительная'} "
+                     f"{rnd.choice(LOCK_OBJECTS)}",
+            # Служебное поле для отбора по базе, в вывод не попадает
+            "_infobase": self.uid("infobase", cluster, session_index % infobases) if infobases else "",
+        }
+
+
+def parse_args(argv: List[str]) -> Tuple[Optional[str], List[str], Dict[str, str]]:
+    """Разбор аргументов rac: [host:port] режим команда... --параметр[=значение]"""
+    endpoint = None
+    positional = []
+    params = {}
+    for index, arg in enumerate(argv):
+        if arg.startswith("--"):
+            name, _, value = arg[2:].partition("=")
+            params[name] = value.strip('"')
+        elif index == 0 and ":" in arg:
+            endpoint = arg
+        else:
+            positional.append(arg)
+    return endpoint, positional, params
+
+
+class FakeRac:
+    """Выполнение команды rac над синтетической топологией"""
+
+    def __init__(self, topology: Topology):
+        self.topology = topology
+
+    def run(self, mode: str, command: str, params: Dict[str, str]) -> Iterator[RacRecord]:
+        if mode == "help" and not command:
+            command = "help"
+        rac_command = RACCommands.find_command(mode, command)
+        if rac_command is None:
+            raise FakeRacError(f"Неизвестная команда: {mode} {command}".strip())
+        missing = [param.name for param in rac_command.parameters
+                   if param.required and not params.get(param.name)]
+        if missing:
+            raise FakeRacError(f"Не задан обязательный параметр: --{missing[0]}")
+
+        handler = getattr(self, f"{mode}_{command.replace(' ', '_').replace('-', '_')}", None)
+        if handler is None:
+            # Изменяющие и не моделируемые команды завершаются без вывода
+            return iter(())
+        return handler(params)
+
+    def _cluster(self, params: Dict[str, str]) -> int:
+        return self.topology.find_cluster(params["cluster"])
+
+    def help_help(self, params):
+        yield {"usage": "rac [host[:port]] <mode> <command> [options]"}
+
+    def agent_version(self, params):
+        yield {"version": rac_version()}
+
+    def agent_admin_list(self, params):
+        yield {"name": "admin", "auth": "pwd", "os-user": "", "descr": ""}
+
+    def cluster_list(self, params):
+        for index in range(self.topology.clusters):
+            yield self.topology.cluster(index)
+
+    def cluster_info(self, params):
+        yield self.topology.cluster(self._cluster(params))
+
+    def cluster_admin_list(self, params):
+        return iter(())
+
+    def manager_list(self, params):
+        yield self.topology.manager(self._cluster(params))
+
+    def manager_info(self, params):
+        cluster = self._cluster(params)
+        if params["manager"] != str(self.topology.uid("manager", cluster, 0)):
+            raise FakeRacError(f"Менеджер с идентификатором {params['manager']} не найден")
+        yield self.topology.manager(cluster)
+
+    def server_list(self, params):
+        cluster = self._cluster(params)
+        for index in range(self.topology.servers):
+            yield self.topology.server(cluster, index)
+
+    def server_info(self, params):
+        cluster = self._cluster(params)
+        yield self.topology.server(cluster, self.topology.find_index(
+            "server", cluster, self.topology.servers, params["server"]))
+
+    def process_list(self, params):
+        cluster = self._cluster(params)
+        for index in range(self.topology.servers):
+            if params.get("server") and params["server"] != str(self.topology.uid("server", cluster, index)):
+                continue
+            yield self.topology.process(cluster, index)
+
+    def process_info(self, params):
+        cluster = self._cluster(params)
+        yield self.topology.process(cluster, self.topology.find_index(
+            "process", cluster, self.topology.servers, params["process"]))
+
+    def service_list(self, params):
+        self._cluster(params)
+        for name in ("EventLogService", "SessionDataService", "JobService", "LicenseService"):
+            yield {"name": name, "main-only": 0, "manager": "", "descr": ""}
+
+    def infobase_summary_list(self, params):
+        cluster = self._cluster(params)
+        for index in range(self.topology.infobase_count(cluster)):
+            yield self.topology.infobase(cluster, index)
+
+    def _infobase_index(self, cluster: int, params) -> int:
+        return self.topology.find_index("infobase", cluster, self.topology.infobase_count(cluster),
+                                        params["infobase"])
+
+    def infobase_summary_info(self, params):
+        cluster = self._cluster(params)
+        yield self.topology.infobase(cluster, self._infobase_index(cluster, params))
+
+    def infobase_info(self, params):
+        cluster = self._cluster(params)
+        yield self.topology.infobase_info(cluster, self._infobase_index(cluster, params))
+
+    def session_list(self, params):
+        cluster = self._cluster(params)
+        infobase = params.get("infobase")
+        for index in range(self.topology.session_count(cluster)):
+            record = self.topology.session(cluster, index)
+            if infobase and str(record["infobase"]) != infobase:
+                continue
+            yield record
+
+    def session_info(self, params):
+        cluster = self._cluster(params)
+        yield self.topology.session(cluster, self.topology.find_index(
+            "session", cluster, self.topology.session_count(cluster), params["session"]))
+
+    def connection_list(self, params):
+        cluster = self._cluster(params)
+        for index in range(self.topology.session_count(cluster)):
+            record = self.topology.connection(cluster, index)
+            if params.get("infobase") and str(record["infobase"]) != params["infobase"]:
+                continue
+            if params.get("process") and str(record["process"]) != params["process"]:
+                continue
+            yield record
+
+    def connection_info(self, params):
+        cluster = self._cluster(params)
+        yield self.topology.connection(cluster, self.topology.find_index(
+            "connection", cluster, self.topology.session_count(cluster), params["connection"]))
+
+    def lock_list(self, params):
+        cluster = self._cluster(params)
+        for index in range(self.topology.lock_count(cluster)):
+            record = self.topology.lock(cluster, index)
+            infobase = record.pop("_infobase")
+            if params.get("infobase") and str(infobase) != params["infobase"]:
+                continue
+            if params.get("session") and str(record["session"]) != params["session"]:
+                continue
+            if params.get("connection") and str(record["connection"]) != params["connection"]:
+                continue
+            yield record
+
+
+def should_fail(argv: List[str]) -> bool:
+    """Внесение ошибки с заданной вероятностью (детерминированно при FAKE_RAC_SEED)"""
+    rate = env_float("FAKE_RAC_ERROR_RATE", 0)
+    if not rate:
+        return False
+    seed = os.environ.get("FAKE_RAC_SEED")
+    rnd = random.Random(f"{seed}:{' '.join(argv)}") if seed is not None else random.Random()
+    return rnd.random() < rate
+
+
+def main(argv: List[str] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    stdout = sys.stdout.buffer
+
+    latency = env_float("FAKE_RAC_LATENCY", 0)
+    if latency:
+        time.sleep(latency)
+
+    _, positional, params = parse_args(argv)
+    try:
+        if should_fail(argv):
+            raise FakeRacError("Ошибка соединения с сервером администрирования (внесенная ошибка)")
+        if not positional and "version" in params:
+            stdout.write(f"{rac_version()}\n".encode(ENCODING))
+            return 0
+        if not positional:
+            raise FakeRacError("Не указан режим")
+        if positional[0] == "help" and len(positional) == 2:
+            stdout.write(render_help(positional[1]).encode(ENCODING, "replace"))
+            return 0
+        records = FakeRac(Topology()).run(positional[0], " ".join(positional[1:]), params)
+        for record in records:
+            stdout.write(render_record(record))
+    except FakeRacError as e:
+        sys.stderr.buffer.write(f"Ошибка: {e}\n".encode(ENCODING, "replace"))
+        sys.stderr.buffer.flush()
+        return ERROR_EXIT_CODE
+    except BrokenPipeError:
+        # Читатель закрыл канал (например, команда отменена)
+        return 0
+    finally:
+        try:
+            stdout.flush()
+        except BrokenPipeError:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
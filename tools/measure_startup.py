@@ -0,0 +1,50 @@
+"""Сравнение времени холодного запуска консольного и графического режимов
+
+Каждый вариант запускается в отдельном процессе интерпретатора N раз,
+выводится медиана. Графический путь измеряется импортом главного окна
+(без создания QApplication); без PyQt6 он отмечается как недоступный.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = {
+    "cli": [sys.executable, "-m", "core", "--list-commands"],
+    "gui-import": [sys.executable, "-c", "from ui.main_window import MainWindow"],
+}
+
+
+def measure(command: List[str], runs: int) -> Optional[List[float]]:
+    """Время выполнения команды в секундах, None если команда завершилась ошибкой"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        timings.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            return None
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время холодного запуска CLI и GUI")
+    parser.add_argument("--runs", type=int, default=10, help="число запусков каждого варианта")
+    args = parser.parse_args()
+
+    for name, command in TARGETS.items():
+        timings = measure(command, args.runs)
+        if timings is None:
+            print(f"{name:12} недоступно (ошибка запуска, например не установлен PyQt6)")
+            continue
+        print(f"{name:12} медиана {statistics.median(timings) * 1000:8.1f} мс, "
+              f"мин {min(timings) * 1000:8.1f} мс ({args.runs} запусков)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Заглушка сервера RAS, воспроизводящая записанные обмены протокола
+
+Режимы:
+    replay FILE [--port 1545]                 — ответы по записи обменов
+    record FILE --upstream HOST:PORT [--port]  — прокси к настоящему RAS с записью обменов
+    sample FILE                                — синтетическая запись для проверки клиента
+
+Файл записи — JSON вида {"exchanges": [{"request": "<hex>", "response": "<hex>"}, ...]}.
+"""
+import argparse
+import json
+import os
+import select
+import socket
+import socketserver
+import sys
+import threading
+import uuid
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import ras_protocol as proto  # noqa: E402
+from core.ras_protocol import Encoder  # noqa: E402
+
+Exchange = Tuple[bytes, bytes]
+
+
+def load_recording(path: str) -> List[Exchange]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [(bytes.fromhex(item["request"]), bytes.fromhex(item["response"])) for item in data["exchanges"]]
+
+
+def save_recording(path: str, exchanges: List[Exchange]):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"exchanges": [{"request": request.hex(), "response": response.hex()}
+                                 for request, response in exchanges]}, f, indent=2)
+
+
+class ReplayServer(socketserver.ThreadingTCPServer):
+    """TCP-сервер, отвечающий записанными ответами на совпадающие запросы
+
+    Запросы сопоставляются по содержимому, а не по порядку: клиент может
+    переиспользовать соединение из пула и пропускать повторную аутентификацию.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, exchanges: List[Exchange], address=("127.0.0.1", 1545)):
+        # Длинные запросы проверяются первыми, чтобы префикс не перехватил их
+        self.exchanges = sorted(exchanges, key=lambda item: len(item[0]), reverse=True)
+        super().__init__(address, ReplayHandler)
+
+
+class ReplayHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        buffer = b""
+        while True:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                return
+            buffer += chunk
+
+            matched = True
+            while buffer and matched:
+                matched = False
+                for request, response in self.server.exchanges:
+                    if buffer.startswith(request):
+                        buffer = buffer[len(request):]
+                        if response:
+                            self.request.sendall(response)
+                        matched = True
+                        break
+
+            # Начало неизвестного запроса — ждем продолжения, иначе закрываем соединение
+            if buffer and not any(request.startswith(buffer) for request, _ in self.server.exchanges):
+                sys.stderr.write(f"Нет записанного ответа на запрос: {buffer[:64].hex()}\n")
+                return
+
+
+def run_recording_proxy(path: str, upstream: Tuple[str, int], listen: Tuple[str, int]):
+    """Прокси между клиентом и настоящим RAS, сохраняющий обмены в файл"""
+    exchanges: List[Exchange] = load_recording(path) if os.path.exists(path) else []
+    lock = threading.Lock()
+
+    def serve(client: socket.socket):
+        server = socket.create_connection(upstream)
+        request, response = b"", b""
+        sockets = [client, server]
+        try:
+            while True:
+                readable, _, _ = select.select(sockets, [], [])
+                for sock in readable:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    if sock is client:
+                        # Новый запрос после полученного ответа — закрываем предыдущий обмен
+                        if response:
+                            with lock:
+                                exchanges.append((request, response))
+                            request, response = b"", b""
+                        request += data
+                        server.sendall(data)
+                    else:
+                        response += data
+                        client.sendall(data)
+        finally:
+            with lock:
+                if request:
+                    exchanges.append((request, response))
+                save_recording(path, exchanges)
+            client.close()
+            server.close()
+
+    listener = socket.create_server(listen)
+    print(f"Запись обменов {listen[0]}:{listen[1]} -> {upstream[0]}:{upstream[1]} в {path}")
+    while True:
+        client, _ = listener.accept()
+        threading.Thread(target=serve, args=(client,), daemon=True).start()
+
+
+def build_sample_recording(endpoint_id: int = 1) -> List[Exchange]:
+    """Синтетические обмены для кластера с тремя базами, собранные кодеком клиента"""
+    cluster_id = uuid.UUID("6d6958e1-a96c-4999-a995-698a0298161e")
+    clusters = [{"cluster": cluster_id, "host": "srv-1c", "port": 1541, "name": "Локальный кластер",
+                 "lifetime-limit": 86400, "load-balancing-mode": "performance",
+                 "kill-problem-processes": True}]
+    infobases = [{"infobase": uuid.UUID(int=cluster_id.int + i), "name": f"base{i}", "descr": f"База {i}"}
+                 for i in range(1, 4)]
+
+    def reply(message_type: int, payload: bytes) -> bytes:
+        body = Encoder().size(endpoint_id).short(0).byte(proto.MESSAGE).byte(message_type).to_bytes() + payload
+        return proto.encode_packet(proto.PACKET_ENDPOINT_MESSAGE, body)
+
+    void = proto.encode_packet(proto.PACKET_ENDPOINT_MESSAGE,
+                               Encoder().size(endpoint_id).short(0).byte(proto.MESSAGE_VOID).to_bytes())
+
+    clusters_payload = Encoder().size(len(clusters))
+    for record in clusters:
+        proto.encode_cluster_info(clusters_payload, record)
+    infobases_payload = Encoder().size(len(infobases))
+    for record in infobases:
+        proto.encode_infobase_summary(infobases_payload, record)
+
+    open_body = Encoder().string(proto.SERVICE_NAME).string(proto.SERVICE_VERSION).params({}).to_bytes()
+    ack_body = Encoder().string(proto.SERVICE_NAME).string(proto.SERVICE_VERSION).size(endpoint_id).to_bytes()
+
+    def request(message_type: int, payload: bytes = b"") -> bytes:
+        return proto.encode_endpoint_message(endpoint_id, message_type, payload)
+
+    return [
+        (proto.encode_negotiate(), b""),
+        (proto.encode_packet(proto.PACKET_CONNECT, Encoder().params({"connect.timeout": 2000}).to_bytes()),
+         proto.encode_packet(proto.PACKET_CONNECT_ACK, b"")),
+        (proto.encode_packet(proto.PACKET_ENDPOINT_OPEN, open_body),
+         proto.encode_packet(proto.PACKET_ENDPOINT_OPEN_ACK, ack_body)),
+        (proto.encode_packet(proto.PACKET_DISCONNECT, b""), b""),
+        (request(proto.GET_CLUSTERS_REQUEST), reply(proto.GET_CLUSTERS_RESPONSE, clusters_payload.to_bytes())),
+        (request(proto.AUTHENTICATE_REQUEST, Encoder().uuid(cluster_id).string("").string("").to_bytes()), void),
+        (request(proto.GET_CLUSTER_INFO_REQUEST, Encoder().uuid(cluster_id).to_bytes()),
+         reply(proto.GET_CLUSTER_INFO_RESPONSE, proto.encode_cluster_info(Encoder(), clusters[0]).to_bytes())),
+        (request(proto.GET_INFOBASES_SHORT_REQUEST, Encoder().uuid(cluster_id).to_bytes()),
+         reply(proto.GET_INFOBASES_SHORT_RESPONSE, infobases_payload.to_bytes())),
+        (request(proto.AUTHENTICATE_AGENT_REQUEST, Encoder().string("").string("").to_bytes()), void),
+        (request(proto.GET_AGENT_VERSION_REQUEST),
+         reply(proto.GET_AGENT_VERSION_RESPONSE, Encoder().string("8.3.24.1342").to_bytes())),
+    ]
+
+
+def parse_address(value: str, default_port: int) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return (host or value, int(port)) if port.isdigit() else (value, default_port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушка сервера RAS для проверки клиента без 1С")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    replay = subparsers.add_parser("replay", help="воспроизведение записанных обменов")
+    replay.add_argument("file")
+    replay.add_argument("--host", default="127.0.0.1")
+    replay.add_argument("--port", type=int, default=1545)
+
+    record = subparsers.add_parser("record", help="запись обменов с настоящим RAS")
+    record.add_argument("file")
+    record.add_argument("--upstream", required=True, help="адрес RAS, host:port")
+    record.add_argument("--host", default="127.0.0.1")
+    record.add_argument("--port", type=int, default=1546)
+
+    sample = subparsers.add_parser("sample", help="создание синтетической записи")
+    sample.add_argument("file")
+
+    args = parser.parse_args()
+
+    if args.action == "sample":
+        save_recording(args.file, build_sample_recording())
+        print(f"Запись сохранена: {args.file}")
+    elif args.action == "record":
+        run_recording_proxy(args.file, parse_address(args.upstream, 1545), (args.host, args.port))
+    else:
+        server = ReplayServer(load_recording(args.file), (args.host, args.port))
+        print(f"Заглушка RAS слушает {args.host}:{args.port}")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,59 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget,
                              QWidget, QFormLayout, QLineEdit, QComboBox,
                              QCheckBox, QPushButton, QTextEdit, QGroupBox,
-                             QMessageBox, QScrollArea, QLabel)
-from PyQt6.QtCore import Qt, pyqtSignal
+                             QMessageBox, QScrollArea, QLabel, QTableWidget,
+                             QTableWidgetItem, QSplitter)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
 
 from core.rac_commands import RacCommand, CommandParam, ParamType
+from core.rac_parser import format_value
+from core.fanout import FanOutResult, parse_hosts
 from core.command_executor import RACCommandExecutor
+from core.async_executor import AsyncCommandExecutor
+from core.entity_index import ENTITY_SOURCES, EntityPrefetcher
 from core.logger import RACLogger
+from core.profiling import traced
+from ui.command_runner import CommandRunner
+from ui.entity_completer import EntityCompleter
+
+# Пауза после последнего изменения поля перед пересчетом предпросмотра
+PREVIEW_DELAY_MS = 50
 
 
 class TabData:
     """Класс для хранения данных вкладки"""
 
     def __init__(self):
+        # Страница вкладки; содержимое создается при первом открытии вкладки
+        self.page = None
         self.param_widgets = {}
+        # Аргументы предпросмотра по параметрам: (со ссылками $(имя), с подстановкой)
+        # и параметры, измененные после последнего пересчета
+        self.fragments = {}
+        self.dirty_params = set()
         self.preview_text = None
         self.command = None
+        self.execute_button = None
+        self.cancel_button = None
+        self.running_command_id = None
+        self.running_command_str = ""
 
 
 class CommandDialog(QDialog):
-    command_executed = pyqtSignal(bool, str, str)  # success, command, output
+    """Диалог команд режима
+
+    Вкладки команд создаются пустыми, а поля параметров, предпросмотр и
+    кнопки — при первом переключении на вкладку. Главное окно хранит
+    диалог режима и при повторном открытии показывает его снова, меняя
+    только хост и порт (set_connection). Пока диалог открыт, prefetcher
+    загружает объекты его хоста для автодополнения UUID-параметров.
+    """
+    command_executed = pyqtSignal(bool, str, object)  # success, command, records или текст ошибки
 
     def __init__(self, mode: str, commands: list, executor: RACCommandExecutor,
-                 logger: RACLogger, host: str, port: str, parent=None):
+                 logger: RACLogger, host: str, port: str, parent=None,
+                 runner: CommandRunner = None, prefetcher: EntityPrefetcher = None):
         super().__init__(parent)
         self.mode = mode
         self.commands = commands
@@ -31,41 +61,134 @@ class CommandDialog(QDialog):
         self.logger = logger
         self.host = host
         self.port = port
+        self.prefetcher = prefetcher
+
+        # Команды выполняются в фоне, чтобы не блокировать окно
+        self.runner = runner or CommandRunner(AsyncCommandExecutor(executor), self)
+        self.runner.command_finished.connect(self.on_command_finished)
+        self.runner.records_received.connect(self.on_records_received)
+
+        # Команда, результаты которой отображаются в таблице, и колонки таблицы
+        self.results_command_id = None
+        self.result_columns = []
 
         # Список для хранения данных вкладок
         self.tabs_data = []
 
+        # Изменения полей объединяются: предпросмотр пересчитывается один раз после паузы ввода
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.refresh_previews)
+
         self.setWindowTitle(f"RAC {mode} - Команды администрирования")
         self.setMinimumSize(800, 600)
         self.setModal(False)
 
         self.init_ui()
 
+    def set_connection(self, host: str, port: str):
+        """Смена хоста и порта при повторном открытии диалога"""
+        if (host, port) == (self.host, self.port):
+            return
+        if self.prefetcher is not None and self.isVisible():
+            self.prefetcher.unwatch(self.host, self.port)
+            self.prefetcher.watch(host, port)
+        self.host = host
+        self.port = port
+        self.update_command_preview(self.tab_widget.currentIndex())
+
+    def endpoint(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def selected_cluster(self, tab_index: int):
+        """UUID известного кластера из поля cluster вкладки (для отбора объектов автодополнения)"""
+        widget = self.tabs_data[tab_index].param_widgets.get("cluster")
+        if widget is None or self.prefetcher is None:
+            return None
+        value = self.executor.variable_manager.substitute_variables(widget.text().strip())
+        return value if self.prefetcher.index.get(self.endpoint(), "cluster", value) else None
+
+    def showEvent(self, event):
+        if self.prefetcher is not None and not event.spontaneous():
+            self.prefetcher.watch(self.host, self.port)
+        # Предпросмотр пересчитывается при изменении переменных и смене профиля, пока диалог открыт
+        self.executor.variable_manager.add_listener(self.on_variables_changed)
+        self.update_command_preview(self.tab_widget.currentIndex())
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        if self.prefetcher is not None and not event.spontaneous():
+            self.prefetcher.unwatch(self.host, self.port)
+        self.executor.variable_manager.remove_listener(self.on_variables_changed)
+        super().hideEvent(event)
+
+    def on_variables_changed(self, names):
+        self.update_command_preview(self.tab_widget.currentIndex())
+
+    @traced("CommandDialog.init_ui", "ui")
     def init_ui(self):
         """Инициализация интерфейса"""
         layout = QVBoxLayout(self)
 
+        # Выполнение команды сразу на нескольких серверах RAS
+        hosts_layout = QHBoxLayout()
+        self.multi_host_check = QCheckBox("На нескольких хостах:")
+        self.hosts_edit = QLineEdit(self.executor.variable_manager.get_variable("ras_hosts") or "")
+        self.hosts_edit.setPlaceholderText("srv1, srv2:1545, srv3")
+        self.hosts_edit.setEnabled(False)
+        self.multi_host_check.toggled.connect(self.hosts_edit.setEnabled)
+        hosts_layout.addWidget(self.multi_host_check)
+        hosts_layout.addWidget(self.hosts_edit)
+        layout.addLayout(hosts_layout)
+
         # Вкладки для команд
         self.tab_widget = QTabWidget()
 
-        for i, command in enumerate(self.commands):
+        for command in self.commands:
             tab_data = TabData()
             tab_data.command = command
+            tab_data.page = QWidget()
+            QVBoxLayout(tab_data.page).setContentsMargins(0, 0, 0, 0)
             self.tabs_data.append(tab_data)
-
-            tab = self.create_command_tab(command, i)
-            self.tab_widget.addTab(tab, command.command)
-
-        layout.addWidget(self.tab_widget)
+            self.tab_widget.addTab(tab_data.page, command.command)
+
+        # Таблица результатов, заполняется по мере поступления вывода rac
+        results_group = QGroupBox("Результат")
+        results_layout = QVBoxLayout(results_group)
+        self.results_label = QLabel("Записей: 0")
+        self.results_table = QTableWidget(0, 0)
+        self.results_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        results_layout.addWidget(self.results_label)
+        results_layout.addWidget(self.results_table)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.tab_widget)
+        splitter.addWidget(results_group)
+        splitter.setSizes([450, 250])
+        layout.addWidget(splitter)
 
         # Подключаем сигнал переключения вкладок
         self.tab_widget.currentChanged.connect(self.on_tab_changed)
+        self.ensure_tab(self.tab_widget.currentIndex())
 
     def on_tab_changed(self, index):
         """Обработчик переключения вкладок"""
         if 0 <= index < len(self.tabs_data):
-            self.update_command_preview(index)
+            if not self.ensure_tab(index):
+                self.update_command_preview(index)
 
+    def ensure_tab(self, tab_index: int) -> bool:
+        """Создание содержимого вкладки при первом открытии; True — вкладка только что создана"""
+        if tab_index < 0 or tab_index >= len(self.tabs_data):
+            return False
+        tab_data = self.tabs_data[tab_index]
+        if tab_data.preview_text is not None:
+            return False
+        tab_data.page.layout().addWidget(self.create_command_tab(tab_data.command, tab_index))
+        return True
+
+    @traced("CommandDialog.create_command_tab", "ui")
     def create_command_tab(self, command: RacCommand, tab_index: int) -> QWidget:
         """Создание вкладки для команды"""
         tab = QWidget()
@@ -115,18 +238,24 @@ class CommandDialog(QDialog):
 
         preview_button = QPushButton("Обновить предпросмотр")
         execute_button = QPushButton("Выполнить команду")
+        cancel_button = QPushButton("Отменить")
+        cancel_button.setEnabled(False)
 
         preview_button.clicked.connect(lambda: self.update_command_preview(tab_index))
         execute_button.clicked.connect(lambda: self.execute_command(tab_index))
+        cancel_button.clicked.connect(lambda: self.cancel_command(tab_index))
 
         button_layout.addWidget(preview_button)
         button_layout.addWidget(execute_button)
+        button_layout.addWidget(cancel_button)
         button_layout.addStretch()
 
         layout.addLayout(button_layout)
 
-        # Сохраняем ссылку на preview_text
+        # Сохраняем ссылки на preview_text и кнопки выполнения
         tab_data.preview_text = preview_text
+        tab_data.execute_button = execute_button
+        tab_data.cancel_button = cancel_button
 
         # Первоначальное обновление предпросмотра
         self.update_command_preview(tab_index)
@@ -149,9 +278,14 @@ class CommandDialog(QDialog):
             widget = QLineEdit()
             if param.default_value:
                 widget.setText(str(param.default_value))
+            if param.param_type == ParamType.UUID and param.name in ENTITY_SOURCES and self.prefetcher is not None:
+                # Объекты ищутся по имени, описанию или пользователю, в поле вставляется UUID
+                cluster = (lambda: self.selected_cluster(tab_index)) if param.name != "cluster" else None
+                EntityCompleter(self.prefetcher.index, param.name, self.endpoint, cluster, widget).attach(widget)
 
-        # Сохраняем тип параметра и индекс вкладки в свойстве виджета
+        # Сохраняем тип и имя параметра и индекс вкладки в свойстве виджета
         widget.setProperty("param_type", param.param_type)
+        widget.setProperty("param_name", param.name)
         widget.setProperty("tab_index", tab_index)
 
         # Подключаем обновление предпросмотра при изменении
@@ -165,34 +299,61 @@ class CommandDialog(QDialog):
         return widget
 
     def on_parameter_changed(self):
-        """Обработчик изменения параметра"""
+        """Обработчик изменения параметра: пересчет предпросмотра откладывается до паузы ввода"""
         widget = self.sender()
         if widget:
             tab_index = widget.property("tab_index")
             if tab_index is not None and 0 <= tab_index < len(self.tabs_data):
-                self.update_command_preview(tab_index)
+                self.tabs_data[tab_index].dirty_params.add(widget.property("param_name"))
+                self.preview_timer.start()
+
+    def refresh_previews(self):
+        """Пересчет предпросмотра вкладок с измененными полями"""
+        for tab_index, tab_data in enumerate(self.tabs_data):
+            if tab_data.dirty_params:
+                self.render_command_preview(tab_index)
 
     def update_command_preview(self, tab_index: int):
-        """Обновление предпросмотра команды для указанной вкладки с подстановкой переменных"""
+        """Обновление предпросмотра команды для указанной вкладки с подстановкой переменных
+
+        Пересчитываются все параметры: вызывается при смене переменных,
+        хоста и порта и по кнопке «Обновить предпросмотр».
+        """
         if tab_index < 0 or tab_index >= len(self.tabs_data):
             return
+        tab_data = self.tabs_data[tab_index]
+        tab_data.fragments.clear()
+        tab_data.dirty_params.update(tab_data.param_widgets)
+        self.render_command_preview(tab_index)
 
+    @traced("update_command_preview", "ui")
+    def render_command_preview(self, tab_index: int):
+        """Предпросмотр из сохраненных аргументов с пересчетом только измененных параметров"""
         tab_data = self.tabs_data[tab_index]
         command = tab_data.command
 
         if not command or not tab_data.preview_text:
             return
 
-        params = self.get_current_parameters(tab_index)
-
-        # Формируем команду с передачей host и port
-        args = self.executor.build_command_args(self.mode, command.command, params, self.host, self.port)
-
-        # Формируем команду с подстановкой переменных
-        command_str = "rac " + " ".join(args)
-
-        # Подставляем переменные для отображения
-        command_str_with_vars = self.executor.variable_manager.substitute_variables(command_str)
+        variable_manager = self.executor.variable_manager
+        for name in tab_data.dirty_params:
+            param = next((param for param in command.parameters if param.name == name), None)
+            widget = tab_data.param_widgets.get(name)
+            if param is None or widget is None:
+                continue
+            # Аргумент со ссылками $(имя) и его вид с подставленными переменными
+            fragment = self.executor.build_param_fragment(name, self.param_value(param, widget), substitute=False)
+            tab_data.fragments[name] = (
+                (fragment, variable_manager.substitute_variables(fragment)) if fragment is not None else None)
+        tab_data.dirty_params.clear()
+
+        prefix = "rac " + " ".join(self.executor.build_command_prefix(self.mode, command.command,
+                                                                       self.host, self.port))
+        fragments = [tab_data.fragments[param.name] for param in command.parameters
+                     if tab_data.fragments.get(param.name) is not None]
+        command_str = " ".join([prefix] + [fragment for fragment, _ in fragments])
+        command_str_with_vars = " ".join([variable_manager.substitute_variables(prefix)] +
+                                         [substituted for _, substituted in fragments])
 
         # Форматируем вывод: показываем и исходную команду, и команду с подстановкой
         if command_str != command_str_with_vars:
@@ -200,7 +361,8 @@ class CommandDialog(QDialog):
         else:
             display_text = command_str
 
-        tab_data.preview_text.setPlainText(display_text)
+        if tab_data.preview_text.toPlainText() != display_text:
+            tab_data.preview_text.setPlainText(display_text)
 
     def get_current_parameters(self, tab_index: int) -> dict:
         """Получение текущих значений параметров для указанной вкладки"""
@@ -217,20 +379,21 @@ class CommandDialog(QDialog):
         for param in command.parameters:
             widget = tab_data.param_widgets.get(param.name)
             if widget:
-                if param.param_type == ParamType.BOOLEAN:
-                    if widget.isChecked():
-                        params[param.name] = True
-                elif param.param_type == ParamType.ENUM:
-                    value = widget.currentText()
-                    if value:
-                        params[param.name] = value
-                else:
-                    value = widget.text().strip()
-                    if value:
-                        params[param.name] = value
+                value = self.param_value(param, widget)
+                if value:
+                    params[param.name] = value
 
         return params
 
+    @staticmethod
+    def param_value(param: CommandParam, widget):
+        """Значение параметра из его поля; пустая строка или False — параметр не указан"""
+        if param.param_type == ParamType.BOOLEAN:
+            return widget.isChecked()
+        if param.param_type == ParamType.ENUM:
+            return widget.currentText()
+        return widget.text().strip()
+
     def execute_command(self, tab_index: int):
         """Выполнение команды для указанной вкладки"""
         if tab_index < 0 or tab_index >= len(self.tabs_data):
@@ -262,18 +425,116 @@ class CommandDialog(QDialog):
         args = self.executor.build_command_args(self.mode, command.command, params, self.host, self.port)
         command_str = "rac " + " ".join(args)
 
+        hosts = []
+        if self.multi_host_check.isChecked():
+            hosts = parse_hosts(self.hosts_edit.text(), self.port)
+            if not hosts:
+                QMessageBox.warning(self, "Не указаны хосты", "Укажите список хостов RAS через запятую")
+                return
+            command_str = "rac " + " ".join(
+                self.executor.build_command_args(self.mode, command.command, params, "<host>", "<port>"))
+
+        confirm_text = f"Выполнить команду:\n\n{command_str}"
+        if hosts:
+            confirm_text += f"\n\nна хостах: {', '.join(hosts)}"
+
         reply = QMessageBox.question(
             self,
             "Подтверждение выполнения",
-            f"Выполнить команду:\n\n{command_str}",
+            confirm_text,
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            success, output = self.executor.execute_command(args)
-            self.command_executed.emit(success, command_str, output)
+            self.clear_results()
+            tab_data.running_command_str = command_str
+            if hosts:
+                tab_data.running_command_id = self.runner.run_fanout(hosts, self.mode, command.command, params)
+            else:
+                tab_data.running_command_id = self.runner.run(args, stream=True)
+            self.results_command_id = tab_data.running_command_id
+            tab_data.execute_button.setEnabled(False)
+            tab_data.cancel_button.setEnabled(True)
+
+    def cancel_command(self, tab_index: int):
+        """Отмена выполняемой команды для указанной вкладки"""
+        if tab_index < 0 or tab_index >= len(self.tabs_data):
+            return
+
+        tab_data = self.tabs_data[tab_index]
+        if tab_data.running_command_id is not None:
+            self.runner.cancel(tab_data.running_command_id)
+            tab_data.cancel_button.setEnabled(False)
+
+    def clear_results(self):
+        """Очистка таблицы результатов"""
+        self.results_table.setRowCount(0)
+        self.results_table.setColumnCount(0)
+        self.result_columns = []
+        self.results_label.setText("Записей: 0")
+
+    @traced("CommandDialog.on_records_received", "ui")
+    def on_records_received(self, command_id: int, records: list):
+        """Добавление очередной пачки записей в таблицу результатов"""
+        if command_id != self.results_command_id or not records:
+            return
 
-            if success:
-                QMessageBox.information(self, "Успех", "Команда выполнена успешно")
+        # Новые поля записей добавляются как колонки
+        for record in records:
+            for key in record:
+                if key not in self.result_columns:
+                    self.result_columns.append(key)
+        if self.results_table.columnCount() != len(self.result_columns):
+            self.results_table.setColumnCount(len(self.result_columns))
+            self.results_table.setHorizontalHeaderLabels(self.result_columns)
+
+        column_index = {key: i for i, key in enumerate(self.result_columns)}
+        self.results_table.setUpdatesEnabled(False)
+        row = self.results_table.rowCount()
+        self.results_table.setRowCount(row + len(records))
+        for record in records:
+            for key, value in record.items():
+                self.results_table.setItem(row, column_index[key], QTableWidgetItem(format_value(value)))
+            row += 1
+        self.results_table.setUpdatesEnabled(True)
+
+        self.results_label.setText(f"Записей: {row}")
+
+    def on_command_finished(self, command_id: int, success: bool, output):
+        """Обработчик завершения фоновой команды"""
+        tab_data = next((data for data in self.tabs_data if data.running_command_id == command_id), None)
+        if tab_data is None:
+            return
+
+        tab_data.running_command_id = None
+        tab_data.execute_button.setEnabled(True)
+        tab_data.cancel_button.setEnabled(False)
+
+        if isinstance(output, FanOutResult):
+            self.report_fanout_result(tab_data.running_command_str, output)
+            return
+
+        self.command_executed.emit(success, tab_data.running_command_str, output)
+
+        if success:
+            QMessageBox.information(self, "Успех", f"Команда выполнена успешно\nПолучено записей: {len(output)}")
+        else:
+            QMessageBox.critical(self, "Ошибка", f"Ошибка выполнения команды:\n{output}")
+
+    def report_fanout_result(self, command_str: str, result: FanOutResult):
+        """Отчет о выполнении команды на нескольких хостах: время и ошибки по каждому хосту"""
+        for host, line in zip(result.hosts, result.summary_lines()):
+            if host.success:
+                self.logger.log_info(f"{command_str} — {line}", "FANOUT")
             else:
-                QMessageBox.critical(self, "Ошибка", f"Ошибка выполнения команды:\n{output}")
\ No newline at end of file
+                self.logger.log_error(f"{command_str} — {line}", "FANOUT")
+
+        self.command_executed.emit(result.success, command_str,
+                                   result.records if result.success else "\n".join(result.summary_lines()))
+
+        summary = "\n".join(result.summary_lines())
+        if result.success:
+            QMessageBox.information(self, "Успех", f"Команда выполнена на всех хостах\n\n{summary}")
+        else:
+            QMessageBox.warning(self, "Ошибки на хостах",
+                                f"Ошибки на {len(result.failed)} из {len(result.hosts)} хостов\n\n{summary}")
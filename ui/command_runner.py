@@ -0,0 +1,71 @@
+from typing import List
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+from core.async_executor import AsyncCommandExecutor, CommandHandle
+from core.fanout import FanOutExecutor, FanOutHandle, FanOutResult
+
+
+class CommandRunner(QObject):
+    """Qt-обертка над асинхронным исполнителем: результаты приходят сигналами в GUI-поток"""
+
+    command_started = pyqtSignal(int, str)  # command_id, command
+    command_finished = pyqtSignal(int, bool, object)  # command_id, success, output
+    records_received = pyqtSignal(int, object)  # command_id, пачка записей
+
+    # Внутренние сигналы всегда доставляются через очередь событий: даже если команда
+    # завершилась мгновенно, получатель узнает о ней после возврата из run()
+    _finished_queued = pyqtSignal(int, bool, object)
+    _records_queued = pyqtSignal(int, object)
+
+    def __init__(self, async_executor: AsyncCommandExecutor, parent=None):
+        super().__init__(parent)
+        self.async_executor = async_executor
+        self.fanout_executor = FanOutExecutor(async_executor)
+        self._fanouts = {}
+        self._finished_queued.connect(self.command_finished, Qt.ConnectionType.QueuedConnection)
+        self._records_queued.connect(self.records_received, Qt.ConnectionType.QueuedConnection)
+
+    def run(self, args: List[str], stream: bool = False) -> int:
+        """Запуск команды в фоне, возвращает идентификатор команды
+
+        При stream=True записи приходят сигналом records_received по мере вывода rac.
+        """
+        handle = self.async_executor.submit(args, self._on_done,
+                                            self._on_records if stream else None)
+        self.command_started.emit(handle.command_id, " ".join(args))
+        return handle.command_id
+
+    def run_fanout(self, hosts: List[str], mode: str, command: str, parameters: dict) -> int:
+        """Запуск команды на нескольких хостах RAS
+
+        Записи приходят сигналом records_received с колонкой ras-host,
+        итог — сигналом command_finished с FanOutResult.
+        """
+        fanout = self.fanout_executor.submit(hosts, mode, command, parameters,
+                                             self._on_fanout_done, self._on_fanout_records)
+        self._fanouts[fanout.fanout_id] = fanout
+        self.command_started.emit(fanout.fanout_id, f"{mode} {command} @ {', '.join(hosts)}")
+        return fanout.fanout_id
+
+    def cancel(self, command_id: int) -> bool:
+        """Отмена команды с завершением процесса rac"""
+        fanout = self._fanouts.get(command_id)
+        if fanout is not None:
+            fanout.cancel()
+            return True
+        return self.async_executor.cancel(command_id)
+
+    def _on_fanout_records(self, fanout: FanOutHandle, records):
+        self._records_queued.emit(fanout.fanout_id, records)
+
+    def _on_fanout_done(self, fanout: FanOutHandle, result: FanOutResult):
+        self._fanouts.pop(fanout.fanout_id, None)
+        self._finished_queued.emit(fanout.fanout_id, result.success, result)
+
+    def _on_records(self, handle: CommandHandle, records):
+        self._records_queued.emit(handle.command_id, records)
+
+    def _on_done(self, handle: CommandHandle, success: bool, output):
+        # Вызывается в рабочем потоке, сигнал доставляется в GUI-поток через очередь событий
+        self._finished_queued.emit(handle.command_id, success, output)
@@ -0,0 +1,87 @@
+import os
+from typing import Optional, Set, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+from core.logger import RACLogger
+from core.variable_manager import VariableManager
+
+# Пауза после последнего уведомления: скрипты перезаписывают файл несколькими операциями
+RELOAD_DELAY_MS = 300
+# Проверка времени изменения для сетевых дисков, где уведомления файловой системы не приходят
+POLL_INTERVAL_MS = 5000
+
+
+class ConfigWatcher(QObject):
+    """Отслеживание внешних изменений файла переменных
+
+    Следит и за файлом, и за его каталогом: атомарная замена файла
+    (os.replace) снимает наблюдение с файла, и оно восстанавливается
+    по уведомлению каталога. Уведомления объединяются таймером, после
+    чего VariableManager применяет только измененные записи.
+    """
+    variables_reloaded = pyqtSignal(object)  # множество имен измененных переменных
+
+    def __init__(self, variable_manager: VariableManager, logger: Optional[RACLogger] = None, parent=None):
+        super().__init__(parent)
+        self.variable_manager = variable_manager
+        self.logger = logger
+        self.path = os.path.abspath(variable_manager.config_file)
+        self.last_stat = self.stat()
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_changed)
+        self.watcher.directoryChanged.connect(self.on_changed)
+        directory = os.path.dirname(self.path)
+        if os.path.isdir(directory):
+            self.watcher.addPath(directory)
+        self.watch_file()
+
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.reload)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll)
+        self.poll_timer.start(POLL_INTERVAL_MS)
+
+    def stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def watch_file(self):
+        """Повторная постановка файла на наблюдение после его замены"""
+        if self.path not in self.watcher.files() and os.path.exists(self.path):
+            self.watcher.addPath(self.path)
+
+    def on_changed(self, path: str):
+        # Изменения в каталоге, не затрагивающие файл (временные файлы записи), пропускаются
+        current = self.stat()
+        if path != self.path and current == self.last_stat:
+            return
+        self.watch_file()
+        self.reload_timer.start()
+
+    def poll(self):
+        if self.stat() != self.last_stat:
+            self.watch_file()
+            self.reload_timer.start()
+
+    def reload(self):
+        self.last_stat = self.stat()
+        changed: Set[str] = self.variable_manager.reload_from_disk()
+        if not changed:
+            return
+        if self.logger:
+            self.logger.log_info(f"Переменные обновлены из файла: {', '.join(sorted(changed))}",
+                                 "VARIABLES")
+        self.variables_reloaded.emit(changed)
+
+    def stop(self):
+        self.reload_timer.stop()
+        self.poll_timer.stop()
+        self.watcher.removePaths(self.watcher.files() + self.watcher.directories())
@@ -0,0 +1,73 @@
+from typing import Callable, List, Optional
+
+from PyQt6.QtWidgets import QCompleter, QLineEdit
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+
+from core.entity_index import Entity, EntityIndex
+
+
+class EntityListModel(QAbstractListModel):
+    """Найденные объекты: в списке — описание и UUID, в поле вставляется UUID"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entities: List[Entity] = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.entities)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entity = self.entities[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"{entity.label}  ({entity.uuid})" if entity.label else entity.uuid
+        if role == Qt.ItemDataRole.EditRole:
+            return entity.uuid
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return entity.uuid
+        return None
+
+    def set_entities(self, entities: List[Entity]):
+        if entities == self.entities:
+            return
+        self.beginResetModel()
+        self.entities = entities
+        self.endResetModel()
+
+
+class EntityCompleter(QCompleter):
+    """Автодополнение UUID-параметра по имени, описанию или пользователю объекта
+
+    Варианты ищутся в EntityIndex при каждом изменении текста поля, а
+    QCompleter только показывает их (без собственной фильтрации). Ссылки
+    на переменные $(имя) не дополняются.
+    """
+
+    def __init__(self, index: EntityIndex, kind: str, endpoint: Callable[[], str],
+                 cluster: Callable[[], Optional[str]] = None, parent=None):
+        super().__init__(parent)
+        self.entity_index = index
+        self.kind = kind
+        self.endpoint = endpoint
+        self.cluster = cluster
+        self.list_model = EntityListModel(self)
+        self.setModel(self.list_model)
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setMaxVisibleItems(12)
+
+    def attach(self, line_edit: QLineEdit):
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self.on_text_edited)
+
+    def on_text_edited(self, text: str):
+        if "$(" in text:
+            self.popup().hide()
+            return
+        cluster = self.cluster() if self.cluster is not None else None
+        self.list_model.set_entities(self.entity_index.search(self.endpoint(), self.kind, text, cluster or None))
+        if self.list_model.entities:
+            self.complete()
+        else:
+            self.popup().hide()
@@ -0,0 +1,207 @@
+from typing import Optional
+
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
+                             QTableWidgetItem, QPushButton, QHeaderView,
+                             QMessageBox, QLineEdit, QLabel, QFormLayout,
+                             QDialogButtonBox, QGroupBox, QComboBox, QCheckBox,
+                             QSplitter, QPlainTextEdit)
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QColor
+
+from core.command_history import CommandHistory, HistoryEntry, REDACTED
+from core.rac_commands import RACCommands
+from core.rac_parser import format_record
+from core.result_cache import is_mutating, normalize_args
+from ui.command_runner import CommandRunner
+
+# Сколько записей результата показывать в подробностях
+DETAILS_RECORDS_LIMIT = 200
+
+
+class HistoryDialog(QDialog):
+    """Поиск по истории выполненных команд и повторный запуск"""
+
+    history_written = pyqtSignal()  # испускается из потока записи истории
+
+    def __init__(self, history: CommandHistory, runner: CommandRunner, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.runner = runner
+        self.entries = []
+        self.rerun_ids = set()
+
+        self.setWindowTitle("История команд")
+        self.setMinimumSize(1000, 650)
+        self.setModal(False)
+
+        self.runner.command_finished.connect(self.on_rerun_finished)
+        self.history_written.connect(self.search, Qt.ConnectionType.QueuedConnection)
+        self.init_ui()
+        self.search()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        # Фильтры поиска
+        filters_group = QGroupBox("Поиск")
+        filters_layout = QFormLayout(filters_group)
+
+        self.text_edit = QLineEdit()
+        self.text_edit.setPlaceholderText("Подстрока аргументов или текста ошибки")
+        self.entity_edit = QLineEdit()
+        self.entity_edit.setPlaceholderText("UUID сеанса, базы, кластера...")
+
+        self.host_combo = QComboBox()
+        self.host_combo.addItem("Все хосты", "")
+        for host in self.history.hosts():
+            self.host_combo.addItem(host, host)
+
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItem("Все режимы", "")
+        for mode in RACCommands.get_all_commands().keys():
+            self.mode_combo.addItem(mode, mode)
+
+        self.failed_check = QCheckBox("Только с ошибками")
+
+        filters_layout.addRow("Текст:", self.text_edit)
+        filters_layout.addRow("Объект (UUID):", self.entity_edit)
+        filters_layout.addRow("Хост:", self.host_combo)
+        filters_layout.addRow("Режим:", self.mode_combo)
+        filters_layout.addRow("", self.failed_check)
+
+        search_button = QPushButton("Найти")
+        search_button.clicked.connect(self.search)
+        self.text_edit.returnPressed.connect(self.search)
+        self.entity_edit.returnPressed.connect(self.search)
+        filters_layout.addRow("", search_button)
+        layout.addWidget(filters_group)
+
+        # Найденные команды и подробности выбранной
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(["Время", "Хост", "Команда", "Длительность", "Записей", "Источник"])
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        # Двойной щелчок только выбирает команду: повтор — кнопкой и с подтверждением
+        self.table.itemSelectionChanged.connect(self.show_details)
+
+        self.details_text = QPlainTextEdit()
+        self.details_text.setReadOnly(True)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.details_text)
+        splitter.setSizes([350, 200])
+        layout.addWidget(splitter)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        self.rerun_button = QPushButton("Повторить команду")
+        self.rerun_button.setEnabled(False)
+        self.rerun_button.clicked.connect(self.rerun_selected)
+        button_layout.addWidget(self.rerun_button)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def search(self):
+        """Поиск команд по заданным фильтрам"""
+        self.entries = self.history.search(
+            text=self.text_edit.text().strip(),
+            host=self.host_combo.currentData(),
+            mode=self.mode_combo.currentData(),
+            entity=self.entity_edit.text().strip(),
+            failed_only=self.failed_check.isChecked(),
+        )
+
+        self.table.setRowCount(len(self.entries))
+        for row, entry in enumerate(self.entries):
+            items = [
+                entry.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+                entry.host,
+                entry.command_line,
+                f"{entry.duration:.2f} с",
+                str(entry.record_count) if entry.success else "ошибка",
+                entry.source,
+            ]
+            for column, text in enumerate(items):
+                item = QTableWidgetItem(text)
+                if not entry.success:
+                    item.setForeground(QColor("red"))
+                self.table.setItem(row, column, item)
+
+        self.status_label.setText(f"Найдено команд: {len(self.entries)}")
+        self.details_text.clear()
+        self.rerun_button.setEnabled(False)
+
+    def selected_entry(self) -> Optional[HistoryEntry]:
+        rows = self.table.selectionModel().selectedRows()
+        if not rows or rows[0].row() >= len(self.entries):
+            return None
+        return self.entries[rows[0].row()]
+
+    def show_details(self):
+        """Аргументы и сохраненный результат выбранной команды"""
+        entry = self.selected_entry()
+        self.rerun_button.setEnabled(entry is not None)
+        if entry is None:
+            self.details_text.clear()
+            return
+
+        lines = [f"rac {entry.command_line}", ""]
+        if not entry.success:
+            lines.append(entry.error)
+        else:
+            records = self.history.get_records(entry.id)
+            for record in records[:DETAILS_RECORDS_LIMIT]:
+                lines.extend(format_record(record))
+                lines.append("")
+            if entry.record_count > DETAILS_RECORDS_LIMIT:
+                lines.append(f"... показано {DETAILS_RECORDS_LIMIT} из {entry.record_count} записей")
+        self.details_text.setPlainText("\n".join(lines))
+
+    def rerun_selected(self):
+        """Повторный запуск выбранной команды"""
+        entry = self.selected_entry()
+        if entry is None:
+            return
+
+        if any(arg.endswith("=" + REDACTED) for arg in entry.args):
+            QMessageBox.warning(self, "Повтор команды",
+                                "Пароль в команде не сохраняется в истории. "
+                                "Выполните команду из диалога режима или используйте переменную для пароля.")
+            return
+
+        # Подтверждение, как в диалоге команд; изменяющие команды — с предупреждением и «Нет» по умолчанию
+        confirm_text = f"Выполнить команду:\n\nrac {entry.command_line}"
+        key = normalize_args(entry.args)
+        if key is not None and is_mutating(key):
+            confirm_text += "\n\nКоманда изменяет кластер (завершение сеансов, удаление объектов и т.п.)."
+        reply = QMessageBox.question(
+            self,
+            "Подтверждение выполнения",
+            confirm_text,
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+
+        self.rerun_ids.add(self.runner.run(entry.args))
+        self.status_label.setText(f"Выполняется: {entry.command_line}")
+
+    def on_rerun_finished(self, command_id: int, success: bool, output):
+        """Обновление списка после завершения повторно запущенной команды"""
+        if command_id not in self.rerun_ids:
+            return
+        self.rerun_ids.discard(command_id)
+        if not success:
+            QMessageBox.critical(self, "Ошибка", f"Ошибка выполнения команды:\n{output}")
+        # Запись истории выполняется в фоне — список обновляется, когда поток записи дойдет до этой команды
+        self.history.notify_written(self.history_written.emit)
@@ -0,0 +1,110 @@
+import logging
+import shutil
+import tempfile
+from collections import deque
+from typing import List
+
+from PyQt6.QtWidgets import QPlainTextEdit
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QFont
+
+from core.logger import LogFormatter
+from core.profiling import traced
+
+# Число строк, отображаемых в панели журнала по умолчанию
+DEFAULT_MAX_LINES = 5000
+# Период переноса накопленных строк в панель, мс
+FLUSH_INTERVAL_MS = 100
+
+
+class LogBuffer(logging.Handler):
+    """Буфер строк журнала для панели главного окна
+
+    Подключается к потоку записи RACLogger: строки копятся в ограниченной
+    очереди и забираются панелью пачками по таймеру. Полная история сеанса
+    пишется во временный файл, откуда ее можно сохранить, не выводя в виджет.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES):
+        super().__init__()
+        self.setFormatter(logging.Formatter('%(message)s'))
+        self.history_formatter = LogFormatter()
+        # Если панель не успевает забирать строки, старые вытесняются
+        self.pending = deque(maxlen=max_lines)
+        # Синхронизация через self.lock обработчика (RLock): handle() удерживает его на время emit()
+        self.spool = tempfile.TemporaryFile('w+', encoding='utf-8')
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+            history_line = self.history_formatter.format(record)
+            with self.lock:
+                if self.spool.closed:
+                    return
+                self.pending.append(line)
+                self.spool.write(history_line + '\n')
+        except Exception:
+            self.handleError(record)
+
+    def append_line(self, line: str):
+        """Строка только для панели и сохраняемой истории, без записи в файл журнала"""
+        with self.lock:
+            if self.spool.closed:
+                return
+            self.pending.append(line)
+            self.spool.write(line + '\n')
+
+    def take(self) -> List[str]:
+        """Извлечение накопленных строк"""
+        with self.lock:
+            lines = list(self.pending)
+            self.pending.clear()
+        return lines
+
+    def save(self, path: str):
+        """Копирование полной истории сеанса в файл"""
+        with self.lock:
+            self.spool.flush()
+            position = self.spool.tell()
+            self.spool.seek(0)
+            try:
+                with open(path, 'w', encoding='utf-8') as target:
+                    shutil.copyfileobj(self.spool, target)
+            finally:
+                self.spool.seek(position)
+
+    def close(self):
+        with self.lock:
+            if not self.spool.closed:
+                self.spool.close()
+        super().close()
+
+
+class LogView(QPlainTextEdit):
+    """Панель журнала: строки вставляются пачкой по таймеру, хранится не более max_lines"""
+
+    def __init__(self, buffer: LogBuffer, max_lines: int = DEFAULT_MAX_LINES, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.setReadOnly(True)
+        self.setFont(QFont("Courier New", 9))
+        self.setMaximumBlockCount(max_lines)
+        self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush_pending)
+        self.timer.start(FLUSH_INTERVAL_MS)
+
+    @traced("LogView.flush_pending", "ui")
+    def flush_pending(self):
+        """Перенос накопленных строк в панель одной вставкой"""
+        lines = self.buffer.take()
+        if not lines:
+            return
+
+        scrollbar = self.verticalScrollBar()
+        # Автопрокрутка только если пользователь не листает журнал выше
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self.appendPlainText("\n".join(lines))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
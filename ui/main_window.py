@@ -2,27 +2,65 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QTextEdit, QGridLayout, QScrollArea,
                              QSizePolicy, QMessageBox, QTabWidget, QSplitter,
                              QGroupBox, QLabel, QLineEdit)
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QIcon
 import sys
 import os
+import threading
+import time
 
 from core.rac_commands import RACCommands
+from core.command_discovery import SchemaCache
 from core.logger import RACLogger
 from core.command_executor import RACCommandExecutor
+from core.async_executor import AsyncCommandExecutor
 from core.service_manager import ServiceManager
 from core.variable_manager import VariableManager
+from core.command_history import CommandHistory
+from core.metrics import MetricsServer
+from core.entity_index import EntityPrefetcher
+from core.profiling import traced
 from ui.command_dialogs import CommandDialog
 from ui.variables_dialog import VariablesDialog
+from ui.history_dialog import HistoryDialog
+from ui.metrics_dialog import MetricsDialog
+from ui.stall_watchdog import StallWatchdog, stall_threshold_ms
+from ui.profile_selector import ProfileSelector
+from ui.config_watcher import ConfigWatcher
+from ui.command_runner import CommandRunner
+from ui.log_panel import LogBuffer, LogView, DEFAULT_MAX_LINES
+
+# Диалог команд должен открываться за один кадр (60 Гц); более долгое открытие попадает в журнал
+DIALOG_OPEN_BUDGET_MS = 16
 
 class MainWindow(QMainWindow):
+    # Каталог команд, определенный по справке rac в фоновом потоке
+    commands_discovered = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
-        self.rac_commands = RACCommands.get_all_commands()
         self.logger = RACLogger()
         self.variable_manager = VariableManager()
-        self.command_executor = RACCommandExecutor(self.logger, self.variable_manager)
+        # Команды установленной rac: из сохраненного каталога, иначе встроенные до окончания определения
+        self.schema_cache = SchemaCache()
+        self.discovery_thread = None
+        # Открытые ранее диалоги команд по режимам
+        self.command_dialogs = {}
+        self.commands_discovered.connect(self.on_commands_discovered)
+        self.rac_commands = self.load_rac_commands(self.variable_manager.get_variable("rac_path"))
+        self.command_history = CommandHistory("config/history.db")
+        self.command_executor = RACCommandExecutor(self.logger, self.variable_manager,
+                                                   history=self.command_history)
         self.service_manager = ServiceManager()
+        # Объекты кластеров хостов открытых диалогов для автодополнения UUID
+        self.entity_prefetcher = EntityPrefetcher(self.command_executor, logger=self.logger)
+        self.metrics_server = self.start_metrics_server()
+
+        # Фоновое выполнение команд RAC с ограничением числа параллельных процессов
+        self.async_executor = AsyncCommandExecutor(self.command_executor, self.get_max_parallel_commands())
+        self.command_runner = CommandRunner(self.async_executor, self)
+        self.command_runner.command_finished.connect(self.on_test_connection_finished)
+        self.test_command_id = None
 
         # Настройки по умолчанию
         self.ras_service_name = "1C:Enterprise 8.3 Remote Server"
@@ -31,6 +69,16 @@ class MainWindow(QMainWindow):
         self.setup_connections()
         self.start_service_monitor()
 
+        # Сторож зависаний интерфейса (RAC_ADMIN_STALL_MS или режим профилирования)
+        threshold = stall_threshold_ms()
+        self.stall_watchdog = StallWatchdog(self.logger, threshold, self) if threshold else None
+
+        self.start_command_discovery()
+
+        # Файл переменных могут менять другие администраторы и скрипты
+        self.config_watcher = ConfigWatcher(self.variable_manager, self.logger, self)
+        self.config_watcher.variables_reloaded.connect(self.on_variables_reloaded)
+
     def init_ui(self):
         """Инициализация пользовательского интерфейса"""
         self.setWindowTitle("RAC Admin GUI - Администрирование кластеров 1С")
@@ -85,6 +133,18 @@ class MainWindow(QMainWindow):
         vars_button.clicked.connect(self.open_variables_dialog)
         layout.addWidget(vars_button)
 
+        # Кнопка истории выполненных команд
+        history_button = QPushButton("🕘 История команд")
+        history_button.setMinimumHeight(40)
+        history_button.clicked.connect(self.open_history_dialog)
+        layout.addWidget(history_button)
+
+        # Кнопка статистики выполнения команд
+        metrics_button = QPushButton("📈 Статистика команд")
+        metrics_button.setMinimumHeight(40)
+        metrics_button.clicked.connect(self.open_metrics_dialog)
+        layout.addWidget(metrics_button)
+
         # Scroll area для кнопок
         scroll_area = QScrollArea()
         scroll_widget = QWidget()
@@ -158,16 +218,42 @@ class MainWindow(QMainWindow):
         host_port_layout.addWidget(self.host_edit)
         host_port_layout.addWidget(self.port_edit)
 
+        # Профиль переменных (prod, test, ...): переключение без записи файла
+        self.profile_selector = ProfileSelector(self.variable_manager)
+        self.profile_selector.profile_changed.connect(self.on_profile_changed)
+
         # Статус RAC
         self.rac_status_label = QLabel("Статус: Не проверен")
         self.rac_status_label.setStyleSheet("color: gray;")
 
+        layout.addWidget(self.profile_selector)
         layout.addLayout(path_layout)
         layout.addLayout(host_port_layout)
         layout.addWidget(self.rac_status_label)
 
         return panel
 
+    def on_profile_changed(self, profile):
+        """Обновление полей подключения значениями нового профиля"""
+        self.refresh_connection_fields()
+        self.logger.log_info(f"Профиль переменных: {profile or 'без профиля'}")
+
+    def on_variables_reloaded(self, changed):
+        """Файл переменных изменен извне: обновление профилей и полей подключения"""
+        self.profile_selector.refresh()
+        self.refresh_connection_fields()
+
+    def refresh_connection_fields(self):
+        """Поля подключения из переменных активного профиля (без обратной записи)"""
+        for edit, name, default in ((self.rac_path_edit, "rac_path", "rac.exe"),
+                                    (self.host_edit, "default_host", "localhost"),
+                                    (self.port_edit, "default_port", "1545")):
+            value = self.variable_manager.get_variable(name) or default
+            if edit.text() != value:
+                edit.blockSignals(True)
+                edit.setText(value)
+                edit.blockSignals(False)
+
     def on_host_port_changed(self):
         """Обработчик изменения host и port"""
         host = self.host_edit.text().strip() or "localhost"
@@ -181,6 +267,45 @@ class MainWindow(QMainWindow):
         rac_path = self.rac_path_edit.text().strip()
         if rac_path:
             self.variable_manager.set_variable("rac_path", rac_path, "Путь к утилите RAC", reserved=True)
+            if os.path.isfile(rac_path):
+                self.rac_commands = self.load_rac_commands(rac_path)
+                self.start_command_discovery()
+
+    def load_rac_commands(self, rac_path: str):
+        """Каталог команд утилиты rac_path, если ее команды уже определялись, иначе встроенный"""
+        catalog = self.schema_cache.load(rac_path) if rac_path else None
+        RACCommands.set_catalog(catalog)
+        return RACCommands.get_all_commands()
+
+    def start_command_discovery(self):
+        """Определение команд установленной rac по справке в фоне (один раз на версию rac)"""
+        rac_path = self.variable_manager.get_variable("rac_path")
+        if not rac_path or not os.path.isfile(rac_path) or self.schema_cache.lookup(rac_path):
+            return
+        if self.discovery_thread is not None and self.discovery_thread.is_alive():
+            return
+
+        def discover():
+            try:
+                catalog = self.schema_cache.discover(rac_path, RACCommands.get_builtin_commands())
+            except Exception as e:
+                self.logger.log_warning(f"Не удалось определить команды {rac_path}: {e}", "DISCOVERY")
+                return
+            self.commands_discovered.emit((rac_path, catalog))
+
+        self.discovery_thread = threading.Thread(target=discover, name="rac-discovery", daemon=True)
+        self.discovery_thread.start()
+
+    def on_commands_discovered(self, result):
+        rac_path, catalog = result
+        if rac_path != self.variable_manager.get_variable("rac_path"):
+            # Путь изменился, пока шло определение: команды новой утилиты определяются отдельно
+            self.start_command_discovery()
+            return
+        RACCommands.set_catalog(catalog)
+        self.rac_commands = catalog
+        total = sum(len(catalog[mode]) for mode in catalog)
+        self.logger.log_info(f"Команды определены по справке {rac_path}: {total}", "DISCOVERY")
 
     def browse_rac_path(self):
         """Открытие диалога выбора файла RAC"""
@@ -205,7 +330,19 @@ class MainWindow(QMainWindow):
         # Формируем список аргументов с host:port
         args = [f"{host}:{port}"]
 
-        success, message = self.command_executor.execute_command(args)
+        # Предыдущая незавершенная проверка больше не актуальна
+        if self.test_command_id is not None:
+            self.command_runner.cancel(self.test_command_id)
+
+        self.rac_status_label.setText("⏳ Проверка подключения...")
+        self.rac_status_label.setStyleSheet("color: gray;")
+        self.test_command_id = self.command_runner.run(args)
+
+    def on_test_connection_finished(self, command_id: int, success: bool, message):
+        """Обработчик завершения фоновой проверки подключения"""
+        if command_id != self.test_command_id:
+            return
+        self.test_command_id = None
 
         if success:
             self.rac_status_label.setText("✅ Подключение успешно!")
@@ -216,6 +353,26 @@ class MainWindow(QMainWindow):
             self.rac_status_label.setStyleSheet("color: red;")
             self.logger.log_error(f"❌ Ошибка подключения: {message}")
 
+    def get_max_parallel_commands(self) -> int:
+        """Лимит одновременно выполняемых команд RAC из переменной max_parallel_commands"""
+        try:
+            return max(1, int(self.variable_manager.get_variable("max_parallel_commands") or 4))
+        except ValueError:
+            return 4
+
+    def start_metrics_server(self):
+        """Экспорт метрик Prometheus на 127.0.0.1, если задана переменная metrics_port"""
+        port = (self.variable_manager.get_variable("metrics_port") or "").strip()
+        if not port:
+            return None
+        try:
+            server = MetricsServer(self.command_executor.metrics, int(port))
+        except (ValueError, OSError) as e:
+            self.logger.log_error(f"Не удалось запустить экспорт метрик на порту {port}: {e}")
+            return None
+        self.logger.log_info(f"Метрики Prometheus доступны по адресу {server.address}")
+        return server
+
     def create_service_panel(self) -> QWidget:
         """Создание панели управления службой RAS с индикацией прав"""
         panel = QGroupBox("Управление службой RAS")
@@ -309,10 +466,11 @@ class MainWindow(QMainWindow):
         title_label.setMaximumHeight(40)
         layout.addWidget(title_label)
 
-        # Текстовое поле для логов
-        self.log_text_edit = QTextEdit()
-        self.log_text_edit.setReadOnly(True)
-        self.log_text_edit.setFont(QFont("Courier New", 9))
+        # Панель логов: строки из потока записи журнала вставляются пачками,
+        # в панели хранится не более log_max_lines строк
+        max_lines = self.get_log_max_lines()
+        self.log_buffer = LogBuffer(max_lines)
+        self.log_text_edit = LogView(self.log_buffer, max_lines)
 
         # Кнопки управления логами
         log_controls_layout = QHBoxLayout()
@@ -354,25 +512,8 @@ class MainWindow(QMainWindow):
 
     def setup_connections(self):
         """Настройка соединений"""
-        # Перенаправляем логи в текстовое поле
-        import logging
-        from PyQt6.QtCore import QObject, pyqtSignal
-
-        class LogHandler(QObject, logging.Handler):
-            log_signal = pyqtSignal(str)
-
-            def __init__(self):
-                super().__init__()
-                logging.Handler.__init__(self)
-                self.setFormatter(logging.Formatter('%(message)s'))
-
-            def emit(self, record):
-                msg = self.format(record)
-                self.log_signal.emit(msg)
-
-        self.log_handler = LogHandler()
-        self.log_handler.log_signal.connect(self.log_text_append)
-        self.logger.logger.addHandler(self.log_handler)
+        # Перенаправляем логи в панель через буфер
+        self.logger.add_handler(self.log_buffer)
 
     def start_service_monitor(self):
         """Запуск мониторинга службы"""
@@ -449,6 +590,22 @@ class MainWindow(QMainWindow):
         """Открытие диалога управления переменными"""
         dialog = VariablesDialog(self.variable_manager, self)
         dialog.exec()
+        # В диалоге могли создать, удалить или выбрать профиль
+        self.profile_selector.refresh()
+        self.refresh_connection_fields()
+
+    def open_history_dialog(self):
+        """Открытие окна истории команд"""
+        dialog = HistoryDialog(self.command_history, self.command_runner, self)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+
+    def open_metrics_dialog(self):
+        """Открытие окна статистики команд"""
+        address = self.metrics_server.address if self.metrics_server else ""
+        dialog = MetricsDialog(self.command_executor.metrics, address, self)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
 
     def on_mode_button_clicked(self):
         """Обработчик нажатия на кнопку режима"""
@@ -474,27 +631,56 @@ class MainWindow(QMainWindow):
             current_host = self.host_edit.text().strip() or "localhost"
             current_port = self.port_edit.text().strip() or "1545"
 
-            # Создаем диалог с передачей host и port
-            dialog = CommandDialog(mode, self.rac_commands[mode], self.command_executor,
-                                   self.logger, current_host, current_port, self)
+            self.open_command_dialog(mode, current_host, current_port)
+
+    @traced("MainWindow.open_command_dialog", "ui")
+    def open_command_dialog(self, mode: str, host: str, port: str):
+        """Показ диалога режима: созданного ранее или нового, с замером времени открытия"""
+        started = time.perf_counter()
+        commands = self.rac_commands[mode]
+        dialog = self.command_dialogs.get(mode)
+        if dialog is not None and dialog.commands is not commands:
+            # Каталог команд сменился (определены команды установленной rac): диалог создается заново
+            del self.command_dialogs[mode]
+            if not dialog.isVisible():
+                dialog.deleteLater()
+            dialog = None
+
+        reused = dialog is not None
+        if reused:
+            dialog.set_connection(host, port)
+        else:
+            dialog = CommandDialog(mode, commands, self.command_executor, self.logger, host, port, self,
+                                   runner=self.command_runner, prefetcher=self.entity_prefetcher)
             dialog.command_executed.connect(self.on_command_executed)
-            dialog.show()
+            self.command_dialogs[mode] = dialog
+        dialog.show()
+        dialog.raise_()
+        dialog.activateWindow()
 
-    def on_command_executed(self, success: bool, command: str, output: str):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > DIALOG_OPEN_BUDGET_MS:
+            self.logger.log_warning(f"Диалог {mode} открыт за {elapsed_ms:.1f} мс "
+                                    f"({'повторно' if reused else 'создан'}), бюджет {DIALOG_OPEN_BUDGET_MS} мс", "UI")
+
+    def on_command_executed(self, success: bool, command: str, output):
         if success:
-            self.log_text_append(f"✅ Команда выполнена успешно: {command}")
+            self.log_text_append(f"✅ Команда выполнена успешно: {command} (записей: {len(output)})")
         else:
             self.log_text_append(f"❌ Ошибка выполнения команды: {command}")
 
         self.log_text_append("=" * 80 + "\n")
 
+    def get_log_max_lines(self) -> int:
+        """Число строк в панели логов из переменной log_max_lines"""
+        try:
+            return max(100, int(self.variable_manager.get_variable("log_max_lines") or DEFAULT_MAX_LINES))
+        except ValueError:
+            return DEFAULT_MAX_LINES
+
     def log_text_append(self, text: str):
         """Добавление текста в лог"""
-        self.log_text_edit.append(text)
-        # Автопрокрутка к низу
-        cursor = self.log_text_edit.textCursor()
-        cursor.movePosition(cursor.MoveOperation.End)
-        self.log_text_edit.setTextCursor(cursor)
+        self.log_buffer.append_line(text)
 
     def clear_logs(self):
         """Очистка логов"""
@@ -502,8 +688,23 @@ class MainWindow(QMainWindow):
 
     def save_logs(self):
         """Сохранение логов в файл"""
-        # Реализация сохранения логов
-        pass
+        from PyQt6.QtWidgets import QFileDialog
+
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Сохранить логи",
+            "rac_admin_log.txt",
+            "Text Files (*.txt *.log);;All Files (*)"
+        )
+        if not file_path:
+            return
+
+        # Сохраняется вся история сеанса, а не только строки, оставшиеся в панели
+        try:
+            self.log_buffer.save(file_path)
+            self.logger.log_info(f"Логи сохранены: {file_path}")
+        except OSError as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить логи:\n{e}")
 
     def closeEvent(self, event):
         """Обработчик закрытия приложения - корректное завершение"""
@@ -512,10 +713,30 @@ class MainWindow(QMainWindow):
             if hasattr(self, 'service_timer') and self.service_timer.isActive():
                 self.service_timer.stop()
 
-            # Удаляем наш кастомный обработчик логов
-            if hasattr(self, 'log_handler'):
-                self.logger.logger.removeHandler(self.log_handler)
-                self.log_handler = None
+            # Отменяем выполняемые команды RAC и останавливаем пул потоков
+            if hasattr(self, 'entity_prefetcher'):
+                self.entity_prefetcher.stop()
+            if hasattr(self, 'async_executor'):
+                self.async_executor.shutdown(wait=False)
+                self.command_executor.close()
+
+            # Отложенные изменения переменных записываются на диск
+            self.variable_manager.flush()
+
+            if getattr(self, 'stall_watchdog', None) is not None:
+                self.stall_watchdog.stop()
+
+            if hasattr(self, 'config_watcher'):
+                self.config_watcher.stop()
+
+            if getattr(self, 'metrics_server', None) is not None:
+                self.metrics_server.close()
+
+            # Отключаем буфер панели логов от потока записи журнала
+            if hasattr(self, 'log_buffer'):
+                self.log_text_edit.timer.stop()
+                self.logger.remove_handler(self.log_buffer)
+                self.log_buffer.close()
 
         except Exception as e:
             print(f"Ошибка при закрытии: {e}")
@@ -0,0 +1,128 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
+                             QTableWidgetItem, QPushButton, QHeaderView, QLabel,
+                             QDialogButtonBox)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QColor
+
+from core.metrics import MetricsRegistry
+
+# Период обновления таблицы, мс
+REFRESH_INTERVAL_MS = 2000
+
+COLUMNS = ["Хост", "Режим", "Команда", "Вызовов", "Ошибок", "Таймаутов", "Из кеша",
+           "p50", "p95", "Макс.", "Запуск rac", "Записей (ср.)", "Вывод (ср.)"]
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} мс"
+    return f"{seconds:.2f} с"
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("Б", "КБ", "МБ"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
+
+class NumericItem(QTableWidgetItem):
+    """Ячейка, сортируемая по числовому значению, а не по тексту"""
+
+    def __init__(self, text: str, value: float):
+        super().__init__(text)
+        self.value = value
+        self.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+    def __lt__(self, other):
+        if isinstance(other, NumericItem):
+            return self.value < other.value
+        return super().__lt__(other)
+
+
+class MetricsDialog(QDialog):
+    """Статистика выполнения команд RAC по хостам и режимам"""
+
+    def __init__(self, metrics: MetricsRegistry, exporter_address: str = "", parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.exporter_address = exporter_address
+
+        self.setWindowTitle("Статистика команд")
+        self.setMinimumSize(1100, 500)
+        self.setModal(False)
+
+        self.init_ui()
+        self.refresh()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_INTERVAL_MS)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        layout.addWidget(self.table)
+
+        if self.exporter_address:
+            exporter_text = f"Метрики Prometheus: {self.exporter_address}"
+        else:
+            exporter_text = "Экспорт метрик Prometheus отключен (задайте переменную metrics_port)"
+        exporter_label = QLabel(exporter_text)
+        exporter_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        layout.addWidget(exporter_label)
+
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton("Сбросить статистику")
+        reset_button.clicked.connect(self.reset)
+        button_layout.addWidget(reset_button)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def refresh(self):
+        """Перестроение таблицы по текущим метрикам"""
+        snapshot = self.metrics.snapshot()
+        # Сортировка при заполнении переставляла бы строки между setItem
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(snapshot))
+
+        for row, ((host, mode, command), metrics) in enumerate(sorted(snapshot.items())):
+            values = [
+                (host, None), (mode, None), (command, None),
+                (str(metrics.total), metrics.total),
+                (str(metrics.failures), metrics.failures),
+                (str(metrics.outcomes["timeout"]), metrics.outcomes["timeout"]),
+                (str(metrics.sources.get("cache", 0)), metrics.sources.get("cache", 0)),
+                (format_seconds(metrics.duration.quantile(0.5)), metrics.duration.quantile(0.5)),
+                (format_seconds(metrics.duration.quantile(0.95)), metrics.duration.quantile(0.95)),
+                (format_seconds(metrics.duration.max), metrics.duration.max),
+                (format_seconds(metrics.spawn.mean) if metrics.spawn.count else "", metrics.spawn.mean),
+                (f"{metrics.records.mean:.0f}", metrics.records.mean),
+                (format_bytes(metrics.bytes.mean) if metrics.bytes.count else "", metrics.bytes.mean),
+            ]
+            for column, (text, sort_value) in enumerate(values):
+                item = QTableWidgetItem(text) if sort_value is None else NumericItem(text, sort_value)
+                if metrics.failures and column == 4:
+                    item.setForeground(QColor("red"))
+                self.table.setItem(row, column, item)
+
+        self.table.setSortingEnabled(True)
+
+    def reset(self):
+        self.metrics.reset()
+        self.refresh()
+
+    def done(self, result):
+        self.timer.stop()
+        super().done(result)
@@ -0,0 +1,44 @@
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QComboBox
+from PyQt6.QtCore import pyqtSignal
+
+from core.variable_manager import VariableManager
+
+GLOBAL_PROFILE_TEXT = "(без профиля)"
+
+
+class ProfileSelector(QWidget):
+    """Выбор активного профиля переменных"""
+    profile_changed = pyqtSignal(object)  # имя профиля или None
+
+    def __init__(self, variable_manager: VariableManager, parent=None):
+        super().__init__(parent)
+        self.variable_manager = variable_manager
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel("Профиль переменных:"))
+        self.combo = QComboBox()
+        self.combo.setMinimumWidth(150)
+        layout.addWidget(self.combo)
+        layout.addStretch()
+
+        self.refresh()
+        self.combo.currentIndexChanged.connect(self.on_index_changed)
+
+    def refresh(self):
+        """Перезаполнение списка профилей с выбором активного"""
+        self.combo.blockSignals(True)
+        self.combo.clear()
+        self.combo.addItem(GLOBAL_PROFILE_TEXT, None)
+        for profile in self.variable_manager.get_profiles():
+            self.combo.addItem(profile, profile)
+        index = self.combo.findData(self.variable_manager.active_profile)
+        self.combo.setCurrentIndex(max(index, 0))
+        self.combo.blockSignals(False)
+
+    def on_index_changed(self, index: int):
+        profile = self.combo.itemData(index)
+        if profile == self.variable_manager.active_profile:
+            return
+        self.variable_manager.set_active_profile(profile)
+        self.profile_changed.emit(profile)
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from PyQt6.QtCore import QObject, QTimer
+
+from core.logger import RACLogger
+from core.profiling import PROFILER
+
+STALL_ENV = "RAC_ADMIN_STALL_MS"
+# Порог по умолчанию, если сторож включен режимом профилирования
+DEFAULT_STALL_MS = 200
+
+
+def stall_threshold_ms() -> Optional[int]:
+    """Порог зависания из RAC_ADMIN_STALL_MS; None — сторож не нужен"""
+    value = os.environ.get(STALL_ENV, "").strip()
+    if value:
+        try:
+            threshold = int(value)
+        except ValueError:
+            return None
+        return threshold if threshold > 0 else None
+    return DEFAULT_STALL_MS if PROFILER.enabled else None
+
+
+class StallWatchdog(QObject):
+    """Сторож потока интерфейса
+
+    Таймер в цикле событий Qt обновляет отметку времени, фоновый поток
+    проверяет ее. Если цикл событий не отвечает дольше порога, в журнал
+    пишется стек главного потока — то место, где он сейчас занят.
+    После восстановления записывается полная длительность зависания.
+    """
+
+    def __init__(self, logger: RACLogger, threshold_ms: int = DEFAULT_STALL_MS, parent=None):
+        super().__init__(parent)
+        self.logger = logger
+        self.threshold = threshold_ms / 1000
+        self.main_thread_id = threading.main_thread().ident
+        self.heartbeat = time.monotonic()
+        self.stopped = threading.Event()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.beat)
+        self.timer.start(max(10, min(50, threshold_ms // 4)))
+
+        self.thread = threading.Thread(target=self.watch, name="stall-watchdog", daemon=True)
+        self.thread.start()
+        self.logger.log_info(f"Сторож зависаний интерфейса включен, порог {threshold_ms} мс", "STALL")
+
+    def beat(self):
+        self.heartbeat = time.monotonic()
+
+    def watch(self):
+        interval = self.timer.interval() / 1000
+        stall_started = None
+        while not self.stopped.wait(interval):
+            heartbeat = self.heartbeat
+            blocked = time.monotonic() - heartbeat
+            if blocked > self.threshold and stall_started != heartbeat:
+                # Одно зависание сообщается один раз, со стеком в момент обнаружения
+                stall_started = heartbeat
+                self.report_stall(blocked)
+            elif stall_started is not None and heartbeat != stall_started:
+                duration = heartbeat - stall_started
+                self.logger.log_warning(f"Интерфейс не отвечал {duration * 1000:.0f} мс", "STALL")
+                PROFILER.complete("gui.stall", "ui", time.perf_counter_ns() - int(duration * 1e9))
+                stall_started = None
+
+    def report_stall(self, blocked: float):
+        frame = sys._current_frames().get(self.main_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "стек недоступен\n"
+        self.logger.log_warning(f"Цикл событий заблокирован дольше {blocked * 1000:.0f} мс, "
+                                f"стек главного потока:\n{stack.rstrip()}", "STALL")
+        PROFILER.instant("gui.stall_detected", "ui", blocked_ms=round(blocked * 1000), stack=stack)
+
+    def stop(self):
+        self.timer.stop()
+        self.stopped.set()
@@ -1,12 +1,18 @@
-from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableWidget,
-                             QTableWidgetItem, QPushButton, QHeaderView,
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTableView,
+                             QPushButton, QHeaderView,
                              QMessageBox, QLineEdit, QLabel, QFormLayout,
                              QDialogButtonBox, QGroupBox, QWidget, QApplication,
-                             QTabWidget)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QFont, QColor
+                             QTabWidget, QCheckBox, QInputDialog)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont
 
-from core.variable_manager import VariableManager, Variable
+from core.variable_manager import VariableManager
+from ui.profile_selector import ProfileSelector
+from ui.variables_model import VariablesTableModel, ButtonsDelegate
+
+EDIT_ACTION = "Изменить"
+DELETE_ACTION = "Удалить"
+USE_ACTION = "Использовать"
 
 
 class VariablesDialog(QDialog):
@@ -19,9 +25,48 @@ class VariablesDialog(QDialog):
         self.init_ui()
         self.load_variables()
 
+        # Изменения переменных вне диалога (в том числе перечитанный файл) обновляют таблицы;
+        # несколько уведомлений подряд приводят к одному обновлению
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.on_variables_refresh)
+        self.variable_manager.add_listener(self.on_variables_changed)
+
+    def on_variables_changed(self, names):
+        self.refresh_timer.start(0)
+
+    def on_variables_refresh(self):
+        self.profile_selector.refresh()
+        self.load_variables()
+
+    def done(self, result):
+        self.variable_manager.remove_listener(self.on_variables_changed)
+        self.refresh_timer.stop()
+        super().done(result)
+
     def init_ui(self):
         layout = QVBoxLayout(self)
 
+        # Профили переменных: выбор активного, создание и удаление
+        profile_layout = QHBoxLayout()
+        self.profile_selector = ProfileSelector(self.variable_manager)
+        self.profile_selector.profile_changed.connect(self.on_profile_changed)
+        new_profile_button = QPushButton("Новый профиль")
+        new_profile_button.clicked.connect(self.create_profile)
+        self.delete_profile_button = QPushButton("Удалить профиль")
+        self.delete_profile_button.clicked.connect(self.delete_profile)
+        profile_layout.addWidget(self.profile_selector)
+        profile_layout.addWidget(new_profile_button)
+        profile_layout.addWidget(self.delete_profile_button)
+        layout.addLayout(profile_layout)
+
+        # Фильтр по имени, значению и комментарию для обеих таблиц
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Фильтр по имени, значению или комментарию")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.textChanged.connect(self.on_filter_changed)
+        layout.addWidget(self.filter_edit)
+
         # Вкладки для разделения зарезервированных и пользовательских переменных
         self.tab_widget = QTabWidget()
 
@@ -63,9 +108,12 @@ class VariablesDialog(QDialog):
         self.comment_edit = QLineEdit()
         self.comment_edit.setPlaceholderText("Комментарий (необязательно)")
 
+        self.profile_only_check = QCheckBox("Только в активном профиле")
+
         form_layout.addRow("Имя переменной*:", self.name_edit)
         form_layout.addRow("Значение*:", self.value_edit)
         form_layout.addRow("Комментарий:", self.comment_edit)
+        form_layout.addRow("", self.profile_only_check)
 
         button_layout = QHBoxLayout()
         self.add_button = QPushButton("Добавить")
@@ -90,12 +138,12 @@ class VariablesDialog(QDialog):
         table_group = QGroupBox("Пользовательские переменные")
         table_layout = QVBoxLayout(table_group)
 
-        self.user_table = QTableWidget(0, 4)
-        self.user_table.setHorizontalHeaderLabels(["Имя", "Значение", "Комментарий", "Действия"])
-        self.user_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        self.user_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.user_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-        self.user_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        self.user_model = VariablesTableModel(
+            self.variable_manager, self.variable_manager.get_user_variables,
+            ["Имя", "Значение", "Комментарий", "Действия"], mask_secrets=True, parent=self)
+        self.user_actions = ButtonsDelegate([EDIT_ACTION, DELETE_ACTION, USE_ACTION], self)
+        self.user_actions.button_clicked.connect(self.on_user_action)
+        self.user_table = self.create_table(self.user_model, self.user_actions)
 
         table_layout.addWidget(self.user_table)
         layout.addWidget(table_group)
@@ -122,9 +170,12 @@ class VariablesDialog(QDialog):
         self.sys_comment_edit.setReadOnly(True)
         self.sys_comment_edit.setStyleSheet("background-color: #f0f0f0;")
 
+        self.sys_profile_only_check = QCheckBox("Только в активном профиле")
+
         form_layout.addRow("Имя переменной:", self.sys_name_edit)
         form_layout.addRow("Значение*:", self.sys_value_edit)
         form_layout.addRow("Назначение:", self.sys_comment_edit)
+        form_layout.addRow("", self.sys_profile_only_check)
 
         button_layout = QHBoxLayout()
         self.sys_update_button = QPushButton("Обновить значение")
@@ -144,131 +195,124 @@ class VariablesDialog(QDialog):
         table_group = QGroupBox("Системные переменные")
         table_layout = QVBoxLayout(table_group)
 
-        self.system_table = QTableWidget(0, 4)
-        self.system_table.setHorizontalHeaderLabels(["Имя", "Значение", "Назначение", "Действия"])
-        self.system_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        self.system_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.system_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-        self.system_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)
+        self.system_model = VariablesTableModel(
+            self.variable_manager, self.variable_manager.get_reserved_variables,
+            ["Имя", "Значение", "Назначение", "Действия"],
+            readonly_columns=(VariablesTableModel.NAME, VariablesTableModel.COMMENT), parent=self)
+        self.system_actions = ButtonsDelegate([USE_ACTION], self)
+        self.system_actions.button_clicked.connect(self.on_system_action)
+        self.system_table = self.create_table(self.system_model, self.system_actions)
 
         # Подключаем обработчик клика по таблице системных переменных
-        self.system_table.cellClicked.connect(self.on_system_cell_clicked)
+        self.system_table.clicked.connect(self.on_system_cell_clicked)
 
         table_layout.addWidget(self.system_table)
         layout.addWidget(table_group)
 
         return widget
 
+    def create_table(self, model: VariablesTableModel, actions: ButtonsDelegate) -> QTableView:
+        """Таблица переменных: кнопки действий рисует делегат последнего столбца"""
+        table = QTableView()
+        table.setModel(model)
+        table.setItemDelegateForColumn(VariablesTableModel.ACTIONS, actions)
+        table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        # Фиксированные размеры: представлению не нужно измерять каждую строку
+        size = actions.button_size(table.fontMetrics())
+        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        table.verticalHeader().setDefaultSectionSize(size.height())
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(VariablesTableModel.NAME, QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(VariablesTableModel.VALUE, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(VariablesTableModel.COMMENT, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(VariablesTableModel.ACTIONS, QHeaderView.ResizeMode.Fixed)
+        header.resizeSection(VariablesTableModel.NAME, 200)
+        header.resizeSection(VariablesTableModel.ACTIONS, size.width())
+        return table
+
     def load_variables(self):
         """Загрузка переменных в таблицы"""
-        self.load_user_variables()
-        self.load_system_variables()
-
-    def load_user_variables(self):
-        """Загрузка пользовательских переменных в таблицу"""
-        try:
-            variables = self.variable_manager.get_user_variables()
-            self.user_table.setRowCount(len(variables))
-
-            for row, variable in enumerate(variables):
-                # Имя переменной
-                name_item = QTableWidgetItem(variable.name)
-                self.user_table.setItem(row, 0, name_item)
-
-                # Значение (скрываем пароли)
-                value_text = variable.value
-                if any(keyword in variable.name.lower() for keyword in ['pwd', 'password', 'pass']):
-                    value_text = "••••••••"
-                value_item = QTableWidgetItem(value_text)
-                self.user_table.setItem(row, 1, value_item)
-
-                # Комментарий
-                comment_item = QTableWidgetItem(variable.comment)
-                self.user_table.setItem(row, 2, comment_item)
-
-                # Кнопки действий
-                action_widget = self.create_user_action_buttons(row, variable.name)
-                self.user_table.setCellWidget(row, 3, action_widget)
-
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка загрузки пользовательских переменных: {str(e)}")
-
-    def load_system_variables(self):
-        """Загрузка системных переменных в таблицу"""
-        try:
-            variables = self.variable_manager.get_reserved_variables()
-            self.system_table.setRowCount(len(variables))
-
-            for row, variable in enumerate(variables):
-                # Имя переменной
-                name_item = QTableWidgetItem(variable.name)
-                name_item.setBackground(QColor(240, 240, 240))
-                self.system_table.setItem(row, 0, name_item)
-
-                # Значение
-                value_item = QTableWidgetItem(variable.value)
-                self.system_table.setItem(row, 1, value_item)
-
-                # Комментарий
-                comment_item = QTableWidgetItem(variable.comment)
-                comment_item.setBackground(QColor(240, 240, 240))
-                self.system_table.setItem(row, 2, comment_item)
-
-                # Кнопка использования
-                use_widget = self.create_system_use_button(row, variable.name)
-                self.system_table.setCellWidget(row, 3, use_widget)
-
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка загрузки системных переменных: {str(e)}")
-
-    def create_user_action_buttons(self, row, var_name):
-        """Создание кнопок действий для пользовательских переменных"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(2, 2, 2, 2)
-
-        edit_btn = QPushButton("Изменить")
-        delete_btn = QPushButton("Удалить")
-        use_btn = QPushButton("Использовать")
-
-        edit_btn.setProperty("row_index", row)
-        delete_btn.setProperty("row_index", row)
-        use_btn.setProperty("row_index", row)
-
-        edit_btn.clicked.connect(lambda: self.edit_user_variable(row))
-        delete_btn.clicked.connect(lambda: self.delete_user_variable(row))
-        use_btn.clicked.connect(lambda: self.use_variable(var_name))
-
-        layout.addWidget(edit_btn)
-        layout.addWidget(delete_btn)
-        layout.addWidget(use_btn)
-
-        return widget
-
-    def create_system_use_button(self, row, var_name):
-        """Создание кнопки использования для системных переменных"""
-        widget = QWidget()
-        layout = QHBoxLayout(widget)
-        layout.setContentsMargins(2, 2, 2, 2)
+        has_profile = self.variable_manager.active_profile is not None
+        self.profile_only_check.setEnabled(has_profile)
+        self.sys_profile_only_check.setEnabled(has_profile)
+        self.delete_profile_button.setEnabled(has_profile)
+        if not has_profile:
+            self.profile_only_check.setChecked(False)
+            self.sys_profile_only_check.setChecked(False)
+        # Модели обновляют только изменившиеся строки
+        self.user_model.refresh()
+        self.system_model.refresh()
+
+    def on_filter_changed(self, text: str):
+        self.user_model.set_filter(text)
+        self.system_model.set_filter(text)
+
+    def target_profile(self, profile_only: QCheckBox):
+        """Профиль для записи: активный, если отмечено «только в профиле»"""
+        return self.variable_manager.active_profile if profile_only.isChecked() else None
+
+    def on_profile_changed(self, profile):
+        self.clear_form()
+        self.clear_system_form()
+        self.load_variables()
 
-        use_btn = QPushButton("Использовать")
-        use_btn.setProperty("row_index", row)
-        use_btn.clicked.connect(lambda: self.use_variable(var_name))
+    def create_profile(self):
+        """Создание профиля переменных"""
+        name, ok = QInputDialog.getText(self, "Новый профиль", "Имя профиля (например, prod, test):")
+        name = name.strip()
+        if not ok or not name:
+            return
+        is_valid, message = self.variable_manager.validate_profile_name(name)
+        if not is_valid:
+            QMessageBox.warning(self, "Ошибка", message)
+            return
+        self.variable_manager.create_profile(name)
+        self.variable_manager.set_active_profile(name)
+        self.profile_selector.refresh()
+        self.on_profile_changed(name)
+
+    def delete_profile(self):
+        """Удаление активного профиля"""
+        profile = self.variable_manager.active_profile
+        if profile is None:
+            return
+        reply = QMessageBox.question(
+            self,
+            "Подтверждение удаления",
+            f"Удалить профиль '{profile}' со всеми его переменными?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            self.variable_manager.delete_profile(profile)
+            self.profile_selector.refresh()
+            self.on_profile_changed(None)
+
+    def on_user_action(self, row: int, action: str):
+        name = self.user_model.name_at(row)
+        if name is None:
+            return
+        if action == EDIT_ACTION:
+            self.edit_user_variable(name)
+        elif action == DELETE_ACTION:
+            self.delete_user_variable(name)
+        else:
+            self.use_variable(name)
 
-        layout.addWidget(use_btn)
-        return widget
+    def on_system_action(self, row: int, action: str):
+        name = self.system_model.name_at(row)
+        if name is not None:
+            self.use_variable(name)
 
-    def on_system_cell_clicked(self, row, column):
+    def on_system_cell_clicked(self, index):
         """Обработчик клика по ячейке системной таблицы"""
         try:
-            if column != 3:  # Не обрабатываем клик по кнопке "Использовать"
-                name = self.system_table.item(row, 0).text()
-                value = self.system_table.item(row, 1).text()
-                comment = self.system_table.item(row, 2).text()
-
-                self.sys_name_edit.setText(name)
-                self.sys_value_edit.setText(value)
-                self.sys_comment_edit.setText(comment)
+            row = self.system_model.row_at(index.row())
+            if row is not None and index.column() != VariablesTableModel.ACTIONS:
+                self.sys_name_edit.setText(row.name)
+                self.sys_value_edit.setText(row.value)
+                self.sys_comment_edit.setText(row.comment)
+                self.sys_profile_only_check.setChecked(row.overridden)
 
         except Exception as e:
             print(f"Ошибка при выборе системной переменной: {e}")
@@ -322,12 +366,20 @@ class VariablesDialog(QDialog):
                 QMessageBox.warning(self, "Ошибка", message)
                 return
 
-            # Проверяем, не существует ли уже переменная
-            if self.variable_manager.get_variable(name):
+            # Проверяем, не существует ли уже переменная (в профиле можно переопределить глобальную)
+            profile = self.target_profile(self.profile_only_check)
+            exists = (self.variable_manager.is_overridden(name) if profile
+                      else self.variable_manager.get_variable(name))
+            if exists:
                 QMessageBox.warning(self, "Ошибка", f"Переменная '{name}' уже существует")
                 return
 
-            self.variable_manager.set_variable(name, value, comment)
+            is_valid, message = self.variable_manager.validate_variable_value(name, value)
+            if not is_valid:
+                QMessageBox.warning(self, "Ошибка", message)
+                return
+
+            self.variable_manager.set_variable(name, value, comment, profile=profile)
             self.load_variables()
             self.clear_form()
             QMessageBox.information(self, "Успех", f"Переменная '{name}' добавлена")
@@ -335,10 +387,9 @@ class VariablesDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка добавления переменной: {str(e)}")
 
-    def edit_user_variable(self, row):
+    def edit_user_variable(self, name: str):
         """Редактирование пользовательской переменной"""
         try:
-            name = self.user_table.item(row, 0).text()
             variable = self.variable_manager.get_variable_with_comment(name)
 
             if variable and not variable.reserved:
@@ -346,6 +397,7 @@ class VariablesDialog(QDialog):
                 self.name_edit.setText(variable.name)
                 self.value_edit.setText(variable.value)
                 self.comment_edit.setText(variable.comment)
+                self.profile_only_check.setChecked(self.variable_manager.is_overridden(name))
 
                 # Активируем режим обновления
                 self.add_button.setEnabled(False)
@@ -365,7 +417,13 @@ class VariablesDialog(QDialog):
                 QMessageBox.warning(self, "Ошибка", "Заполните имя и значение переменной")
                 return
 
-            self.variable_manager.set_variable(name, value, comment)
+            is_valid, message = self.variable_manager.validate_variable_value(name, value)
+            if not is_valid:
+                QMessageBox.warning(self, "Ошибка", message)
+                return
+
+            self.variable_manager.set_variable(name, value, comment,
+                                               profile=self.target_profile(self.profile_only_check))
             self.load_variables()
             self.clear_form()
             QMessageBox.information(self, "Успех", f"Переменная '{name}' обновлена")
@@ -373,11 +431,9 @@ class VariablesDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Ошибка обновления переменной: {str(e)}")
 
-    def delete_user_variable(self, row):
+    def delete_user_variable(self, name: str):
         """Удаление пользовательской переменной"""
         try:
-            name = self.user_table.item(row, 0).text()
-
             reply = QMessageBox.question(
                 self,
                 "Подтверждение удаления",
@@ -409,7 +465,12 @@ class VariablesDialog(QDialog):
             # Для системных переменных можно менять только значение
             existing_var = self.variable_manager.get_variable_with_comment(name)
             if existing_var and existing_var.reserved:
-                self.variable_manager.set_variable(name, value, existing_var.comment, reserved=True)
+                is_valid, message = self.variable_manager.validate_variable_value(name, value)
+                if not is_valid:
+                    QMessageBox.warning(self, "Ошибка", message)
+                    return
+                self.variable_manager.set_variable(name, value, existing_var.comment, reserved=True,
+                                                   profile=self.target_profile(self.sys_profile_only_check))
                 self.load_variables()
                 self.clear_system_form()
                 QMessageBox.information(self, "Успех", f"Системная переменная '{name}' обновлена")
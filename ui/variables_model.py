@@ -0,0 +1,232 @@
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle, QStyleOptionButton, QApplication
+from PyQt6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QRect, QSize, QEvent,
+                          pyqtSignal)
+from PyQt6.QtGui import QColor
+
+from core.text_index import TextIndex
+from core.variable_manager import Variable, VariableManager
+
+# Цвет значений, переопределенных в активном профиле
+OVERRIDE_COLOR = QColor(0, 90, 180)
+READONLY_BACKGROUND = QColor(240, 240, 240)
+SECRET_MASK = "••••••••"
+SECRET_KEYWORDS = ('pwd', 'password', 'pass')
+
+
+def is_secret(name: str) -> bool:
+    """Значение переменной не показывается и не участвует в поиске"""
+    return any(keyword in name.lower() for keyword in SECRET_KEYWORDS)
+
+
+class VariableRow(NamedTuple):
+    """Снимок строки таблицы: изменение любого поля обновляет строку"""
+    name: str
+    value: str
+    comment: str
+    overridden: bool
+
+
+class VariablesTableModel(QAbstractTableModel):
+    """Таблица переменных с фильтром и обновлением только измененных строк
+
+    refresh() сравнивает переменные менеджера с текущими строками и
+    сообщает представлению о вставках, удалениях и изменениях, поэтому
+    после правки одной переменной перерисовывается одна строка.
+    """
+    NAME, VALUE, COMMENT, ACTIONS = range(4)
+
+    def __init__(self, variable_manager: VariableManager, source: Callable[[], List[Variable]],
+                 headers: Sequence[str], mask_secrets: bool = False, readonly_columns: Sequence[int] = (),
+                 parent=None):
+        super().__init__(parent)
+        self.variable_manager = variable_manager
+        self.source = source
+        self.headers = list(headers)
+        self.mask_secrets = mask_secrets
+        self.readonly_columns = set(readonly_columns)
+        # Все переменные источника по порядку и видимые после фильтра
+        self.all_rows: Dict[str, VariableRow] = {}
+        self.rows: List[VariableRow] = []
+        self.search_index = TextIndex()
+        self.filter_text = ""
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.NAME:
+                return row.name
+            if column == self.VALUE:
+                return SECRET_MASK if self.mask_secrets and is_secret(row.name) else row.value
+            if column == self.COMMENT:
+                return row.comment
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.VALUE and row.overridden:
+                return OVERRIDE_COLOR
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            if column == self.VALUE and row.overridden:
+                return f"Переопределено в профиле '{self.variable_manager.active_profile}'"
+        elif role == Qt.ItemDataRole.BackgroundRole:
+            if column in self.readonly_columns:
+                return READONLY_BACKGROUND
+        return None
+
+    def name_at(self, row: int) -> Optional[str]:
+        return self.rows[row].name if 0 <= row < len(self.rows) else None
+
+    def row_at(self, row: int) -> Optional[VariableRow]:
+        return self.rows[row] if 0 <= row < len(self.rows) else None
+
+    def refresh(self):
+        """Перечитывание переменных из менеджера с обновлением индекса поиска"""
+        all_rows = {}
+        for variable in self.source():
+            row = VariableRow(variable.name, variable.value, variable.comment,
+                              self.variable_manager.is_overridden(variable.name))
+            all_rows[variable.name] = row
+            if self.all_rows.get(variable.name) != row:
+                self.search_index.update(variable.name, self.search_text(row))
+        for name in self.all_rows.keys() - all_rows.keys():
+            self.search_index.remove(name)
+        self.all_rows = all_rows
+        self.apply_rows(self.visible_rows())
+
+    def set_filter(self, text: str):
+        self.filter_text = text.strip()
+        self.apply_rows(self.visible_rows())
+
+    def search_text(self, row: VariableRow) -> str:
+        value = "" if is_secret(row.name) else row.value
+        return "\n".join((row.name, value, row.comment))
+
+    def visible_rows(self) -> List[VariableRow]:
+        if not self.filter_text:
+            return list(self.all_rows.values())
+        matches = self.search_index.search(self.filter_text)
+        return [row for name, row in self.all_rows.items() if name in matches]
+
+    def apply_rows(self, new_rows: List[VariableRow]):
+        """Переход к new_rows блоками удалений, вставок и изменений строк"""
+        new_names = {row.name: position for position, row in enumerate(new_rows)}
+
+        # Удаление строк, которых больше нет, смежными блоками с конца
+        position = len(self.rows) - 1
+        while position >= 0:
+            if self.rows[position].name in new_names:
+                position -= 1
+                continue
+            last = position
+            while position >= 0 and self.rows[position].name not in new_names:
+                position -= 1
+            self.beginRemoveRows(QModelIndex(), position + 1, last)
+            del self.rows[position + 1:last + 1]
+            self.endRemoveRows()
+
+        # Оставшиеся строки должны идти в новом порядке, иначе таблица строится заново
+        order = [new_names[row.name] for row in self.rows]
+        if any(a > b for a, b in zip(order, order[1:])):
+            self.beginResetModel()
+            self.rows = list(new_rows)
+            self.endResetModel()
+            return
+
+        position = 0
+        while position < len(new_rows):
+            if position < len(self.rows) and self.rows[position].name == new_rows[position].name:
+                if self.rows[position] != new_rows[position]:
+                    self.rows[position] = new_rows[position]
+                    self.dataChanged.emit(self.index(position, self.NAME), self.index(position, self.COMMENT))
+                position += 1
+                continue
+            # Блок новых строк до следующей уже показанной
+            end = position
+            current = self.rows[position].name if position < len(self.rows) else None
+            while end < len(new_rows) and new_rows[end].name != current:
+                end += 1
+            self.beginInsertRows(QModelIndex(), position, end - 1)
+            self.rows[position:position] = new_rows[position:end]
+            self.endInsertRows()
+            position = end
+
+
+class ButtonsDelegate(QStyledItemDelegate):
+    """Кнопки действий, нарисованные в ячейке вместо виджета на каждую строку"""
+    button_clicked = pyqtSignal(int, str)  # строка, действие
+
+    MARGIN = 2
+    PADDING = 16
+
+    def __init__(self, actions: Sequence[str], parent=None):
+        super().__init__(parent)
+        self.actions = list(actions)
+        self.pressed = None  # (строка, номер кнопки)
+
+    def button_rects(self, option) -> List[QRect]:
+        metrics = option.fontMetrics
+        rects = []
+        x = option.rect.left() + self.MARGIN
+        height = option.rect.height() - 2 * self.MARGIN
+        for action in self.actions:
+            width = metrics.horizontalAdvance(action) + self.PADDING
+            rects.append(QRect(x, option.rect.top() + self.MARGIN, width, height))
+            x += width + self.MARGIN
+        return rects
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        widget = option.widget
+        style = widget.style() if widget is not None else QApplication.style()
+        for number, (action, rect) in enumerate(zip(self.actions, self.button_rects(option))):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = action
+            button.state = QStyle.StateFlag.State_Enabled
+            if self.pressed == (index.row(), number):
+                button.state |= QStyle.StateFlag.State_Sunken
+            else:
+                button.state |= QStyle.StateFlag.State_Raised
+            style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, widget)
+
+    def button_size(self, metrics) -> QSize:
+        """Размер ячейки со всеми кнопками"""
+        width = sum(metrics.horizontalAdvance(action) + self.PADDING + self.MARGIN for action in self.actions)
+        return QSize(width + self.MARGIN, metrics.height() + 12)
+
+    def sizeHint(self, option, index):
+        return self.button_size(option.fontMetrics)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease):
+            return super().editorEvent(event, model, option, index)
+        if event.button() != Qt.MouseButton.LeftButton:
+            return False
+        position = event.position().toPoint()
+        number = next((number for number, rect in enumerate(self.button_rects(option))
+                       if rect.contains(position)), None)
+        if option.widget is not None:
+            option.widget.viewport().update(option.rect)
+        if event.type() == QEvent.Type.MouseButtonPress:
+            self.pressed = (index.row(), number) if number is not None else None
+            return number is not None
+        # Нажатие засчитывается, если кнопку отпустили над той же кнопкой
+        clicked = number is not None and self.pressed == (index.row(), number)
+        self.pressed = None
+        if clicked:
+            self.button_clicked.emit(index.row(), self.actions[number])
+        return clicked